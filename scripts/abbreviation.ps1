@@ -4,6 +4,12 @@ param(
   [int]$Limit = 100,
   [int]$Batch = 200,
   [switch]$All,
+  [switch]$FromStart,
+  [switch]$Lease,
+  [string]$WorkerId = "",
+  [int]$Workers = 0,
+  [ValidateSet("embedded", "sentences")]
+  [string]$Schema = "embedded",
   [switch]$Verbose,
   [string]$MongoUri = "mongodb://host.docker.internal:27017",
   [string]$MongoDb = "tiktok_live",
@@ -40,6 +46,11 @@ $cmd = @(
 
 if ($Limit -gt 0) { $cmd += @("--limit", $Limit) }
 if ($All) { $cmd += "--all" }
+if ($FromStart) { $cmd += "--from-start" }
+if ($Lease) { $cmd += "--lease" }
+if ($WorkerId -and $WorkerId.Trim() -ne "") { $cmd += @("--worker-id", $WorkerId) }
+if ($Workers -gt 0) { $cmd += @("--workers", $Workers) }
+if ($Schema -ne "embedded") { $cmd += @("--schema", $Schema) }
 if ($Verbose) { $cmd += "--verbose" }
 
 Write-Host "docker $($cmd -join ' ')"
@@ -0,0 +1,67 @@
+"""Benchmark: align_tokens vs the previous find()/global-find() offset loop on long inputs.
+
+Three token streams over the same long text: every token literal, every third token altered
+(NFKC-folded / merged across a space) and no token matching at all (the old worst case).
+
+    python scripts/bench_align.py [--tokens N]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from app.align import align_tokens  # noqa: E402
+
+
+def reference_offsets(text: str, tokens: List[str]) -> List[Tuple[Optional[int], Optional[int]]]:
+    """annotate_sentence's offsets before align.py."""
+    offsets: List[Tuple[Optional[int], Optional[int]]] = []
+    pos = 0
+    for tk in tokens:
+        if not tk:
+            offsets.append((None, None))
+            continue
+        idx = text.find(tk, pos)
+        if idx == -1:
+            idx = text.find(tk)
+        if idx == -1:
+            while pos < len(text) and text[pos].isspace():
+                pos += 1
+            offsets.append((pos, pos + len(tk)))
+            pos += len(tk)
+        else:
+            offsets.append((idx, idx + len(tk)))
+            pos = idx + len(tk)
+    return offsets
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tokens", type=int, default=40000)
+    args = ap.parse_args()
+    rng = random.Random(47)
+    words = ["".join(rng.choice("กขคงจ１２") for _ in range(rng.randint(1, 5))) for _ in range(args.tokens)]
+    text = " ".join(words)
+    altered = [w.replace("１", "1") if i % 3 == 0 else w for i, w in enumerate(words)]
+    streams = {
+        "literal": words,
+        "altered": altered,
+        "no match": ["ฮ" + w for w in words],
+    }
+    for name, tokens in streams.items():
+        for label, fn in (("before", reference_offsets), ("after", align_tokens)):
+            t0 = time.perf_counter()
+            fn(text, tokens)
+            print(f"{name:>8} {label:>6}: {len(tokens)} tokens in {time.perf_counter() - t0:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,41 @@
+"""Micro-benchmark: normalize_text vs the five-pass reference, over the fixture articles.
+
+    python scripts/bench_normalize.py [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests")]
+
+from app.text_normalize import normalize_text  # noqa: E402
+from conftest import load_articles  # noqa: E402
+from test_text_normalize import reference_normalize  # noqa: E402
+
+
+def _time(fn, lines, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            fn(line)
+    return time.perf_counter() - t0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=2000)
+    args = ap.parse_args()
+    lines = [line for a in load_articles() for line in a["content"].splitlines()]
+    n = len(lines) * args.repeat
+    for name, fn in (("reference", reference_normalize), ("normalize_text", normalize_text)):
+        elapsed = _time(fn, lines, args.repeat)
+        print(f"{name:>15}: {n} lines in {elapsed:.3f}s ({n / elapsed:,.0f} lines/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,40 @@
+"""Benchmark: build_sentence_heads vs the previous one-scan-per-head implementation.
+
+Random dependency trees of a few sentence lengths; outputs are compared before timing.
+
+    python scripts/bench_sentence_heads.py [--sentences N]
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests")]
+
+from app.sentence_heads import build_sentence_heads  # noqa: E402
+from test_sentence_heads import random_tree, reference_sentence_heads  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sentences", type=int, default=200)
+    args = ap.parse_args()
+    rng = random.Random(31)
+    for length in (15, 60, 250, 600):
+        trees = [random_tree(rng, length) for _ in range(args.sentences)]
+        for toks in trees[:20]:
+            assert build_sentence_heads(toks) == reference_sentence_heads(toks)
+        for label, fn in (("before", reference_sentence_heads), ("after", build_sentence_heads)):
+            t0 = time.perf_counter()
+            for toks in trees:
+                fn(toks)
+            print(f"{length:>4} tokens {label:>6}: {len(trees)} sentences in {time.perf_counter() - t0:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,79 @@
+"""Before/after benchmark for sentence-token over the fixture corpus (requires pythainlp).
+
+"before" is the previous per-item path (sent_tokenize on every sentence item, no dedupe or
+cache); "after" is _sentence_token_fields with the per-document dedupe, LRU cache and
+--min-len gate. Both run in-process on the same documents; outputs are compared at min_len 0.
+
+    python scripts/bench_sentence_token.py [--copies N] [--min-len N]
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests")]
+
+from app.segmenter import split_nonempty_lines  # noqa: E402
+from app.sentence_split import build_sentences_array  # noqa: E402
+from app.sentence_token import _sentence_token_fields, _split_text, sent_tokenize  # noqa: E402
+from app.text_normalize import normalize_text  # noqa: E402
+from conftest import load_articles  # noqa: E402
+
+
+def reference_fields(doc: dict) -> dict | None:
+    """sentence-token before per-document dedupe and caching."""
+    out: List[dict] = []
+    changed = False
+    for item in doc.get("sentences") or []:
+        text = str(item.get("text", ""))
+        subs = [s.strip() for s in (sent_tokenize(text) or []) if s and s.strip()]
+        if subs and not (len(subs) == 1 and subs[0] == text):
+            changed = True
+        if not subs:
+            out.append({"text": text})
+        else:
+            out.extend({"text": s} for s in subs)
+    return {"sentences": out} if changed else None
+
+
+def fixture_docs(copies: int) -> List[dict]:
+    docs = []
+    for art in load_articles():
+        for line in split_nonempty_lines(art["content"]):
+            content = normalize_text(line)
+            if content:
+                docs.append({"sentences": build_sentences_array(content)})
+    return docs * copies
+
+
+def _run(name: str, fn, docs: List[dict]) -> list:
+    t0 = time.perf_counter()
+    results = [fn(d) for d in docs]
+    elapsed = time.perf_counter() - t0
+    print(f"{name:>6}: {len(docs)} docs in {elapsed:.2f}s ({len(docs) / elapsed:,.1f} docs/s)")
+    return results
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--copies", type=int, default=20, help="times the fixture documents are repeated")
+    ap.add_argument("--min-len", dest="min_len", type=int, default=0)
+    args = ap.parse_args()
+    docs = fixture_docs(args.copies)
+    before = _run("before", reference_fields, docs)
+    _split_text.cache_clear()
+    after = _run("after", lambda d: _sentence_token_fields(d, min_len=args.min_len), docs)
+    info = _split_text.cache_info()
+    print(f"cache -> hits: {info.hits}, misses: {info.misses}")
+    if args.min_len == 0 and before != after:
+        print("outputs differ", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""Benchmark: tokenize docs/s and peak RSS for several --workers values (requires stanza models).
+
+Each workers value runs in its own process, since peak RSS (ru_maxrss) only grows within a
+process. The documents are the fixture articles, split into sentences as the pipeline does.
+
+    python scripts/bench_tokenize_workers.py [--workers 0 1 2 4] [--copies N] [--profile full]
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src"), str(ROOT / "tests")]
+
+
+def fixture_docs(copies: int) -> List[dict]:
+    from app.segmenter import split_nonempty_lines
+    from app.sentence_split import build_sentences_array
+    from app.text_normalize import normalize_text
+    from conftest import load_articles
+
+    docs = []
+    for art in load_articles():
+        sentences = []
+        for line in split_nonempty_lines(art["content"]):
+            sentences.extend(build_sentences_array(normalize_text(line)))
+        if sentences:
+            docs.append({"sentences": sentences})
+    return docs * copies
+
+
+def run_one(workers: int, copies: int, profile: str, chunk: int) -> None:
+    from app.tokenize import _rss_summary, prepare_tokenize
+
+    # Pool first, like cmd_tokenize: workers fork right after the model loads
+    run = prepare_tokenize(workers=workers, profile=profile)
+    docs = fixture_docs(copies)
+    t0 = time.perf_counter()
+    try:
+        for i in range(0, len(docs), chunk):
+            part = docs[i:i + chunk]
+            if run.pool is not None:
+                run.compute_chunk(part)
+                continue
+            for doc in part:
+                run.compute(doc)
+    finally:
+        elapsed = time.perf_counter() - t0
+        run.close()  # workers must exit before their peak RSS is reported
+    rate = len(docs) / elapsed if elapsed > 0 else 0.0
+    print(f"workers {workers:>2}: {len(docs)} docs in {elapsed:.1f}s ({rate:.2f} docs/s), {_rss_summary()}")
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    ap.add_argument("--copies", type=int, default=3, help="times the fixture documents are repeated")
+    ap.add_argument("--profile", default="full")
+    ap.add_argument("--chunk", type=int, default=20, help="documents per compute_chunk call (the stage's --batch)")
+    ap.add_argument("--one", action="store_true", help=argparse.SUPPRESS)  # child mode: a single workers value
+    args = ap.parse_args()
+    if args.one:
+        run_one(args.workers[0], args.copies, args.profile, args.chunk)
+        return 0
+    for workers in args.workers:
+        cmd = [
+            sys.executable, __file__, "--one", "--workers", str(workers),
+            "--copies", str(args.copies), "--profile", args.profile, "--chunk", str(args.chunk),
+        ]
+        res = subprocess.run(cmd)
+        if res.returncode != 0:
+            return res.returncode
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,35 @@
+param(
+    [string]$Image = "wiki-nlp-cli",
+    [int]$Count = 5,
+    [string]$MongoUri = "mongodb://host.docker.internal:27017",
+    [string]$MongoDb = "tiktok_live",
+    [string]$MongoUser = "appuser",
+    [string]$MongoPassword = "apppass",
+    [string]$MongoAuthDb = "admin",
+    [string]$Network = ""
+)
+
+$envs = @(
+    "-e", "MONGO_URI=$MongoUri",
+    "-e", "MONGO_DB=$MongoDb",
+    "-e", "MONGO_USER=$MongoUser",
+    "-e", "MONGO_PASSWORD=$MongoPassword",
+    "-e", "MONGO_AUTH_DB=$MongoAuthDb"
+)
+
+$netArgs = @()
+if ($Network -and $Network.Trim() -ne "") {
+    $netArgs = @("--network", $Network)
+}
+
+$cmd = @(
+    "run", "--rm",
+    $envs,
+    $netArgs,
+    $Image,
+    "db-ping",
+    "--count", $Count
+)
+
+Write-Host "docker $($cmd -join ' ')"
+docker @cmd
@@ -2,6 +2,11 @@ param(
     [string]$Tag = "wiki-nlp-cli",
     [string]$Collection = "corpus",
     [switch]$All,
+    [switch]$FromStart,
+    [switch]$Lease,
+    [string]$WorkerId = "",
+    [ValidateSet("embedded", "sentences")]
+    [string]$Schema = "embedded",
     [switch]$Train = $true,
     [int]$Limit = 100,
     [int]$EncodeBatch = 64,
@@ -41,6 +46,10 @@ $dockerArgs += @($Tag, "embeddings", "--collection", $Collection, "--encode-batc
 
 if ($Limit -gt 0) { $dockerArgs += @("--limit", "$Limit") }
 if ($All) { $dockerArgs += "--all" }
+if ($FromStart) { $dockerArgs += "--from-start" }
+if ($Lease) { $dockerArgs += "--lease" }
+if ($WorkerId -and $WorkerId.Trim() -ne "") { $dockerArgs += @("--worker-id", $WorkerId) }
+if ($Schema -ne "embedded") { $dockerArgs += @("--schema", $Schema) }
 if ($Train) {
     $dockerArgs += @("--train", "--train-epochs", "$TrainEpochs", "--train-batch", "$TrainBatch")
     if ($TrainLimitDocs -gt 0) { $dockerArgs += @("--train-limit-docs", "$TrainLimitDocs") }
@@ -4,6 +4,7 @@ param(
     [string]$Collection = "corpus",
     [int]$Batch = 100,
     [int]$Max = 25,
+    [int]$Workers = 0,
     [switch]$Replace,
     [switch]$Force,
     [string]$MongoUri = "mongodb://host.docker.internal:27017",
@@ -41,6 +42,7 @@ $cmd = @(
     "--state", $State
 )
 if ($Max -gt 0) { $cmd += @("--max", $Max) }
+if ($Workers -gt 0) { $cmd += @("--workers", $Workers) }
 if ($Replace) { $cmd += "--replace" }
 if ($Force) { $cmd += "--force" }
 
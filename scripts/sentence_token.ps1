@@ -4,6 +4,13 @@ param(
   [int]$Limit = 1000,
   [int]$Batch = 200,
   [switch]$All,
+  [switch]$FromStart,
+  [switch]$Lease,
+  [string]$WorkerId = "",
+  [int]$Workers = 0,
+  [int]$MinLen = 0,
+  [ValidateSet("embedded", "sentences")]
+  [string]$Schema = "embedded",
   [switch]$Verbose,
   [string]$MongoUri = "mongodb://host.docker.internal:27017",
   [string]$MongoDb = "tiktok_live",
@@ -40,6 +47,12 @@ $cmd = @(
 
 if ($Limit -gt 0) { $cmd += @("--limit", $Limit) }
 if ($All) { $cmd += "--all" }
+if ($FromStart) { $cmd += "--from-start" }
+if ($Lease) { $cmd += "--lease" }
+if ($WorkerId -and $WorkerId.Trim() -ne "") { $cmd += @("--worker-id", $WorkerId) }
+if ($Workers -gt 0) { $cmd += @("--workers", $Workers) }
+if ($MinLen -gt 0) { $cmd += @("--min-len", $MinLen) }
+if ($Schema -ne "embedded") { $cmd += @("--schema", $Schema) }
 if ($Verbose) { $cmd += "--verbose" }
 
 Write-Host "docker $($cmd -join ' ')"
@@ -4,6 +4,13 @@ param(
     [int]$Limit = 1000,
     [int]$Batch = 500,
     [switch]$All,
+    [switch]$FromStart,
+    [switch]$Server,
+    [switch]$Lease,
+    [string]$WorkerId = "",
+    [int]$Workers = 0,
+    [ValidateSet("embedded", "sentences")]
+    [string]$Schema = "embedded",
     [string]$MongoUri = "mongodb://host.docker.internal:27017",
     [string]$MongoDb = "tiktok_live",
     [string]$MongoUser = "appuser",
@@ -38,6 +45,12 @@ $cmd = @(
 
 if ($Limit -gt 0) { $cmd += @("--limit", $Limit) }
 if ($All) { $cmd += "--all" }
+if ($FromStart) { $cmd += "--from-start" }
+if ($Server) { $cmd += "--server" }
+if ($Lease) { $cmd += "--lease" }
+if ($WorkerId -and $WorkerId.Trim() -ne "") { $cmd += @("--worker-id", $WorkerId) }
+if ($Workers -gt 0) { $cmd += @("--workers", $Workers) }
+if ($Schema -ne "embedded") { $cmd += @("--schema", $Schema) }
 
 Write-Host "docker $($cmd -join ' ')"
 docker @cmd
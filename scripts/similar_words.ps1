@@ -0,0 +1,21 @@
+param(
+  [Parameter(Mandatory = $true)]
+  [string[]]$Words,
+  [string]$Image = "wiki-nlp-cli",
+  [string]$OutputDir = "models/wordvec",
+  [int]$TopN = 10
+)
+
+$cmd = @(
+  "run", "--rm",
+  "-e", "PYTHONUNBUFFERED=1",
+  "-v", "${PWD}:/app",
+  $Image,
+  "similar-words"
+) + $Words + @(
+  "--output-dir", $OutputDir,
+  "--topn", $TopN
+)
+
+Write-Host "docker $($cmd -join ' ')"
+docker @cmd
@@ -4,6 +4,11 @@ param(
   [int]$Limit = 1000,
   [int]$Batch = 200,
   [switch]$All,
+  [switch]$FromStart,
+  [switch]$Server,
+  [switch]$Lease,
+  [string]$WorkerId = "",
+  [int]$Workers = 0,
   [switch]$Verbose,
   [string]$MongoUri = "mongodb://host.docker.internal:27017",
   [string]$MongoDb = "tiktok_live",
@@ -40,6 +45,11 @@ $cmd = @(
 
 if ($Limit -gt 0) { $cmd += @("--limit", $Limit) }
 if ($All) { $cmd += "--all" }
+if ($FromStart) { $cmd += "--from-start" }
+if ($Server) { $cmd += "--server" }
+if ($Lease) { $cmd += "--lease" }
+if ($WorkerId -and $WorkerId.Trim() -ne "") { $cmd += @("--worker-id", $WorkerId) }
+if ($Workers -gt 0) { $cmd += @("--workers", $Workers) }
 if ($Verbose) { $cmd += "--verbose" }
 
 Write-Host "docker $($cmd -join ' ')"
@@ -4,7 +4,18 @@ param(
   [int]$Limit = 100,
   [int]$Batch = 100,
   [switch]$All,
+  [switch]$FromStart,
+  [switch]$Lease,
+  [string]$WorkerId = "",
+  [ValidateSet("embedded", "sentences")]
+  [string]$Schema = "embedded",
   [switch]$Verbose,
+  [switch]$Columnar,
+  [int]$MaxTokens = 120,
+  [int]$Workers = 0,
+  [int]$Threads = 0,
+  [ValidateSet("full", "pos+depparse", "pos-only")]
+  [string]$NlpProfile = "full",
   [string]$MongoUri = "mongodb://host.docker.internal:27017",
   [string]$MongoDb = "tiktok_live",
   [string]$MongoUser = "appuser",
@@ -35,12 +46,21 @@ $cmd = @(
   $Image,
   "tokenize",
   "--collection", $Collection,
-  "--batch", $Batch
+  "--batch", $Batch,
+  "--max-tokens", $MaxTokens,
+  "--profile", $NlpProfile
 )
 
 if ($Limit -gt 0) { $cmd += @("--limit", $Limit) }
 if ($All) { $cmd += "--all" }
+if ($FromStart) { $cmd += "--from-start" }
+if ($Lease) { $cmd += "--lease" }
+if ($WorkerId -and $WorkerId.Trim() -ne "") { $cmd += @("--worker-id", $WorkerId) }
+if ($Workers -gt 0) { $cmd += @("--workers", $Workers) }
+if ($Threads -gt 0) { $cmd += @("--threads", $Threads) }
+if ($Schema -ne "embedded") { $cmd += @("--schema", $Schema) }
 if ($Verbose) { $cmd += "--verbose" }
+if ($Columnar) { $cmd += "--columnar" }
 
 Write-Host "docker $($cmd -join ' ')"
 docker @cmd
\ No newline at end of file
@@ -0,0 +1,62 @@
+param(
+  [string]$Image = "wiki-nlp-cli",
+  [string]$Collection = "corpus",
+  [string]$OutputDir = "models/wordvec",
+  [ValidateSet("", "word2vec", "fasttext")]
+  [string]$Algorithm = "",
+  [int]$VectorSize = 0,
+  [int]$Window = 0,
+  [int]$MinCount = -1,
+  [int]$Epochs = 5,
+  [int]$Workers = 4,
+  [int]$Limit = 0,
+  [int]$Batch = 500,
+  [switch]$Rebuild,
+  [switch]$Verbose,
+  [string]$MongoUri = "mongodb://host.docker.internal:27017",
+  [string]$MongoDb = "tiktok_live",
+  [string]$MongoUser = "appuser",
+  [string]$MongoPassword = "apppass",
+  [string]$MongoAuthDb = "admin",
+  [string]$Network = ""
+)
+
+$envs = @(
+  "-e", "MONGO_URI=$MongoUri",
+  "-e", "MONGO_DB=$MongoDb",
+  "-e", "MONGO_USER=$MongoUser",
+  "-e", "MONGO_PASSWORD=$MongoPassword",
+  "-e", "MONGO_AUTH_DB=$MongoAuthDb",
+  "-e", "PYTHONUNBUFFERED=1"
+)
+
+$netArgs = @()
+if ($Network -and $Network.Trim() -ne "") {
+  $netArgs = @("--network", $Network)
+}
+
+$cmd = @(
+  "run", "--rm",
+  $envs,
+  $netArgs,
+  "-v", "${PWD}:/app",
+  $Image,
+  "train-wordvec",
+  "--collection", $Collection,
+  "--output-dir", $OutputDir,
+  "--epochs", $Epochs,
+  "--workers", $Workers,
+  "--batch", $Batch
+)
+
+# Model settings are passed only when given: a continued model keeps its own (conflicts are an error)
+if ($Algorithm) { $cmd += @("--algorithm", $Algorithm) }
+if ($VectorSize -gt 0) { $cmd += @("--vector-size", $VectorSize) }
+if ($Window -gt 0) { $cmd += @("--window", $Window) }
+if ($MinCount -ge 0) { $cmd += @("--min-count", $MinCount) }
+if ($Limit -gt 0) { $cmd += @("--limit", $Limit) }
+if ($Rebuild) { $cmd += "--rebuild" }
+if ($Verbose) { $cmd += "--verbose" }
+
+Write-Host "docker $($cmd -join ' ')"
+docker @cmd
@@ -0,0 +1,53 @@
+param(
+  [string]$Image = "wiki-nlp-cli",
+  [string]$Collection = "corpus",
+  [ValidateSet("auto", "stream", "poll")]
+  [string]$Mode = "auto",
+  [string]$Stages = "",
+  [int]$Batch = 200,
+  [double]$Interval = 5,
+  [double]$MaxIdle = 0,
+  [switch]$CatchUp,
+  [switch]$Verbose,
+  [string]$MongoUri = "mongodb://host.docker.internal:27017",
+  [string]$MongoDb = "tiktok_live",
+  [string]$MongoUser = "appuser",
+  [string]$MongoPassword = "apppass",
+  [string]$MongoAuthDb = "admin",
+  [string]$Network = ""
+)
+
+$envs = @(
+  "-e", "MONGO_URI=$MongoUri",
+  "-e", "MONGO_DB=$MongoDb",
+  "-e", "MONGO_USER=$MongoUser",
+  "-e", "MONGO_PASSWORD=$MongoPassword",
+  "-e", "MONGO_AUTH_DB=$MongoAuthDb",
+  "-e", "PYTHONUNBUFFERED=1"
+)
+
+$netArgs = @()
+if ($Network -and $Network.Trim() -ne "") {
+  $netArgs = @("--network", $Network)
+}
+
+$cmd = @(
+  "run", "--rm",
+  $envs,
+  $netArgs,
+  "-v", "${PWD}:/app",
+  $Image,
+  "watch",
+  "--collection", $Collection,
+  "--mode", $Mode,
+  "--batch", $Batch,
+  "--interval", $Interval
+)
+
+if ($Stages -and $Stages.Trim() -ne "") { $cmd += @("--stages", $Stages) }
+if ($MaxIdle -gt 0) { $cmd += @("--max-idle", $MaxIdle) }
+if ($CatchUp) { $cmd += "--catch-up" }
+if ($Verbose) { $cmd += "--verbose" }
+
+Write-Host "docker $($cmd -join ' ')"
+docker @cmd
@@ -1,20 +1,14 @@
 import argparse
+import sys
+import time
 from pathlib import Path
 
-from .wiki_fetcher import FetchConfig, fetch_all
-from .segmenter import SegmentDbConfig, generate_records_grouped_by_file
-from .db import get_collection
-from .sentence_split import update_corpus_sentences
-from .num_tag import tag_corpus_numbers
-from .sentence_token import update_corpus_sentence_tokenization
-from .state_store import load_segment_state, save_segment_state
-from .thai_clock import update_corpus_thai_clock
-from .connectors import update_corpus_connectors
-from .abbreviation import update_corpus_abbreviation
-from .tokenize import update_corpus_tokenize
-from .sentence_heads import update_corpus_sentence_heads
-from .word_pattern import update_corpus_word_pattern
-from .embeddings import update_corpus_embeddings, finetune_model, collect_training_corpus, TrainConfig
+# Stage modules pull in heavy NLP/ML packages (stanza, torch, sentence_transformers,
+# pythainlp), so every handler imports what it needs lazily to keep startup fast.
+
+_START = time.perf_counter()
+_START_MODULES = set(sys.modules)
+_HEAVY_MODULES = ("torch", "stanza", "sentence_transformers", "pythainlp", "gensim", "pymongo")
 
 
 def cmd_greet(args) -> int:
@@ -25,7 +19,22 @@ def cmd_greet(args) -> int:
     return 0
 
 
+def cmd_db_ping(args) -> int:
+    from .db import get_mongo_client, ping_mongo
+
+    lat = ping_mongo(args.count)
+    # The first ping includes connection setup/handshake
+    print(f"first ping: {lat[0]:.2f} ms")
+    rest = lat[1:] or lat
+    print(f"round-trip ms -> min: {min(rest):.2f}, avg: {sum(rest) / len(rest):.2f}, max: {max(rest):.2f} (n={len(rest)})")
+    opts = get_mongo_client().options.pool_options
+    print(f"pool: maxPoolSize={opts.max_pool_size}, minPoolSize={opts.min_pool_size}")
+    return 0
+
+
 def cmd_fetch(args) -> int:
+    from .wiki_fetcher import FetchConfig, fetch_all
+
     cfg = FetchConfig(
         titles_file=Path(args.titles),
         out_dir=Path(args.out_dir),
@@ -38,11 +47,52 @@ def cmd_fetch(args) -> int:
     return 0
 
 
+def _add_lease_args(p) -> None:
+    p.add_argument("--lease", action="store_true", help="จองเอกสารเป็นชุดด้วย lease (process.<stage>_lease) เพื่อรันหลาย worker พร้อมกันได้")
+    p.add_argument("--worker-id", dest="worker_id", default=None, help="ชื่อ worker สำหรับ lease (ดีฟอลต์: <hostname>:<pid>)")
+    p.add_argument("--lease-ttl", dest="lease_ttl", type=float, default=300.0, help="อายุ lease (วินาที) ต่ออายุอัตโนมัติทุก ttl/3 ระหว่างทำงาน")
+
+
+def _lease_from_args(args):
+    if not getattr(args, "lease", False):
+        return None
+    from .leases import Lease, default_worker_id
+
+    return Lease(owner=args.worker_id or default_worker_id(), ttl=args.lease_ttl)
+
+
+def _add_schema_args(p, *, unsupported: tuple[str, ...] = ()) -> None:
+    """--schema/--sentences-collection; `unsupported` lists options the sentences path of the command ignores."""
+    p.add_argument("--schema", choices=["embedded", "sentences"], default="embedded", help="embedded=เก็บ sentences ในเอกสาร corpus, sentences=หนึ่งเอกสารต่อประโยคใน collection แยก")
+    p.add_argument("--sentences-collection", dest="sentences_collection", default="sentences", help="collection ของประโยค (โหมด --schema sentences)")
+    if unsupported:
+        p.set_defaults(check_schema=lambda args: _reject_for_sentences_schema(p, args, unsupported))
+
+
+def _reject_for_sentences_schema(p, args, options: tuple[str, ...]) -> None:
+    """parser.error when an option in `options` is set away from its default together with --schema sentences."""
+    if args.schema != "sentences":
+        return
+    given = []
+    for opt in options:
+        dest = opt.lstrip("-").replace("-", "_")
+        if getattr(args, dest) != p.get_default(dest):
+            given.append(opt)
+    if given:
+        p.error(f"{', '.join(given)} not supported with --schema sentences")
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="app",
         description="CLI สำหรับงานสคริปต์ (ไม่มี API) รวมถึงดึงบทความจากวิกิพีเดียภาษาไทย",
     )
+    parser.add_argument(
+        "--profile-import",
+        dest="profile_import",
+        action="store_true",
+        help="พิมพ์รายงานเวลาเริ่มต้นและโมดูลหนักที่ถูก import (ไปที่ stderr) เมื่อจบคำสั่ง",
+    )
     sub = parser.add_subparsers(dest="command", required=True)
 
     # greet (ตัวอย่างเดิม)
@@ -51,6 +101,11 @@ def build_parser() -> argparse.ArgumentParser:
     p_greet.add_argument("--upper", action="store_true", help="พิมพ์ตัวพิมพ์ใหญ่ทั้งหมด")
     p_greet.set_defaults(func=cmd_greet)
 
+    # db-ping (ตรวจการเชื่อมต่อ MongoDB และวัด latency)
+    p_ping = sub.add_parser("db-ping", help="ส่งคำสั่ง ping ไปยัง MongoDB และรายงาน round-trip latency")
+    p_ping.add_argument("--count", type=int, default=5, help="จำนวนครั้งที่ ping (ดีฟอลต์: 5)")
+    p_ping.set_defaults(func=cmd_db_ping)
+
     # fetch (ดึงบทความวิกิ)
     p_fetch = sub.add_parser("fetch", help="ดึงบทความภาษาไทยจากวิกิพีเดียตามรายการหัวข้อ")
     p_fetch.add_argument("--titles", default="data/input/titles.txt", help="ไฟล์รายชื่อหัวข้อ (UTF-8)")
@@ -70,6 +125,10 @@ def build_parser() -> argparse.ArgumentParser:
     p_sdb.add_argument("--state", default="data/state.json", help="ไฟล์ state (อัปโหลดแล้ว)")
     p_sdb.add_argument("--replace", action="store_true", help="ลบเอกสารเดิมของหัวข้อนั้นๆ ออกจาก collection ก่อนแทรกใหม่")
     p_sdb.add_argument("--force", action="store_true", help="เพิกเฉย state uploaded (ประมวลผลซ้ำแม้เคยอัปโหลดแล้ว)")
+    p_sdb.add_argument("--workers", type=int, default=0, help="จำนวน process สำหรับ parse ไฟล์แบบขนาน (0=โหมดเดิมทีละไฟล์)")
+    p_sdb.add_argument("--prefetch", type=int, default=16, help="จำนวนไฟล์สูงสุดที่ parse ค้างไว้ในคิว (โหมด --workers)")
+    p_sdb.add_argument("--target-bytes", dest="target_bytes", type=int, default=4 * 1024 * 1024, help="ขนาดเป้าหมายต่อ insert_many ข้ามบทความ (ไบต์, โหมด --workers)")
+    p_sdb.add_argument("--state-every", dest="state_every", type=int, default=50, help="บันทึก state ทุกๆ N หัวข้อที่ยืนยันแล้ว (โหมด --workers)")
     p_sdb.set_defaults(func=cmd_segment)
 
     # sentences (ตัดประโยคด้วยเว้นวรรคแล้วอัปเดตลง corpus)
@@ -78,6 +137,11 @@ def build_parser() -> argparse.ArgumentParser:
     p_sent.add_argument("--limit", type=int, default=None, help="จำนวนเอกสารสูงสุดที่จะอัปเดต")
     p_sent.add_argument("--batch", type=int, default=500, help="ขนาด batch ต่อ bulk_write")
     p_sent.add_argument("--all", action="store_true", help="อัปเดตทุกเอกสาร (ค่าเริ่มต้นคือเฉพาะที่ยังไม่มี sentences)")
+    p_sent.add_argument("--workers", type=int, default=0, help="จำนวน process สำหรับขั้นคำนวณ (0=คำนวณใน thread หลัก; การอ่าน/เขียน Mongo ทำซ้อนกันเสมอ)")
+    _add_schema_args(p_sent, unsupported=("--batch", "--workers", "--lease", "--from-start", "--server"))
+    _add_lease_args(p_sent)
+    p_sent.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
+    p_sent.add_argument("--server", action="store_true", help="ตัดประโยคด้วย aggregation pipeline (update_many) บน MongoDB โดยตรง ส่วนที่เหลือใช้เส้นทาง Python ตามปกติ")
     p_sent.set_defaults(func=cmd_sentences)
 
     # tag-num (ใส่ type=NUM, pos=NUM ให้ข้อความที่เป็นรูปแบบตัวเลข)
@@ -86,6 +150,11 @@ def build_parser() -> argparse.ArgumentParser:
     p_tn.add_argument("--limit", type=int, default=None, help="จำนวนเอกสารสูงสุดที่จะอัปเดต")
     p_tn.add_argument("--batch", type=int, default=200, help="ขนาด batch ต่อ bulk_write")
     p_tn.add_argument("--all", action="store_true", help="อัปเดตทุกเอกสาร (ไม่จำกัดเฉพาะที่ยังไม่มี type/pos)")
+    p_tn.add_argument("--workers", type=int, default=0, help="จำนวน process สำหรับขั้นคำนวณ (0=คำนวณใน thread หลัก; การอ่าน/เขียน Mongo ทำซ้อนกันเสมอ)")
+    _add_schema_args(p_tn, unsupported=("--workers", "--server"))
+    _add_lease_args(p_tn)
+    p_tn.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
+    p_tn.add_argument("--server", action="store_true", help="ตั้ง flag ให้เอกสารที่ไม่มีตัวเลขเลยบน MongoDB โดยตรง (update_many) ส่วนที่เหลือใช้เส้นทาง Python ตามปกติ")
     p_tn.set_defaults(func=cmd_tag_num)
 
     # sentence-token (re-tokenize existing sentences with PyThaiNLP)
@@ -98,6 +167,11 @@ def build_parser() -> argparse.ArgumentParser:
     p_st.add_argument("--batch", type=int, default=200, help="ขนาด batch ต่อ bulk_write")
     p_st.add_argument("--all", action="store_true", help="อัปเดตทุกเอกสาร (ไม่จำกัดเฉพาะที่ยังไม่ถูก sentence_token)")
     p_st.add_argument("--verbose", action="store_true", help="แสดงจำนวน candidates และสรุปผลหลังรัน")
+    p_st.add_argument("--workers", type=int, default=0, help="จำนวน process สำหรับขั้นคำนวณ (0=คำนวณใน thread หลัก; การอ่าน/เขียน Mongo ทำซ้อนกันเสมอ)")
+    p_st.add_argument("--min-len", dest="min_len", type=int, default=0, help="ไม่ส่งประโยคที่สั้นกว่า N ตัวอักษรเข้า sent_tokenize (เก็บไว้ตามเดิม; 0=ตัดทุกประโยค)")
+    _add_schema_args(p_st, unsupported=("--batch", "--workers", "--lease", "--from-start"))
+    _add_lease_args(p_st)
+    p_st.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
     p_st.set_defaults(func=cmd_sentence_token)
 
     # thai-clock (normalize Thai time patterns in raw.content)
@@ -110,6 +184,10 @@ def build_parser() -> argparse.ArgumentParser:
     p_tc.add_argument("--batch", type=int, default=200, help="ขนาด batch ต่อ bulk_write")
     p_tc.add_argument("--all", action="store_true", help="อัปเดตทุกเอกสาร (ไม่จำกัดเฉพาะที่ยังไม่ถูก thai_clock)")
     p_tc.add_argument("--verbose", action="store_true", help="แสดงจำนวน candidates และสรุปผลหลังรัน")
+    p_tc.add_argument("--workers", type=int, default=0, help="จำนวน process สำหรับขั้นคำนวณ (0=คำนวณใน thread หลัก; การอ่าน/เขียน Mongo ทำซ้อนกันเสมอ)")
+    _add_lease_args(p_tc)
+    p_tc.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
+    p_tc.add_argument("--server", action="store_true", help="ตั้ง flag ให้เอกสารที่ไม่มีรูปแบบเวลา/ช่องว่างซ้ำบน MongoDB โดยตรง (update_many) ส่วนที่เหลือใช้เส้นทาง Python ตามปกติ")
     p_tc.set_defaults(func=cmd_thai_clock)
 
     # connectors (merge sentences based on connector rules)
@@ -123,6 +201,10 @@ def build_parser() -> argparse.ArgumentParser:
     p_conn.add_argument("--all", action="store_true", help="อัปเดตทุกเอกสาร (ไม่จำกัดเฉพาะที่ยังไม่ถูก connectors)")
     p_conn.add_argument("--min-len", dest="min_len", type=int, default=25, help="ความยาวขั้นต่ำของประโยคที่ถือว่า 'สั้น'")
     p_conn.add_argument("--verbose", action="store_true", help="แสดงจำนวน candidates และสรุปผลหลังรัน")
+    p_conn.add_argument("--workers", type=int, default=0, help="จำนวน process สำหรับขั้นคำนวณ (0=คำนวณใน thread หลัก; การอ่าน/เขียน Mongo ทำซ้อนกันเสมอ)")
+    _add_schema_args(p_conn, unsupported=("--batch", "--workers", "--lease", "--from-start"))
+    _add_lease_args(p_conn)
+    p_conn.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
     p_conn.set_defaults(func=cmd_connectors)
 
     # abbreviation (expand abbreviations and record candidates)
@@ -135,6 +217,13 @@ def build_parser() -> argparse.ArgumentParser:
     p_abbr.add_argument("--batch", type=int, default=200, help="ขนาด batch ต่อ bulk_write")
     p_abbr.add_argument("--all", action="store_true", help="อัปเดตทุกเอกสาร (ไม่จำกัดเฉพาะที่ยังไม่ถูก abbreviation)")
     p_abbr.add_argument("--verbose", action="store_true", help="แสดงจำนวน candidates และสรุปผลหลังรัน")
+    p_abbr.add_argument("--workers", type=int, default=0, help="จำนวน process สำหรับขั้นคำนวณ (0=คำนวณใน thread หลัก; การอ่าน/เขียน Mongo ทำซ้อนกันเสมอ)")
+    _add_schema_args(p_abbr, unsupported=("--workers",))
+    _add_lease_args(p_abbr)
+    p_abbr.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
+    p_abbr.add_argument("--cache-size", dest="cache_size", type=int, default=50_000, help="จำนวนข้อความที่จำผลการขยายตัวย่อไว้ในหน่วยความจำ (LRU)")
+    p_abbr.add_argument("--no-cache", dest="no_cache", action="store_true", help="ไม่ใช้ cache ถาวรใน collection abbreviation_cache")
+    p_abbr.add_argument("--dictionary-min-count", dest="dictionary_min_count", type=int, default=0, help="ขยายตัวย่อจากตาราง collection abbreviation (คู่ที่พบอย่างน้อย N ครั้ง) ก่อนเรียกโมเดล (0=ปิด)")
     p_abbr.set_defaults(func=cmd_abbreviation)
 
     # tokenize (word-level tokens with POS/lemma/depparse via Stanza)
@@ -147,8 +236,27 @@ def build_parser() -> argparse.ArgumentParser:
     p_tok.add_argument("--batch", type=int, default=200, help="ขนาด batch ต่อ bulk_write")
     p_tok.add_argument("--all", action="store_true", help="อัปเดตทุกเอกสาร (ไม่จำกัดเฉพาะที่ยังไม่ถูก tokenize)")
     p_tok.add_argument("--verbose", action="store_true", help="แสดงจำนวน candidates และสรุปผลหลังรัน")
+    p_tok.add_argument("--columnar", action="store_true", help="เก็บ tokens แบบคอลัมน์ (parallel arrays + รหัส POS/deprel/type) และเก็บ lang ที่ระดับเอกสาร")
+    p_tok.add_argument("--workers", type=int, default=0, help="จำนวน process สำหรับ annotate (fork หลังโหลดโมเดล จึงใช้หน่วยความจำโมเดลร่วมกัน; 0=คำนวณใน process หลัก; ไม่ใช้กับ GPU)")
+    p_tok.add_argument("--threads", type=int, default=0, help="จำนวน thread ของ torch ต่อ worker (0=จำนวน CPU / workers)")
+    p_tok.add_argument(
+        "--profile",
+        choices=["full", "pos+depparse", "pos-only"],
+        default="full",
+        help="ชุด processor ของ Stanza: full (มี lemma), pos+depparse (lemma = คำเดิม ไม่รัน lemmatizer), pos-only (ไม่มี depparse; head=0)",
+    )
+    p_tok.add_argument("--max-tokens", dest="max_tokens", type=int, default=120, help="ประโยคที่ยาวกว่า N tokens จะถูกแบ่งเป็นช่วงที่เครื่องหมายวรรคตอน/คำเชื่อมก่อน depparse แล้วต่อกลับ (0=ไม่แบ่ง)")
+    _add_schema_args(p_tok)
+    _add_lease_args(p_tok)
+    p_tok.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
     p_tok.set_defaults(func=cmd_tokenize)
 
+    # token-stats (compare row vs columnar token layouts on a sample)
+    p_ts = sub.add_parser("token-stats", help="วัดขนาด BSON และเวลา decode ของ tokens แบบแถวเทียบกับแบบคอลัมน์จากตัวอย่างเอกสาร")
+    p_ts.add_argument("--collection", default="corpus", help="collection เป้าหมาย (ดีฟอลต์: corpus)")
+    p_ts.add_argument("--sample", type=int, default=200, help="จำนวนเอกสารตัวอย่าง")
+    p_ts.set_defaults(func=cmd_token_stats)
+
     # sentence-heads (build phrases based on dependency heads)
     p_heads = sub.add_parser(
         "sentence-heads",
@@ -159,8 +267,36 @@ def build_parser() -> argparse.ArgumentParser:
     p_heads.add_argument("--batch", type=int, default=200, help="ขนาด batch ต่อ bulk_write")
     p_heads.add_argument("--all", action="store_true", help="อัปเดตทุกเอกสาร (ไม่จำกัดเฉพาะที่ยังไม่ถูก sentence_heads)")
     p_heads.add_argument("--verbose", action="store_true", help="แสดงสรุปหลังรัน")
+    p_heads.add_argument("--workers", type=int, default=0, help="จำนวน process สำหรับขั้นคำนวณ (0=คำนวณใน thread หลัก; การอ่าน/เขียน Mongo ทำซ้อนกันเสมอ)")
+    _add_schema_args(p_heads, unsupported=("--workers",))
+    _add_lease_args(p_heads)
+    p_heads.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
     p_heads.set_defaults(func=cmd_sentence_heads)
 
+    # migrate-sentence-heads (legacy embedded tokens -> sentence/token_ids references)
+    p_mheads = sub.add_parser(
+        "migrate-sentence-heads",
+        help="แปลง sentence_heads แบบเดิม (เก็บสำเนา tokens) เป็นแบบอ้างอิง sentence/token_ids",
+    )
+    p_mheads.add_argument("--collection", default="corpus", help="collection เป้าหมาย (ดีฟอลต์: corpus)")
+    p_mheads.add_argument("--limit", type=int, default=None, help="จำนวนเอกสารสูงสุดที่จะแปลง")
+    p_mheads.add_argument("--batch", type=int, default=200, help="ขนาด batch ต่อ bulk_write")
+    p_mheads.add_argument("--verbose", action="store_true", help="แสดงสรุปหลังรัน")
+    p_mheads.set_defaults(func=cmd_migrate_sentence_heads)
+
+    # explode-sentences (embedded corpus.sentences -> sentences collection)
+    p_exp = sub.add_parser(
+        "explode-sentences",
+        help="คัดลอก corpus.sentences ไปเป็นหนึ่งเอกสารต่อประโยคใน collection sentences (สำหรับ --schema sentences)",
+    )
+    p_exp.add_argument("--collection", default="corpus", help="collection ต้นทาง (ดีฟอลต์: corpus)")
+    p_exp.add_argument("--sentences-collection", dest="sentences_collection", default="sentences", help="collection ปลายทางของประโยค")
+    p_exp.add_argument("--limit", type=int, default=None, help="จำนวนเอกสารสูงสุดที่จะแปลง")
+    p_exp.add_argument("--batch", type=int, default=500, help="ขนาด batch ต่อ bulk_write")
+    p_exp.add_argument("--unset", action="store_true", help="ลบ corpus.sentences หลังคัดลอกแล้ว")
+    p_exp.add_argument("--verbose", action="store_true", help="แสดงสรุปหลังรัน")
+    p_exp.set_defaults(func=cmd_explode_sentences)
+
     # word-pattern (build masked word patterns from sentence_heads)
     p_wp = sub.add_parser(
         "word-pattern",
@@ -173,6 +309,9 @@ def build_parser() -> argparse.ArgumentParser:
     p_wp.add_argument("--batch", type=int, default=200, help="สำรองไว้ (ไม่ได้ใช้กับ upsert แบบทีละรายการ)")
     p_wp.add_argument("--all", action="store_true", help="ประมวลผลทุกเอกสาร (ไม่จำกัดเฉพาะที่ยังไม่ถูก word_pattern)")
     p_wp.add_argument("--verbose", action="store_true", help="แสดงสรุปหลังรัน")
+    _add_schema_args(p_wp)
+    _add_lease_args(p_wp)
+    p_wp.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
     p_wp.set_defaults(func=cmd_word_pattern)
 
     # embeddings (fine-tune optional, then incremental embed)
@@ -193,20 +332,85 @@ def build_parser() -> argparse.ArgumentParser:
     p_emb.add_argument("--train-batch", type=int, default=64, help="batch size ระหว่าง fine-tune")
     p_emb.add_argument("--train-limit-docs", type=int, default=None, help="จำนวนเอกสารสูงสุดที่จะรวบรวมเป็นคอร์ปัสสำหรับ fine-tune")
     p_emb.add_argument("--verbose", action="store_true", help="แสดงสรุปหลังรัน")
+    _add_schema_args(p_emb)
+    _add_lease_args(p_emb)
+    p_emb.add_argument("--from-start", dest="from_start", action="store_true", help="ล้าง checkpoint (_id ล่าสุดใน stage_state) แล้วเริ่มอ่านตั้งแต่ต้น")
     p_emb.set_defaults(func=cmd_embeddings)
 
+    # watch (continuous pipeline driven by change stream / updated_at polling)
+    p_watch = sub.add_parser(
+        "watch",
+        help="เฝ้าดู collection corpus (change stream หรือ polling บน updated_at) แล้วส่งเอกสารไปยังขั้นถัดไปตาม process.* ที่ยังขาด",
+    )
+    p_watch.add_argument("--collection", default="corpus", help="collection เป้าหมาย (ดีฟอลต์: corpus)")
+    p_watch.add_argument("--state-collection", dest="state_collection", default="watch_state", help="collection สำหรับเก็บ resume token/ตำแหน่ง polling")
+    p_watch.add_argument("--mode", choices=["auto", "stream", "poll"], default="auto", help="auto=ใช้ change stream ถ้าได้ ไม่เช่นนั้น polling")
+    p_watch.add_argument("--stages", default=None, help="รายชื่อ process flag ที่จะรัน คั่นด้วย , (ดีฟอลต์: ทุกขั้นตาม pipeline)")
+    p_watch.add_argument("--batch", type=int, default=200, help="จำนวนเอกสารสูงสุดต่อการ dispatch หนึ่งครั้ง")
+    p_watch.add_argument("--max-wait", dest="max_wait", type=float, default=2.0, help="เวลารอสะสม event ก่อน dispatch (วินาที, โหมด stream)")
+    p_watch.add_argument("--interval", type=float, default=5.0, help="ช่วงเวลา polling เมื่อไม่มีงาน (วินาที, โหมด poll)")
+    p_watch.add_argument("--max-idle", dest="max_idle", type=float, default=None, help="ออกเมื่อไม่มีงานนานเกิน N วินาที (เว้นว่าง=รันตลอด)")
+    p_watch.add_argument("--catch-up", dest="catch_up", action="store_true", help="รันทุกขั้นหนึ่งรอบกับเอกสารที่ค้างอยู่ก่อนเริ่มเฝ้าดู")
+    p_watch.add_argument("--verbose", action="store_true", help="แสดงการ dispatch แต่ละครั้ง")
+    p_watch.set_defaults(func=cmd_watch)
+
+    # plan (stage DAG: which documents need which stages re-run)
+    p_plan = sub.add_parser(
+        "plan",
+        help="ตรวจ process.* ตาม DAG ของขั้นตอน (เวอร์ชันและ input hash) แล้วรายงานจำนวนเอกสารที่ต้องรันแต่ละขั้นใหม่",
+    )
+    p_plan.add_argument("--collection", default="corpus", help="collection เป้าหมาย (ดีฟอลต์: corpus)")
+    p_plan.add_argument("--limit", type=int, default=None, help="จำนวนเอกสารสูงสุดที่จะตรวจ")
+    p_plan.add_argument("--batch", type=int, default=500, help="ขนาดหน้าในการอ่านและ bulk_write")
+    p_plan.add_argument("--legacy", action="store_true", help="นับ flag แบบเดิม (true ที่ไม่มีเวอร์ชัน) ว่าต้องรันใหม่ด้วย")
+    p_plan.add_argument("--apply", action="store_true", help="ลบ process.<stage> ของขั้นที่ล้าสมัย (และขั้นปลายน้ำ) เพื่อให้รันใหม่เฉพาะส่วนนั้น")
+    p_plan.add_argument("--verbose", action="store_true", help="แสดงสรุปหลังรัน")
+    p_plan.set_defaults(func=cmd_plan)
+
+    # train-wordvec (gensim word2vec/fastText over sentences[].tokens[].lemma)
+    p_wv = sub.add_parser(
+        "train-wordvec",
+        help="เทรน word2vec/fastText จาก lemma ของ token ในคลัง (สตรีมจาก MongoDB) แล้วบันทึก KeyedVectors แบบ mmap ได้",
+    )
+    p_wv.add_argument("--collection", default="corpus", help="collection เป้าหมาย (ดีฟอลต์: corpus)")
+    p_wv.add_argument("--output-dir", dest="output_dir", default="models/wordvec", help="โฟลเดอร์เก็บโมเดลและ vectors.kv (ดีฟอลต์: models/wordvec)")
+    p_wv.add_argument("--algorithm", choices=["word2vec", "fasttext"], default=None, help="อัลกอริทึม (ดีฟอลต์: word2vec สำหรับโมเดลใหม่ / ของโมเดลเดิมเมื่อต่อยอด; ระบุไม่ตรงกับโมเดลเดิมจะ error)")
+    p_wv.add_argument("--vector-size", dest="vector_size", type=int, default=None, help="มิติของเวกเตอร์ (ดีฟอลต์: 100 / ของโมเดลเดิม)")
+    p_wv.add_argument("--window", type=int, default=None, help="ขนาดหน้าต่างบริบท (ดีฟอลต์: 5 / ของโมเดลเดิม)")
+    p_wv.add_argument("--min-count", dest="min_count", type=int, default=None, help="ความถี่ขั้นต่ำของคำที่จะเก็บใน vocabulary (ดีฟอลต์: 5 / ของโมเดลเดิม)")
+    p_wv.add_argument("--epochs", type=int, default=5, help="จำนวนรอบการเทรน")
+    p_wv.add_argument("--workers", type=int, default=4, help="จำนวน worker thread ของ gensim")
+    p_wv.add_argument("--limit", type=int, default=None, help="จำนวนเอกสารสูงสุดที่จะใช้เทรน")
+    p_wv.add_argument("--batch", type=int, default=500, help="ขนาดหน้าในการอ่านเอกสาร")
+    p_wv.add_argument("--rebuild", action="store_true", help="เทรนใหม่ทั้งหมดแม้มีโมเดลเดิม (ดีฟอลต์: ต่อยอดด้วยเอกสารที่ยังไม่มี process.wordvec)")
+    p_wv.add_argument("--verbose", action="store_true", help="แสดงสรุปหลังรัน")
+    p_wv.set_defaults(func=cmd_train_wordvec)
+
+    # similar-words (query saved KeyedVectors, memory-mapped)
+    p_sim = sub.add_parser("similar-words", help="ค้นหาคำที่ใกล้เคียงที่สุดจาก vectors.kv ที่เทรนไว้")
+    p_sim.add_argument("words", nargs="+", help="คำที่ต้องการค้นหา")
+    p_sim.add_argument("--output-dir", dest="output_dir", default="models/wordvec", help="โฟลเดอร์ที่เก็บ vectors.kv (ดีฟอลต์: models/wordvec)")
+    p_sim.add_argument("--topn", type=int, default=10, help="จำนวนคำใกล้เคียงที่แสดงต่อคำ")
+    p_sim.set_defaults(func=cmd_similar_words)
+
     return parser
 
 
 def cmd_segment(args) -> int:
+    from .db import get_collection
+    from .segmenter import SegmentDbConfig, generate_records_grouped_by_file
+    from .state_store import load_segment_state, save_segment_state
+
     cfg = SegmentDbConfig(
         articles_dir=Path(args.articles_dir),
         max_files=args.max,
         collection_name=args.collection,
     )
-    col = get_collection(cfg.collection_name)
+    col = get_collection(cfg.collection_name, bulk=True)
     state_path = Path(args.state)
     uploaded, base_state = load_segment_state(state_path)
+    if args.workers and args.workers > 0:
+        return _segment_streaming(args, cfg, col, state_path, uploaded, base_state)
     total = 0
     for title, records in generate_records_grouped_by_file(cfg):
         if (not args.force) and (title in uploaded):
@@ -229,96 +433,363 @@ def cmd_segment(args) -> int:
     return 0
 
 
+def _segment_streaming(args, cfg, col, state_path, uploaded, base_state) -> int:
+    """Parallel parse + cross-article insert_many; state is saved in groups after acknowledged batches."""
+    from .segmenter import generate_records_parallel, insert_records_streaming
+    from .state_store import save_segment_state
+
+    unsaved = 0
+
+    def on_title(title: str) -> None:
+        if args.replace:
+            del_res = col.delete_many({"title": title})
+            print(f"deleted existing docs for title '{title}': {del_res.deleted_count}")
+
+    def on_commit(titles) -> None:
+        nonlocal unsaved
+        uploaded.update(titles)
+        unsaved += len(titles)
+        if unsaved >= args.state_every:
+            save_segment_state(state_path, uploaded, base_state)
+            unsaved = 0
+        for title in titles:
+            print(f"inserted file: {title}")
+
+    items = generate_records_parallel(
+        cfg,
+        workers=args.workers,
+        prefetch=args.prefetch,
+        skip_titles=None if args.force else uploaded,
+    )
+    try:
+        total = insert_records_streaming(
+            col,
+            items,
+            target_bytes=args.target_bytes,
+            on_commit=on_commit,
+            on_title=on_title,
+        )
+    finally:
+        if unsaved:
+            save_segment_state(state_path, uploaded, base_state)
+    print(f"inserted docs: {total}")
+    return 0
+
+
 def cmd_sentences(args) -> int:
-    col = get_collection(args.collection)
+    from .db import get_collection
+    from .sentence_split import update_corpus_sentences
+
+    col = get_collection(args.collection, bulk=True)
     missing_only = not bool(args.all)
-    updated = update_corpus_sentences(col, limit=args.limit, batch=args.batch, missing_only=missing_only)
+    if args.schema == "sentences":
+        from .sentence_split import update_sentences_split
+
+        sent_col = get_collection(args.sentences_collection, bulk=True)
+        updated = update_sentences_split(col, sent_col, limit=args.limit, missing_only=missing_only)
+        print(f"modified documents: {updated}")
+        return 0
+    updated = update_corpus_sentences(
+        col,
+        limit=args.limit,
+        batch=args.batch,
+        missing_only=missing_only,
+        from_start=args.from_start,
+        lease=_lease_from_args(args),
+        workers=args.workers,
+        server=args.server,
+    )
     print(f"modified documents: {updated}")
     return 0
 
 
 def cmd_tag_num(args) -> int:
-    col = get_collection(args.collection)
-    modified = tag_corpus_numbers(col, limit=args.limit, batch=args.batch, missing_only=not args.all)
+    from .db import get_collection
+    from .num_tag import tag_corpus_numbers
+
+    if args.schema == "sentences":
+        from .num_tag import tag_sentence_numbers
+
+        sent_col = get_collection(args.sentences_collection, bulk=True)
+        modified = tag_sentence_numbers(
+            sent_col,
+            limit=args.limit,
+            batch=args.batch,
+            missing_only=not args.all,
+            from_start=args.from_start,
+            lease=_lease_from_args(args),
+        )
+        print(f"modified sentences: {modified}")
+        return 0
+    col = get_collection(args.collection, bulk=True)
+    modified = tag_corpus_numbers(
+        col,
+        limit=args.limit,
+        batch=args.batch,
+        missing_only=not args.all,
+        from_start=args.from_start,
+        lease=_lease_from_args(args),
+        workers=args.workers,
+        server=args.server,
+    )
     print(f"modified documents: {modified}")
     return 0
 
 
 def cmd_sentence_token(args) -> int:
-    col = get_collection(args.collection)
+    from .db import get_collection
+    from .sentence_token import update_corpus_sentence_tokenization
+
+    col = get_collection(args.collection, bulk=True)
+    if args.schema == "sentences":
+        from .sentence_token import update_sentences_sentence_tokenization
+
+        sent_col = get_collection(args.sentences_collection, bulk=True)
+        modified = update_sentences_sentence_tokenization(
+            col, sent_col, limit=args.limit, missing_only=not args.all, verbose=args.verbose, min_len=args.min_len
+        )
+        print(f"modified documents: {modified}")
+        return 0
     modified = update_corpus_sentence_tokenization(
-        col, limit=args.limit, batch=args.batch, missing_only=not args.all, verbose=args.verbose
+        col,
+        limit=args.limit,
+        batch=args.batch,
+        missing_only=not args.all,
+        from_start=args.from_start, lease=_lease_from_args(args),
+        verbose=args.verbose,
+        workers=args.workers,
+        min_len=args.min_len,
     )
     print(f"modified documents: {modified}")
     return 0
 
 
 def cmd_thai_clock(args) -> int:
-    col = get_collection(args.collection)
+    from .db import get_collection
+    from .thai_clock import update_corpus_thai_clock
+
+    col = get_collection(args.collection, bulk=True)
     modified = update_corpus_thai_clock(
-        col, limit=args.limit, batch=args.batch, missing_only=not args.all, verbose=args.verbose
+        col,
+        limit=args.limit,
+        batch=args.batch,
+        missing_only=not args.all,
+        from_start=args.from_start,
+        lease=_lease_from_args(args),
+        verbose=args.verbose,
+        workers=args.workers,
+        server=args.server,
     )
     print(f"modified documents: {modified}")
     return 0
 
 
 def cmd_connectors(args) -> int:
-    col = get_collection(args.collection)
+    from .db import get_collection
+    from .connectors import update_corpus_connectors
+
+    col = get_collection(args.collection, bulk=True)
+    if args.schema == "sentences":
+        from .connectors import update_sentences_connectors
+
+        sent_col = get_collection(args.sentences_collection, bulk=True)
+        modified = update_sentences_connectors(
+            col, sent_col, limit=args.limit, missing_only=not args.all, min_len=args.min_len, verbose=args.verbose
+        )
+        print(f"modified documents: {modified}")
+        return 0
     modified = update_corpus_connectors(
         col,
         limit=args.limit,
         batch=args.batch,
         missing_only=not args.all,
+        from_start=args.from_start, lease=_lease_from_args(args),
         min_len=args.min_len,
         verbose=args.verbose,
+        workers=args.workers,
     )
     print(f"modified documents: {modified}")
     return 0
 
 
 def cmd_abbreviation(args) -> int:
-    col = get_collection(args.collection)
+    from .db import get_collection
+    from .abbreviation import update_corpus_abbreviation
+
+    if args.schema == "sentences":
+        from .abbreviation import update_sentences_abbreviation
+
+        sent_col = get_collection(args.sentences_collection, bulk=True)
+        modified = update_sentences_abbreviation(
+            sent_col,
+            limit=args.limit,
+            batch=args.batch,
+            missing_only=not args.all,
+            from_start=args.from_start,
+            lease=_lease_from_args(args),
+            verbose=args.verbose,
+            cache_size=args.cache_size,
+            persistent_cache=not args.no_cache,
+            dictionary_min_count=args.dictionary_min_count,
+        )
+        print(f"modified sentences: {modified}")
+        return 0
+    col = get_collection(args.collection, bulk=True)
     modified = update_corpus_abbreviation(
         col,
         limit=args.limit,
         batch=args.batch,
         missing_only=not args.all,
+        from_start=args.from_start, lease=_lease_from_args(args),
         verbose=args.verbose,
+        workers=args.workers,
+        cache_size=args.cache_size,
+        persistent_cache=not args.no_cache,
+        dictionary_min_count=args.dictionary_min_count,
     )
     print(f"modified documents: {modified}")
     return 0
 
 
 def cmd_tokenize(args) -> int:
-    col = get_collection(args.collection)
+    from .db import get_collection
+    from .tokenize import prepare_tokenize, update_corpus_tokenize
+
+    # Model load and worker fork come first: no MongoClient (or its threads) exists yet
+    sentences = args.schema == "sentences"
+    run = prepare_tokenize(
+        sentences=sentences,
+        columnar=args.columnar,
+        max_tokens=args.max_tokens,
+        workers=args.workers,
+        threads=args.threads,
+        profile=args.profile,
+        verbose=args.verbose,
+    )
+    if sentences:
+        from .tokenize import update_sentences_tokenize
+
+        sent_col = get_collection(args.sentences_collection, bulk=True)
+        modified = update_sentences_tokenize(
+            sent_col,
+            limit=args.limit,
+            batch=args.batch,
+            missing_only=not args.all,
+            from_start=args.from_start, lease=_lease_from_args(args),
+            verbose=args.verbose,
+            run=run,
+        )
+        print(f"modified sentences: {modified}")
+        return 0
+    col = get_collection(args.collection, bulk=True)
     modified = update_corpus_tokenize(
         col,
         limit=args.limit,
         batch=args.batch,
         missing_only=not args.all,
+        from_start=args.from_start, lease=_lease_from_args(args),
         verbose=args.verbose,
+        run=run,
     )
     print(f"modified documents: {modified}")
     return 0
 
 
-def cmd_sentence_heads(args) -> int:
+def cmd_token_stats(args) -> int:
+    from .db import get_collection
+    from .token_store import measure_token_layouts
+
     col = get_collection(args.collection)
+    r = measure_token_layouts(col, sample=args.sample)
+    if not r["docs"]:
+        print("token-stats: no tokenized documents found")
+        return 0
+    ratio = r["columnar_bytes"] / r["row_bytes"] if r["row_bytes"] else 0.0
+    print(f"token-stats: sampled docs: {r['docs']}")
+    print(f"  BSON bytes -> row: {r['row_bytes']}, columnar: {r['columnar_bytes']} ({ratio:.1%})")
+    print(f"  decode ms  -> row: {r['row_decode_ms']:.1f}, columnar: {r['columnar_decode_ms']:.1f}")
+    return 0
+
+
+def cmd_sentence_heads(args) -> int:
+    from .db import get_collection
+    from .sentence_heads import update_corpus_sentence_heads
+
+    if args.schema == "sentences":
+        from .sentence_heads import update_sentences_sentence_heads
+
+        sent_col = get_collection(args.sentences_collection, bulk=True)
+        modified = update_sentences_sentence_heads(
+            sent_col,
+            limit=args.limit,
+            batch=args.batch,
+            missing_only=not args.all,
+            from_start=args.from_start,
+            lease=_lease_from_args(args),
+            verbose=args.verbose,
+        )
+        print(f"modified sentences: {modified}")
+        return 0
+    col = get_collection(args.collection, bulk=True)
     modified = update_corpus_sentence_heads(
         col,
         limit=args.limit,
         batch=args.batch,
         missing_only=not args.all,
+        from_start=args.from_start, lease=_lease_from_args(args),
         verbose=args.verbose,
+        workers=args.workers,
     )
     print(f"modified documents: {modified}")
     return 0
 
 
+def cmd_migrate_sentence_heads(args) -> int:
+    from .db import get_collection
+    from .sentence_heads import migrate_sentence_heads
+
+    col = get_collection(args.collection, bulk=True)
+    modified = migrate_sentence_heads(col, limit=args.limit, batch=args.batch, verbose=args.verbose)
+    print(f"modified documents: {modified}")
+    return 0
+
+
+def cmd_explode_sentences(args) -> int:
+    from .db import get_collection
+    from .sentence_store import explode_corpus_sentences
+
+    col = get_collection(args.collection, bulk=True)
+    sent_col = get_collection(args.sentences_collection, bulk=True)
+    exploded = explode_corpus_sentences(
+        col, sent_col, limit=args.limit, batch=args.batch, unset=args.unset, verbose=args.verbose
+    )
+    print(f"exploded documents: {exploded}")
+    return 0
+
+
 def cmd_word_pattern(args) -> int:
-    corpus_col = get_collection(args.corpus)
+    from .db import get_collection
+    from .word_pattern import update_corpus_word_pattern
+
     words_col = get_collection(args.words)
     patterns_col = get_collection(args.patterns)
+    if args.schema == "sentences":
+        from .word_pattern import update_sentences_word_pattern
+
+        sent_col = get_collection(args.sentences_collection)
+        modified = update_sentences_word_pattern(
+            sent_col,
+            words_col,
+            patterns_col,
+            limit=args.limit,
+            batch=args.batch,
+            missing_only=not args.all,
+            from_start=args.from_start, lease=_lease_from_args(args),
+            verbose=args.verbose,
+        )
+        print(f"modified sentences: {modified}")
+        return 0
+    corpus_col = get_collection(args.corpus)
     modified = update_corpus_word_pattern(
         corpus_col,
         words_col,
@@ -326,6 +797,7 @@ def cmd_word_pattern(args) -> int:
         limit=args.limit,
         batch=args.batch,
         missing_only=not args.all,
+        from_start=args.from_start, lease=_lease_from_args(args),
         verbose=args.verbose,
     )
     print(f"modified documents: {modified}")
@@ -333,7 +805,10 @@ def cmd_word_pattern(args) -> int:
 
 
 def cmd_embeddings(args) -> int:
-    col = get_collection(args.collection)
+    from .db import get_collection
+    from .embeddings import update_corpus_embeddings, finetune_model, collect_training_corpus, TrainConfig
+
+    col = get_collection(args.collection, bulk=True)
     finetuned_dir = args.finetuned_dir
     base_model = args.model
 
@@ -352,6 +827,25 @@ def cmd_embeddings(args) -> int:
         if args.verbose:
             print(f"marked process.finetuned: true for {n_ft} docs")
 
+    if args.schema == "sentences":
+        from .embeddings import update_sentences_embeddings
+
+        sent_col = get_collection(args.sentences_collection, bulk=True)
+        modified = update_sentences_embeddings(
+            sent_col,
+            base_model=base_model,
+            finetuned_dir=finetuned_dir,
+            limit=args.limit,
+            batch=args.batch,
+            missing_only=not args.all,
+            from_start=args.from_start, lease=_lease_from_args(args),
+            encode_batch_size=args.encode_batch,
+            device_override=args.device,
+            verbose=args.verbose,
+        )
+        print(f"modified sentences: {modified}")
+        return 0
+
     modified = update_corpus_embeddings(
         col,
         base_model=base_model,
@@ -359,6 +853,7 @@ def cmd_embeddings(args) -> int:
         limit=args.limit,
         batch=args.batch,
         missing_only=not args.all,
+        from_start=args.from_start, lease=_lease_from_args(args),
         encode_batch_size=args.encode_batch,
         device_override=args.device,
         verbose=args.verbose,
@@ -367,9 +862,114 @@ def cmd_embeddings(args) -> int:
     return 0
 
 
+def cmd_watch(args) -> int:
+    from .db import get_collection
+    from .watcher import run_watch
+
+    col = get_collection(args.collection, bulk=True)
+    state_col = get_collection(args.state_collection)
+    stages = args.stages.split(",") if args.stages else None
+    modified = run_watch(
+        col,
+        state_col,
+        mode=args.mode,
+        stages=stages,
+        batch=args.batch,
+        max_wait=args.max_wait,
+        interval=args.interval,
+        max_idle=args.max_idle,
+        do_catch_up=args.catch_up,
+        verbose=args.verbose,
+    )
+    print(f"modified documents: {modified}")
+    return 0
+
+
+def cmd_plan(args) -> int:
+    from .db import get_collection
+    from .stages import MISSING, REASONS, plan_corpus
+
+    col = get_collection(args.collection, bulk=True)
+    counts = plan_corpus(
+        col,
+        limit=args.limit,
+        batch=args.batch,
+        include_legacy=args.legacy,
+        apply=args.apply,
+        verbose=args.verbose,
+    )
+    for stage, by_reason in counts.items():
+        stale = sum(n for r, n in by_reason.items() if r != MISSING)
+        detail = ", ".join(f"{r}: {by_reason[r]}" for r in REASONS if by_reason[r])
+        print(f"{stage}: stale {stale}" + (f" ({detail})" if detail else ""))
+    if args.apply:
+        print("stale stage flags unset; re-run the stages (or watch) to recompute them")
+    return 0
+
+
+def cmd_train_wordvec(args) -> int:
+    from .db import get_collection
+    from .wordvec import train_wordvec
+
+    col = get_collection(args.collection, bulk=True)
+    flagged = train_wordvec(
+        col,
+        output_dir=args.output_dir,
+        algorithm=args.algorithm,
+        vector_size=args.vector_size,
+        window=args.window,
+        min_count=args.min_count,
+        epochs=args.epochs,
+        workers=args.workers,
+        limit=args.limit,
+        batch=args.batch,
+        rebuild=args.rebuild,
+        verbose=args.verbose,
+    )
+    print(f"trained on {flagged} documents")
+    return 0
+
+
+def cmd_similar_words(args) -> int:
+    from .wordvec import load_vectors, similar_words
+
+    kv = load_vectors(args.output_dir)
+    status = 0
+    for word in args.words:
+        hits = similar_words(kv, word, topn=args.topn)
+        if not hits:
+            print(f"{word}: not in vocabulary", file=sys.stderr)
+            status = 1
+            continue
+        print(f"# {word}")
+        for w, score in hits:
+            print(f"{w}\t{score:.4f}")
+    return status
+
+
+def _print_import_report() -> None:
+    loaded = set(sys.modules) - _START_MODULES
+    top = {name.split(".", 1)[0] for name in loaded}
+    heavy = ", ".join(f"{m}={'yes' if m in sys.modules else 'no'}" for m in _HEAVY_MODULES)
+    print(
+        f"profile-import: elapsed {(time.perf_counter() - _START) * 1000:.1f} ms, "
+        f"modules imported: {len(loaded)} ({len(top)} top-level packages)",
+        file=sys.stderr,
+    )
+    print(f"profile-import: {heavy}", file=sys.stderr)
+
+
 def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if "--profile-import" in argv:
+        # Registered before parsing so the report is printed even when argparse exits (e.g. --help)
+        import atexit
+        atexit.register(_print_import_report)
     parser = build_parser()
     args = parser.parse_args(argv)
+    check_schema = getattr(args, "check_schema", None)
+    if check_schema is not None:
+        check_schema(args)
     return args.func(args)
 
 
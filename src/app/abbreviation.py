@@ -1,9 +1,25 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple, Any
+import hashlib
+import re
+from collections import OrderedDict
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple, Any
 
-from pymongo.collection import Collection
 from pymongo import UpdateOne
+from pymongo.collection import Collection
+
+from .abbreviation_store import (
+    ABBREVIATION_COLLECTION,
+    SOURCES_COLLECTION,
+    ensure_abbreviation_indexes,
+    expand_with_table,
+    load_abbreviation_table,
+    record_candidates,
+)
+from .leases import Lease
+from .stage_runner import checkpoint_mode, make_executor, run_stage
 
 try:
     from pythainlp.util import abbreviation_to_full_text
@@ -22,13 +38,23 @@ def _to_float(score: Any) -> float | None:
             return None
 
 
+# Thai abbreviations carry a dot right after a Thai character (ก.พ., ม.ค., พ.ศ.) or the
+# paiyannoi (กรุงเทพฯ, ฯลฯ). Text with neither cannot contain one, so the model is skipped.
+_ABBR_SHAPE = re.compile(r"[\u0E01-\u0E4F]\.|\u0E2F")
+
+
+def may_contain_abbreviation(text: str) -> bool:
+    return bool(text) and _ABBR_SHAPE.search(text) is not None
+
+
 def expand_abbreviation_for_text(text: str) -> Tuple[str, List[Tuple[str, float | None]]]:
     """Return best expanded text and all candidates with scores.
 
     - If no candidates, best is original text and candidates is [].
     - Scores are converted to float when possible.
+    - Text without an abbreviation shape (see may_contain_abbreviation) skips the model.
     """
-    if not text:
+    if not may_contain_abbreviation(text):
         return text, []
     try:
         cands = abbreviation_to_full_text(text) or []
@@ -51,20 +77,181 @@ def expand_abbreviation_for_text(text: str) -> Tuple[str, List[Tuple[str, float
     return best_text, norm_cands
 
 
+# -------------------------------
+# Expansion cache
+# -------------------------------
+# Expansions are memoized per sentence text: a bounded in-process LRU in front of the persistent
+# abbreviation_cache collection ({_id: sha1(text), text, best, candidates}). Lookups and model
+# calls happen a chunk at a time in the stage's main thread, so only cache misses reach the
+# model (or the process pool).
+
+CACHE_COLLECTION = "abbreviation_cache"
+DEFAULT_LRU_SIZE = 50_000
+
+Expansion = Tuple[str, List[Tuple[str, float | None]]]
+
+
+def _cache_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    sentences: int = 0
+    skipped: int = 0  # rejected by the prefilter
+    lru_hits: int = 0
+    stored_hits: int = 0
+    table_hits: int = 0  # expanded from the abbreviation table without the model
+    model_calls: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.sentences - self.skipped
+        return (self.lru_hits + self.stored_hits + self.table_hits) / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"sentences: {self.sentences}, skipped: {self.skipped}, lru_hits: {self.lru_hits}, "
+            f"stored_hits: {self.stored_hits}, table_hits: {self.table_hits}, model_calls: {self.model_calls}, "
+            f"hit_rate: {self.hit_rate:.1%}"
+        )
+
+
+class AbbreviationCache:
+    """Bounded LRU in front of the persistent abbreviation_cache collection (store=None: LRU only).
+
+    With `table` ({abbr: expansion}, see abbreviation_store.load_abbreviation_table), misses whose
+    surface forms are all in the table are expanded from it instead of the model (not persisted).
+    """
+
+    def __init__(
+        self,
+        store: Collection | None = None,
+        *,
+        maxsize: int = DEFAULT_LRU_SIZE,
+        table: Dict[str, str] | None = None,
+    ):
+        self.store = store
+        self.table = table
+        self.maxsize = max(1, maxsize)
+        self.stats = CacheStats()
+        self._lru: "OrderedDict[str, Expansion]" = OrderedDict()
+
+    def _remember(self, text: str, value: Expansion) -> None:
+        self._lru[text] = value
+        self._lru.move_to_end(text)
+        if len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    def expand_many(self, texts: Iterable[str], executor: Executor | None = None) -> Dict[str, Expansion]:
+        """Return {text: (best, candidates)} for every text that may contain an abbreviation."""
+        out: Dict[str, Expansion] = {}
+        pending: Dict[str, None] = {}  # ordered set
+        for text in texts:
+            self.stats.sentences += 1
+            if not may_contain_abbreviation(text):
+                self.stats.skipped += 1
+            elif text in out or text in pending:
+                self.stats.lru_hits += 1
+            elif text in self._lru:
+                self._lru.move_to_end(text)
+                out[text] = self._lru[text]
+                self.stats.lru_hits += 1
+            else:
+                pending[text] = None
+        if pending and self.store is not None:
+            keys = {_cache_key(t): t for t in pending}
+            for d in self.store.find({"_id": {"$in": list(keys)}}):
+                text = keys.get(d["_id"])
+                if text is None or d.get("text") != text:
+                    continue
+                value = (d.get("best") or text, [(c[0], c[1]) for c in d.get("candidates") or []])
+                out[text] = value
+                self._remember(text, value)
+                self.stats.stored_hits += 1
+        misses = [t for t in pending if t not in out]
+        if self.table:
+            for text in misses:
+                expanded = expand_with_table(text, self.table)
+                if expanded is not None:
+                    out[text] = (expanded, [])
+                    self._remember(text, out[text])
+                    self.stats.table_hits += 1
+            misses = [t for t in misses if t not in out]
+        if not misses:
+            return out
+        if executor is not None:
+            results = list(executor.map(expand_abbreviation_for_text, misses))
+        else:
+            results = [expand_abbreviation_for_text(t) for t in misses]
+        self.stats.model_calls += len(misses)
+        ops: List[UpdateOne] = []
+        for text, value in zip(misses, results):
+            out[text] = value
+            self._remember(text, value)
+            ops.append(UpdateOne(
+                {"_id": _cache_key(text)},
+                {"$setOnInsert": {"text": text, "best": value[0], "candidates": [list(c) for c in value[1]]}},
+                upsert=True,
+            ))
+        if ops and self.store is not None:
+            self.store.bulk_write(ops, ordered=False)
+        return out
+
+
+def _abbreviation_fields(doc: dict, expansions: Dict[str, Expansion]) -> dict | None:
+    new_sentences: List[dict] = []
+    doc_changed = False
+    for item in doc.get("sentences") or []:
+        text = str((item or {}).get("text", ""))
+        best_text, cand_list = expansions.get(text, (text, []))
+
+        # Preserve other keys (e.g., type/pos) but replace text if changed
+        new_item = dict(item)
+        if best_text and best_text != text:
+            new_item["text"] = best_text
+            doc_changed = True
+        new_sentences.append(new_item)
+    # Always set flag; update sentences only if changed
+    return {"sentences": new_sentences} if doc_changed else None
+
+
+def _make_cache(col: Collection, cache_size: int, persistent_cache: bool, dictionary_min_count: int) -> AbbreviationCache:
+    db = col.database
+    ensure_abbreviation_indexes(db[ABBREVIATION_COLLECTION])
+    table = None
+    if dictionary_min_count > 0:
+        table = load_abbreviation_table(db[ABBREVIATION_COLLECTION], min_count=dictionary_min_count)
+    return AbbreviationCache(db[CACHE_COLLECTION] if persistent_cache else None, maxsize=cache_size, table=table)
+
+
 def update_corpus_abbreviation(
     col_corpus: Collection,
     *,
     limit: int | None = None,
+    ids: list | None = None,
     batch: int = 200,
     missing_only: bool = True,
+    from_start: bool = False,
+    lease: Lease | None = None,
     verbose: bool = False,
+    workers: int = 0,
+    cache_size: int = DEFAULT_LRU_SIZE,
+    persistent_cache: bool = True,
+    dictionary_min_count: int = 0,
 ) -> int:
     """Expand abbreviations in sentences and record all candidates into abbreviation collection.
 
     - Updates corpus.sentences text to the highest-probability expansion when different.
-    - Writes documents to abbreviation collection for every sentence with candidates, including all candidate forms.
+    - Aggregates every candidate's (abbr, expansion) pairs into the abbreviation collection
+      (count/score_sum/score_max per pair, one bulk_write per chunk; see abbreviation_store).
+    - dictionary_min_count > 0 expands from that table (pairs seen at least that often) before
+      falling back to the model.
     - Sets process.abbreviation=true on processed corpus documents.
     - Returns number of modified corpus documents.
+    - workers > 0 runs the model on a process pool for cache misses.
+    - Expansions are memoized (AbbreviationCache: `cache_size` LRU entries, plus the
+      abbreviation_cache collection unless persistent_cache=False); verbose reports the hit rate.
     """
     base = {"sentences": {"$exists": True, "$ne": []}}
     if missing_only:
@@ -86,62 +273,79 @@ def update_corpus_abbreviation(
         candidates = None
 
     proj = {"sentences": 1, "title": 1, "content_index": 1}
-    cursor = col_corpus.find(filt, projection=proj, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    cache = _make_cache(col_corpus, cache_size, persistent_cache, dictionary_min_count)
+    table_col = col_corpus.database[ABBREVIATION_COLLECTION]
+    sources_col = col_corpus.database[SOURCES_COLLECTION]
+    executor = make_executor(workers, processes=True)
 
-    ops_corpus: List[UpdateOne] = []
-    modified_docs = 0
-    changed_docs = 0
+    def compute_chunk(docs: List[dict]) -> List[dict | None]:
+        texts = [str((item or {}).get("text", "")) for d in docs for item in d.get("sentences") or []]
+        expansions = cache.expand_many(texts, executor)
+        record_candidates(table_col, ((t, expansions[t][1]) for t in texts if t in expansions), sources=sources_col)
+        return [_abbreviation_fields(d, expansions) for d in docs]
 
     try:
-        for doc in cursor:
-            doc_id = doc.get("_id")
-            title = doc.get("title")
-            content_index = doc.get("content_index")
-            sentences = list(doc.get("sentences") or [])
-
-            new_sentences: List[dict] = []
-            doc_changed = False
-
-            for idx, item in enumerate(sentences):
-                text = str((item or {}).get("text", ""))
-                best_text, cand_list = expand_abbreviation_for_text(text)
-
-                # Preserve other keys (e.g., type/pos) but replace text if changed
-                new_item = dict(item)
-                if best_text and best_text != text:
-                    new_item["text"] = best_text
-                    doc_changed = True
-                new_sentences.append(new_item)
-
-            # Write back to corpus (always set flag; update sentences only if changed)
-            if doc_changed:
-                ops_corpus.append(
-                    UpdateOne(
-                        {"_id": doc_id},
-                        {"$set": {"sentences": new_sentences, "process.abbreviation": True}},
-                    )
-                )
-                changed_docs += 1
-            else:
-                ops_corpus.append(UpdateOne({"_id": doc_id}, {"$set": {"process.abbreviation": True}}))
-
-            if len(ops_corpus) >= batch:
-                res = col_corpus.bulk_write(ops_corpus, ordered=False)
-                modified_docs += res.modified_count
-                ops_corpus = []
-
-        # final flushes
-        if ops_corpus:
-            res = col_corpus.bulk_write(ops_corpus, ordered=False)
-            modified_docs += res.modified_count
+        stats = run_stage(
+            col_corpus, filt, "abbreviation",
+            compute_chunk=compute_chunk, projection=proj, limit=limit, batch=batch, verbose=verbose,
+            checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+            options={"dictionary_min_count": dictionary_min_count},
+        )
     finally:
-        try:
-            cursor.close()
-        except Exception:
-            pass
+        if executor is not None:
+            executor.shutdown(wait=True)
+    modified_docs = stats.modified
+    changed_docs = stats.changed
 
     if verbose:
+        print(f"abbreviation cache -> {cache.stats.summary()}")
         print(f"abbreviation summary -> changed_docs: {changed_docs}, modified_docs: {modified_docs}")
     return modified_docs
+
+
+def _expand_sentence_doc(sdoc: dict, expansions: Dict[str, Expansion]) -> dict | None:
+    text = str(sdoc.get("text", ""))
+    best_text, _ = expansions.get(text, (text, []))
+    if best_text and best_text != text:
+        return {"text": best_text}
+    return None
+
+
+def update_sentences_abbreviation(
+    sent_col: Collection,
+    *,
+    limit: int | None = None,
+    ids: list | None = None,
+    batch: int = 200,
+    missing_only: bool = True,
+    from_start: bool = False,
+    lease: Lease | None = None,
+    verbose: bool = False,
+    cache_size: int = DEFAULT_LRU_SIZE,
+    persistent_cache: bool = True,
+    dictionary_min_count: int = 0,
+) -> int:
+    """Sentences-schema variant: expand abbreviations per sentence document (same cache and table)."""
+    from .sentence_store import run_sentence_stage
+
+    cache = _make_cache(sent_col, cache_size, persistent_cache, dictionary_min_count)
+    table_col = sent_col.database[ABBREVIATION_COLLECTION]
+    sources_col = sent_col.database[SOURCES_COLLECTION]
+
+    def compute(docs: List[dict]) -> List[dict | None]:
+        texts = [str(d.get("text", "")) for d in docs]
+        expansions = cache.expand_many(texts)
+        record_candidates(table_col, ((t, expansions[t][1]) for t in texts if t in expansions), sources=sources_col)
+        return [_expand_sentence_doc(d, expansions) for d in docs]
+
+    modified = run_sentence_stage(
+        sent_col, "abbreviation", compute,
+        projection={"text": 1},
+        limit=limit, ids=ids, batch=batch, missing_only=missing_only, from_start=from_start, lease=lease,
+        options={"dictionary_min_count": dictionary_min_count}, verbose=verbose,
+    )
+    if verbose:
+        print(f"abbreviation cache -> {cache.stats.summary()}")
+    return modified
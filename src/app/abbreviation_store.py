@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import difflib
+import hashlib
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+
+# -------------------------------
+# Abbreviation table
+# -------------------------------
+# One document per (abbreviated surface form, expansion):
+#   { abbr: "ก.พ.", expansion: "กุมภาพันธ์", count, score_sum, score_max, updated_at }
+# aggregated over the distinct sentence texts whose candidates produced that pair. Unique on
+# (abbr, expansion), which also serves lookups by abbr. Texts already counted are remembered in
+# abbreviation_sources ({_id: sha1(text)}), so reruns and cache hits do not count them again.
+
+ABBREVIATION_COLLECTION = "abbreviation"
+SOURCES_COLLECTION = "abbreviation_sources"
+
+# Surface forms: dotted clusters (ก.พ., พ.ศ., ดร., เม.ย., มี.ค., มิ.ย.), words ending in
+# paiyannoi (กรุงเทพฯ) and ฯลฯ. A dotted segment is an optional leading vowel and one or two
+# consonants, each with its above/below vowels and tone marks. The cluster must not follow a Thai
+# character or a dot, so neither a consonant glued to the preceding word (ไทยก.พ.) nor the tail
+# of a longer cluster is taken on its own.
+# A paiyannoi word may still start early (Thai has no word spaces); candidate_pairs only keeps
+# spans the model actually rewrote.
+_SURFACE = re.compile(
+    r"ฯลฯ"
+    r"|(?<![\u0E00-\u0E7F.])(?:[เ-ไ]?(?:[ก-ฮ][ะ-ฺ็-๎]*){1,2}\.)+"
+    r"|[ก-ฮะ-๎]+ฯ"
+)
+
+
+def find_surfaces(text: str) -> List[Tuple[int, int]]:
+    return [m.span() for m in _SURFACE.finditer(text or "")]
+
+
+def _map_span(opcodes: Sequence[tuple], a: int, b: int) -> Tuple[int, int]:
+    """Map original span [a, b) onto the candidate through difflib opcodes."""
+    start = end = None
+    for tag, i1, i2, j1, j2 in opcodes:
+        if start is None and i1 <= a < i2:
+            start = j1 + (a - i1) if tag == "equal" else j1
+        if i1 < b <= i2:
+            end = j1 + (b - i1) if tag == "equal" else j2
+            break
+    return (start or 0), (end if end is not None else (opcodes[-1][4] if opcodes else 0))
+
+
+def candidate_pairs(text: str, candidates: Iterable[Tuple[str, Optional[float]]]) -> List[Tuple[str, str, Optional[float]]]:
+    """Return (abbr, expansion, score) for every surface form each candidate rewrote."""
+    spans = find_surfaces(text)
+    if not spans:
+        return []
+    out: List[Tuple[str, str, Optional[float]]] = []
+    for cand, score in candidates:
+        if not cand or cand == text:
+            continue
+        opcodes = difflib.SequenceMatcher(None, text, cand, autojunk=False).get_opcodes()
+        changed = [(i1, i2) for tag, i1, i2, _, _ in opcodes if tag != "equal"]
+        for a, b in spans:
+            # Keep spans the candidate touched (an insert right at a or b counts as touching)
+            if not any(i1 <= b and a <= i2 for i1, i2 in changed):
+                continue
+            c, d = _map_span(opcodes, a, b)
+            expansion = cand[c:d].strip()
+            if expansion and expansion != text[a:b]:
+                out.append((text[a:b], expansion, score))
+    return out
+
+
+def ensure_abbreviation_indexes(col: Collection) -> None:
+    col.create_index([("abbr", ASCENDING), ("expansion", ASCENDING)], unique=True)
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _claim_new_texts(sources: Collection, texts: Sequence[str]) -> List[str]:
+    """Insert texts' keys into `sources`; return the texts that were not there yet."""
+    if not texts:
+        return []
+    keys = [_text_key(t) for t in texts]
+    try:
+        sources.insert_many([{"_id": k} for k in keys], ordered=False)
+        return list(texts)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors") or []
+        if any(err.get("code") != 11000 for err in errors):
+            raise
+        seen = {err["index"] for err in errors}
+        return [t for i, t in enumerate(texts) if i not in seen]
+
+
+def record_candidates(
+    col: Collection,
+    expansions: Iterable[Tuple[str, Sequence[Tuple[str, Optional[float]]]]],
+    *,
+    sources: Optional[Collection] = None,
+) -> int:
+    """Aggregate (text, candidates) pairs into the abbreviation table with one bulk_write.
+
+    Each distinct text counts once: repeats within the call are dropped and, with `sources`
+    (see SOURCES_COLLECTION), texts counted by an earlier call are skipped too.
+    Returns number of (abbr, expansion) rows touched.
+    """
+    by_text: Dict[str, List[Tuple[str, str, Optional[float]]]] = {}
+    for text, cands in expansions:
+        if text not in by_text:
+            by_text[text] = candidate_pairs(text, cands)
+    texts = [t for t, pairs in by_text.items() if pairs]
+    if sources is not None:
+        texts = _claim_new_texts(sources, texts)
+    agg: Dict[Tuple[str, str], List] = {}
+    for text in texts:
+        for abbr, expansion, score in by_text[text]:
+            row = agg.setdefault((abbr, expansion), [0, 0.0, None])
+            row[0] += 1
+            if score is not None:
+                row[1] += score
+                row[2] = score if row[2] is None else max(row[2], score)
+    if not agg:
+        return 0
+    ops: List[UpdateOne] = []
+    for (abbr, expansion), (count, score_sum, score_max) in agg.items():
+        update: Dict = {
+            "$inc": {"count": count, "score_sum": score_sum},
+            "$currentDate": {"updated_at": True},
+        }
+        if score_max is not None:
+            update["$max"] = {"score_max": score_max}
+        ops.append(UpdateOne({"abbr": abbr, "expansion": expansion}, update, upsert=True))
+    col.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+# -------------------------------
+# Lookup
+# -------------------------------
+
+
+_BEST_SORT = [("score_sum", DESCENDING), ("count", DESCENDING)]
+
+
+def best_expansion(col: Collection, abbr: str, *, min_count: int = 1) -> Optional[str]:
+    """Return the best-supported expansion of `abbr` (highest score_sum, then count), or None."""
+    doc = col.find_one({"abbr": abbr, "count": {"$gte": min_count}}, projection={"expansion": 1}, sort=_BEST_SORT)
+    return doc.get("expansion") if doc else None
+
+
+def load_abbreviation_table(col: Collection, *, min_count: int = 1) -> Dict[str, str]:
+    """Return {abbr: best expansion} for every abbr seen at least `min_count` times."""
+    cursor = col.aggregate([
+        {"$match": {"count": {"$gte": min_count}}},
+        {"$sort": {"abbr": 1, "score_sum": -1, "count": -1}},
+        {"$group": {"_id": "$abbr", "expansion": {"$first": "$expansion"}}},
+    ])
+    return {d["_id"]: d["expansion"] for d in cursor}
+
+
+def expand_with_table(text: str, table: Dict[str, str]) -> Optional[str]:
+    """Expand every surface form in `text` from `table`; None when any of them is unknown."""
+    spans = find_surfaces(text)
+    if not spans:
+        return None
+    out: List[str] = []
+    last = 0
+    for a, b in spans:
+        expansion = table.get(text[a:b])
+        if expansion is None:
+            return None
+        out.append(text[last:a])
+        out.append(expansion)
+        last = b
+    out.append(text[last:])
+    return "".join(out)
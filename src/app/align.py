@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import unicodedata
+from typing import List, Optional, Sequence, Tuple
+
+
+# -------------------------------
+# Token -> character offset alignment
+# -------------------------------
+# Tokenizers may drop whitespace, split/merge it differently or hand back a normalized form of
+# the text, so tokens are not always literal substrings at the cursor. align_tokens walks text
+# and tokens once, left to right:
+#   1) a literal match at the cursor, after any whitespace;
+#   2) otherwise a loose match there (whitespace ignored on both sides, NFKC-folded);
+#   3) otherwise an exact match within `window` characters after the cursor (the tokenizer
+#      dropped something);
+#   4) otherwise the token is unmatched: it gets no offsets and the cursor stays put, so the
+#      tokens after it still align.
+# A literal match satisfies text[start:end] == token, a loose one only after folding; offsets
+# never move backwards and always lie within the text, so the whole pass is
+# O(len(text) + window * len(tokens)).
+
+DEFAULT_WINDOW = 64
+
+
+def _fold(s: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFKC", s) if not c.isspace())
+
+
+def _loose_end(text: str, start: int, want: str) -> Optional[int]:
+    """End offset if text[start:] spells `want` (folded), ignoring whitespace; else None."""
+    n = len(text)
+    j = start
+    k = 0
+    while k < len(want):
+        if j >= n:
+            return None
+        c = text[j]
+        j += 1
+        if c.isspace():
+            continue
+        f = _fold(c)
+        if not want.startswith(f, k):
+            return None
+        k += len(f)
+    return j
+
+
+def align_tokens(
+    text: str,
+    tokens: Sequence[str],
+    *,
+    window: int = DEFAULT_WINDOW,
+) -> Tuple[List[Optional[int]], List[Optional[int]]]:
+    """Return parallel (starts, ends) character offsets of `tokens` in `text`.
+
+    Empty and unmatched tokens get None. Offsets are monotonic: each token starts at or after
+    the previous end.
+    """
+    n = len(text)
+    starts: List[Optional[int]] = []
+    ends: List[Optional[int]] = []
+    pos = 0
+    at = ws_end = -1
+    for tk in tokens:
+        if not tk:
+            starts.append(None)
+            ends.append(None)
+            continue
+        if at != pos:
+            # Leading whitespace is skipped once per cursor position, not once per token
+            at, ws_end = pos, pos
+            while ws_end < n and text[ws_end].isspace():
+                ws_end += 1
+        start = ws_end
+        if text.startswith(tk, start):
+            end: Optional[int] = start + len(tk)
+        else:
+            want = _fold(tk)
+            end = _loose_end(text, start, want) if want else None
+        if end is None:
+            idx = text.find(tk, pos, pos + window + len(tk))
+            if idx == -1:
+                starts.append(None)
+                ends.append(None)
+                continue
+            start, end = idx, idx + len(tk)
+        starts.append(start)
+        ends.append(end)
+        pos = end
+    return starts, ends
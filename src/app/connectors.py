@@ -1,9 +1,9 @@
 from __future__ import annotations
 
+from functools import partial
 from typing import Dict, List
 
 from pymongo.collection import Collection
-from pymongo import UpdateOne
 
 from .constants import (
     THAI_CONNECTORS_PREFIX,
@@ -13,6 +13,8 @@ from .constants import (
     ALL_PUNCTS,
     WS_RE,
 )
+from .leases import Lease
+from .stage_runner import checkpoint_mode, run_stage
 
 
 def _lstrip_opening(text: str) -> str:
@@ -122,18 +124,28 @@ def merge_sentences_array(sentences: List[dict], *, min_len: int) -> List[dict]
     return out if changed else None
 
 
+def _connector_fields(doc: dict, *, min_len: int) -> dict | None:
+    new_sentences = merge_sentences_array(list(doc.get("sentences") or []), min_len=min_len)
+    return None if new_sentences is None else {"sentences": new_sentences}
+
+
 def update_corpus_connectors(
     col: Collection,
     *,
     limit: int | None = None,
+    ids: list | None = None,
     batch: int = 200,
     missing_only: bool = True,
+    from_start: bool = False,
+    lease: Lease | None = None,
     min_len: int = 25,
     verbose: bool = False,
+    workers: int = 0,
 ) -> int:
     """Apply connector-based merging to documents' sentences.
 
     Sets process.connector=true after processing. Returns number of modified documents.
+    workers > 0 merges on a process pool (see stage_runner.run_stage).
     """
     base = {"sentences": {"$exists": True, "$ne": []}}
     if missing_only:
@@ -155,45 +167,40 @@ def update_corpus_connectors(
         candidates = None
 
     proj = {"sentences": 1}
-    cursor = col.find(filt, projection=proj, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
-
-    ops: List[UpdateOne] = []
-    modified_docs = 0
-    changed_content = 0
-    flagged_only = 0
-    try:
-        for doc in cursor:
-            doc_id = doc.get("_id")
-            sentences = list(doc.get("sentences") or [])
-            new_sentences = merge_sentences_array(sentences, min_len=min_len)
-            if new_sentences is None:
-                ops.append(UpdateOne({"_id": doc_id}, {"$set": {"process.connector": True}}))
-                flagged_only += 1
-            else:
-                ops.append(
-                    UpdateOne(
-                        {"_id": doc_id},
-                        {"$set": {"sentences": new_sentences, "process.connector": True}},
-                    )
-                )
-                changed_content += 1
-            if len(ops) >= batch:
-                res = col.bulk_write(ops, ordered=False)
-                modified_docs += res.modified_count
-                ops = []
-        if ops:
-            res = col.bulk_write(ops, ordered=False)
-            modified_docs += res.modified_count
-    finally:
-        try:
-            cursor.close()
-        except Exception:
-            pass
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    stats = run_stage(
+        col, filt, "connector",
+        compute=partial(_connector_fields, min_len=min_len), projection=proj, limit=limit, batch=batch,
+        workers=workers, processes=True, verbose=verbose,
+        checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+        options={"min_len": min_len},
+    )
+    modified_docs = stats.modified
+    changed_content = stats.changed
+    flagged_only = stats.flagged_only
 
     if verbose:
         print(
             f"connectors summary -> changed_content: {changed_content}, flagged_only: {flagged_only}, modified_docs: {modified_docs}"
         )
     return modified_docs
+
+
+def update_sentences_connectors(
+    col: Collection,
+    sent_col: Collection,
+    *,
+    limit: int | None = None,
+    ids: list | None = None,
+    missing_only: bool = True,
+    min_len: int = 25,
+    verbose: bool = False,
+) -> int:
+    """Sentences-schema variant: merge a document's sentence docs and replace them when merged."""
+    from .sentence_store import run_corpus_restructure
+
+    return run_corpus_restructure(
+        col, sent_col, "connector", lambda items: merge_sentences_array(items, min_len=min_len),
+        limit=limit, ids=ids, missing_only=missing_only, options={"min_len": min_len}, verbose=verbose,
+    )
@@ -14,13 +14,15 @@ HEADING_RE = re.compile(r"^\s*(=+)\s*(.*?)\s*(=+)\s*$")
 
 # Emoji and noise patterns for normalization
 EMOJI_RE = re.compile(
-    "[\U0001F600-\U0001F64F]"  # Emoticons
-    "|[\U0001F300-\U0001F5FF]"  # Symbols & pictographs
-    "|[\U0001F680-\U0001F6FF]"  # Transport & map
-    "|[\U0001F1E0-\U0001F1FF]"  # Flags
-    "|[\U00002700-\U000027BF]"  # Dingbats
-    "|[\U0001F900-\U0001F9FF]"  # Supplemental Symbols and Pictographs
-    "|[\U00002600-\U000026FF]"  # Misc symbols
+    "["
+    "\U0001F600-\U0001F64F"  # Emoticons
+    "\U0001F300-\U0001F5FF"  # Symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # Transport & map
+    "\U0001F1E0-\U0001F1FF"  # Flags
+    "\U00002700-\U000027BF"  # Dingbats
+    "\U0001F900-\U0001F9FF"  # Supplemental Symbols and Pictographs
+    "\U00002600-\U000026FF"  # Misc symbols
+    "]"
     , flags=re.UNICODE
 )
 
@@ -1,25 +1,150 @@
 from __future__ import annotations
 
+import importlib.util
 import os
-from typing import Optional
+import threading
+import time
+from typing import Dict, List, Optional
 
 from pymongo import MongoClient
+from pymongo.write_concern import WriteConcern
 
 
-def get_mongo_client() -> MongoClient:
+# Process-wide client cache. A forked child must not reuse the parent's client
+# (sockets and monitor threads do not survive fork), so the cache is keyed by pid
+# and dropped in the child right after fork.
+_CLIENT: Optional[MongoClient] = None
+_CLIENT_PID: Optional[int] = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _env_int(name: str) -> Optional[int]:
+    v = os.getenv(name)
+    if v is None or v.strip() == "":
+        return None
+    try:
+        return int(v)
+    except ValueError:
+        return None
+
+
+def _client_options() -> Dict:
+    """Pool/compression options from env.
+
+    - MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE: connection pool bounds
+    - MONGO_COMPRESSORS: e.g. "zstd,snappy,zlib" (see usable_compressors)
+    """
+    opts: Dict = {}
+    max_pool = _env_int("MONGO_MAX_POOL_SIZE")
+    if max_pool is not None:
+        opts["maxPoolSize"] = max_pool
+    min_pool = _env_int("MONGO_MIN_POOL_SIZE")
+    if min_pool is not None:
+        opts["minPoolSize"] = min_pool
+    compressors = (os.getenv("MONGO_COMPRESSORS") or "").strip()
+    if compressors:
+        opts["compressors"] = usable_compressors(compressors)
+    return opts
+
+
+# Compressors that need an extra package; pymongo refuses to connect when it is missing
+_COMPRESSOR_PACKAGES = {"zstd": "zstandard", "snappy": "snappy"}
+
+
+def usable_compressors(value: str) -> str:
+    """`value` without the compressors whose package is not installed (zlib when none is left)."""
+    names = [c.strip().lower() for c in value.split(",") if c.strip()]
+    usable: List[str] = []
+    for name in names:
+        package = _COMPRESSOR_PACKAGES.get(name)
+        if package and importlib.util.find_spec(package) is None:
+            print(f"MONGO_COMPRESSORS: {name} needs the {package} package; skipping it")
+            continue
+        usable.append(name)
+    if not usable:
+        print("MONGO_COMPRESSORS: no usable compressor left; using zlib")
+        usable = ["zlib"]
+    return ",".join(usable)
+
+
+def create_mongo_client() -> MongoClient:
+    """Create a new (uncached) MongoClient from env."""
     uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     username = os.getenv("MONGO_USER")
     password = os.getenv("MONGO_PASSWORD")
     auth_db = os.getenv("MONGO_AUTH_DB", "admin")
 
+    opts = _client_options()
     if username and password:
-        client = MongoClient(uri, username=username, password=password, authSource=auth_db)
+        client = MongoClient(uri, username=username, password=password, authSource=auth_db, **opts)
     else:
-        client = MongoClient(uri)
+        client = MongoClient(uri, **opts)
     return client
 
 
-def get_collection(name: str):
+def get_mongo_client() -> MongoClient:
+    """Return the shared MongoClient for this process (created on first use)."""
+    global _CLIENT, _CLIENT_PID
+    pid = os.getpid()
+    if _CLIENT is not None and _CLIENT_PID == pid:
+        return _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT_PID != pid:
+            _CLIENT = create_mongo_client()
+            _CLIENT_PID = pid
+        return _CLIENT
+
+
+def reset_mongo_client() -> None:
+    """Forget the cached client so the next call creates a fresh one.
+
+    Call from worker initializers; after fork this runs automatically.
+    The parent's client is not closed here because it still belongs to the parent.
+    """
+    global _CLIENT, _CLIENT_PID
+    _CLIENT = None
+    _CLIENT_PID = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=reset_mongo_client)
+
+
+def bulk_write_concern() -> Optional[WriteConcern]:
+    """Write concern for bulk stages from env (MONGO_BULK_W, MONGO_BULK_J).
+
+    None when neither is set, so bulk stages keep the client's (URI) or server's default.
+    """
+    w_raw = (os.getenv("MONGO_BULK_W") or "").strip()
+    j_raw = (os.getenv("MONGO_BULK_J") or "").strip().lower()
+    if not w_raw and not j_raw:
+        return None
+    opts = {}
+    if w_raw:
+        opts["w"] = int(w_raw) if w_raw.isdigit() else w_raw
+    if j_raw:
+        opts["j"] = j_raw in {"1", "true", "yes"}
+    return WriteConcern(**opts)
+
+
+def get_collection(name: str, *, bulk: bool = False):
     db_name = os.getenv("MONGO_DB", "tiktok_live")
     client = get_mongo_client()
-    return client[db_name][name]
+    col = client[db_name][name]
+    if bulk:
+        wc = bulk_write_concern()
+        if wc is not None:
+            col = col.with_options(write_concern=wc)
+    return col
+
+
+def ping_mongo(count: int = 5) -> List[float]:
+    """Send `ping` commands and return round-trip latencies in milliseconds."""
+    client = get_mongo_client()
+    admin = client.admin
+    out: List[float] = []
+    for _ in range(max(1, count)):
+        t0 = time.perf_counter()
+        admin.command("ping")
+        out.append((time.perf_counter() - t0) * 1000.0)
+    return out
@@ -6,7 +6,8 @@ from pathlib import Path
 from typing import Iterable, List, Optional, Tuple, Dict
 
 from pymongo.collection import Collection
-from pymongo import UpdateOne
+
+from .leases import Lease
 
 # sentence-transformers / torch
 from sentence_transformers import SentenceTransformer, InputExample, losses
@@ -89,9 +90,9 @@ def collect_training_corpus(col: Collection, *, limit_docs: Optional[int] = None
         {"process.finetuned": {"$exists": False}},
         {"process.finetuned": False}
     ]}
-    cursor = col.find(query, projection=projection, no_cursor_timeout=True)
-    if limit_docs is not None:
-        cursor = cursor.limit(limit_docs)
+    from .stage_runner import iter_id_docs
+
+    cursor = iter_id_docs(col, query, projection=projection, limit=limit_docs)
     seen = set()
     texts: List[str] = []
     doc_ids: List = []
@@ -214,8 +215,11 @@ def update_corpus_embeddings(
     base_model: str = DEFAULT_BASE_MODEL,
     finetuned_dir: Optional[str] = None,
     limit: Optional[int] = None,
+    ids: Optional[list] = None,
     batch: int = 100,
     missing_only: bool = True,
+    from_start: bool = False,
+    lease: Optional[Lease] = None,
     encode_batch_size: int = 64,
     device_override: Optional[str] = None,
     verbose: bool = False,
@@ -241,105 +245,176 @@ def update_corpus_embeddings(
         query = base_query
 
     projection = {"sentences": 1, "sentence_heads": 1}
-    cursor = col.find(query, projection=projection, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
-
+    if ids is not None:
+        query = {"$and": [query, {"_id": {"$in": list(ids)}}]}
     device = device_override or _select_device()
     if verbose:
         print(f"embeddings: using device -> {device}")
     model = _load_model(base_model, finetuned_dir, device=device)
 
     from .embeddings_store import insert_embeddings
-    from pymongo import UpdateOne
+    from .stage_runner import checkpoint_mode, run_stage
     client = col.database.client
     emb_col = client[col.database.name][embeddings_collection_name]
 
-    ops: List[UpdateOne] = []
-    modified_docs = 0
-    processed = 0
-    try:
-        for doc in cursor:
-            _id = doc.get("_id")
-            to_embed, index_map = _texts_to_embed(doc)
-            if not to_embed:
-                # No new embeddings needed; still set the flag so we don't revisit unless --all
-                ops.append(UpdateOne({"_id": _id}, {"$set": {"process.embeddings": True}}))
+    def compute(doc: dict) -> Optional[dict]:
+        _id = doc.get("_id")
+        to_embed, index_map = _texts_to_embed(doc)
+        if not to_embed:
+            # No new embeddings needed; still set the flag so we don't revisit unless --all
+            return None
+        # Compute embeddings in batches
+        embeddings: List[List[float]] = []
+        start = 0
+        while start < len(to_embed):
+            chunk = to_embed[start:start + encode_batch_size]
+            vecs = model.encode(
+                chunk,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+                batch_size=encode_batch_size,
+                device=device,
+            )
+            embeddings.extend(v.astype("float32").tolist() for v in vecs)
+            start += encode_batch_size
+
+        # Insert embeddings to embeddings collection and get ids
+        section_indices = [(section, idx) for (section, idx, kind) in index_map]
+        sent_indices = [idx for (section, idx) in section_indices if section == "sentences"]
+        head_indices = [idx for (section, idx) in section_indices if section == "sentence_heads"]
+        sent_vecs = [vec for (section, idx), vec in zip(section_indices, embeddings) if section == "sentences"]
+        head_vecs = [vec for (section, idx), vec in zip(section_indices, embeddings) if section == "sentence_heads"]
+
+        sent_ids = insert_embeddings(emb_col, _id, "sentences", sent_vecs, sent_indices) if sent_vecs else []
+        head_ids = insert_embeddings(emb_col, _id, "sentence_heads", head_vecs, head_indices) if head_vecs else []
+
+        # Apply embedding_id to doc copy
+        new_sentences = list(doc.get("sentences") or [])
+        new_heads = list(doc.get("sentence_heads") or [])
+        sent_ptr = 0
+        head_ptr = 0
+        for (section, idx, kind), vec in zip(index_map, embeddings):
+            if section == "sentences":
+                item = dict(new_sentences[idx]) if idx < len(new_sentences) else {}
+                if "embedding_id" not in item or not item.get("embedding_id"):
+                    item["embedding_id"] = sent_ids[sent_ptr]
+                    sent_ptr += 1
+                    new_sentences[idx] = item
             else:
-                # Compute embeddings in batches
-                embeddings: List[List[float]] = []
-                start = 0
-                while start < len(to_embed):
-                    chunk = to_embed[start:start + encode_batch_size]
-                    vecs = model.encode(
-                        chunk,
-                        convert_to_numpy=True,
-                        normalize_embeddings=True,
-                        show_progress_bar=False,
-                        batch_size=encode_batch_size,
-                        device=device,
-                    )
-                    embeddings.extend(v.astype("float32").tolist() for v in vecs)
-                    start += encode_batch_size
-
-                # Insert embeddings to embeddings collection and get ids
-                section_indices = [(section, idx) for (section, idx, kind) in index_map]
-                sent_indices = [idx for (section, idx) in section_indices if section == "sentences"]
-                head_indices = [idx for (section, idx) in section_indices if section == "sentence_heads"]
-                sent_vecs = [vec for (section, idx), vec in zip(section_indices, embeddings) if section == "sentences"]
-                head_vecs = [vec for (section, idx), vec in zip(section_indices, embeddings) if section == "sentence_heads"]
-
-                sent_ids = insert_embeddings(emb_col, _id, "sentences", sent_vecs, sent_indices) if sent_vecs else []
-                head_ids = insert_embeddings(emb_col, _id, "sentence_heads", head_vecs, head_indices) if head_vecs else []
-
-                # Apply embedding_id to doc copy
-                new_sentences = list(doc.get("sentences") or [])
-                new_heads = list(doc.get("sentence_heads") or [])
-                sent_ptr = 0
-                head_ptr = 0
-                for (section, idx, kind), vec in zip(index_map, embeddings):
-                    if section == "sentences":
-                        item = dict(new_sentences[idx]) if idx < len(new_sentences) else {}
-                        if "embedding_id" not in item or not item.get("embedding_id"):
-                            item["embedding_id"] = sent_ids[sent_ptr]
-                            sent_ptr += 1
-                            new_sentences[idx] = item
-                    else:
-                        item = dict(new_heads[idx]) if idx < len(new_heads) else {}
-                        if "embedding_id" not in item or not item.get("embedding_id"):
-                            item["embedding_id"] = head_ids[head_ptr]
-                            head_ptr += 1
-                            new_heads[idx] = item
-
-                ops.append(
-                    UpdateOne(
-                        {"_id": _id},
-                        {"$set": {"sentences": new_sentences, "sentence_heads": new_heads, "process.embeddings": True}},
-                    )
-                )
-
-            processed += 1
-            if len(ops) >= batch:
-                res = col.bulk_write(ops, ordered=False)
-                modified_docs += res.modified_count
-                ops = []
-        if ops:
-            res = col.bulk_write(ops, ordered=False)
-            modified_docs += res.modified_count
-    finally:
-        try:
-            cursor.close()
-        except Exception:
-            pass
+                item = dict(new_heads[idx]) if idx < len(new_heads) else {}
+                if "embedding_id" not in item or not item.get("embedding_id"):
+                    item["embedding_id"] = head_ids[head_ptr]
+                    head_ptr += 1
+                    new_heads[idx] = item
+        return {"sentences": new_sentences, "sentence_heads": new_heads}
+
+    stats = run_stage(
+        col, query, "embeddings",
+        compute=compute, projection=projection, limit=limit, batch=batch, verbose=verbose,
+        checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+    )
+    processed = stats.processed
+    modified_docs = stats.modified
     if verbose:
         print(f"embeddings summary -> processed: {processed}, modified_docs: {modified_docs}")
     return modified_docs
 
 
+def update_sentences_embeddings(
+    sent_col: Collection,
+    *,
+    base_model: str = DEFAULT_BASE_MODEL,
+    finetuned_dir: Optional[str] = None,
+    limit: Optional[int] = None,
+    ids: Optional[list] = None,
+    batch: int = 100,
+    missing_only: bool = True,
+    from_start: bool = False,
+    lease: Optional[Lease] = None,
+    encode_batch_size: int = 64,
+    device_override: Optional[str] = None,
+    verbose: bool = False,
+    embeddings_collection_name: str = "embeddings",
+) -> int:
+    """Sentences-schema variant: embed sentence documents and their sentence_heads.
+
+    Texts of a whole batch of sentence documents are encoded together. Items that already
+    have an embedding_id are kept. Returns number of sentence documents modified.
+    """
+    from .embeddings_store import insert_embeddings
+    from .sentence_store import run_sentence_stage
+
+    device = device_override or _select_device()
+    if verbose:
+        print(f"embeddings: using device -> {device}")
+    model = _load_model(base_model, finetuned_dir, device=device)
+    emb_col = sent_col.database[embeddings_collection_name]
+
+    def compute(docs: List[dict]) -> List[Optional[dict]]:
+        texts: List[str] = []
+        index_map: List[Tuple[int, str, int]] = []  # (doc position, section, index)
+        for pos, sdoc in enumerate(docs):
+            text = str(sdoc.get("text", "")).strip()
+            if text and not sdoc.get("embedding_id"):
+                texts.append(_prepare_text(text))
+                index_map.append((pos, "sentences", sdoc.get("index")))
+            for j, h in enumerate(sdoc.get("sentence_heads") or []):
+                if not isinstance(h, dict) or h.get("embedding_id"):
+                    continue
+                t = str(h.get("text", "")).strip()
+                if t:
+                    texts.append(_prepare_text(t))
+                    index_map.append((pos, "sentence_heads", j))
+        if not texts:
+            return [None] * len(docs)
+        vecs = model.encode(
+            texts,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+            batch_size=encode_batch_size,
+            device=device,
+        )
+        out: List[Optional[dict]] = [None] * len(docs)
+        for pos, sdoc in enumerate(docs):
+            entries = [(m, v) for m, v in zip(index_map, vecs) if m[0] == pos]
+            if not entries:
+                continue
+            fields: Dict = {}
+            sent_entries = [(m, v) for m, v in entries if m[1] == "sentences"]
+            if sent_entries:
+                (m, v), = sent_entries
+                fields["embedding_id"] = insert_embeddings(
+                    emb_col, sdoc["corpus_id"], "sentences", [v.astype("float32").tolist()], [m[2]]
+                )[0]
+            head_entries = [(m, v) for m, v in entries if m[1] == "sentence_heads"]
+            if head_entries:
+                head_ids = insert_embeddings(
+                    emb_col, sdoc["corpus_id"], "sentence_heads",
+                    [v.astype("float32").tolist() for _, v in head_entries],
+                    [m[2] for m, _ in head_entries],
+                    sentence=sdoc.get("index"),
+                )
+                heads = [dict(h) if isinstance(h, dict) else h for h in sdoc.get("sentence_heads") or []]
+                for (m, _), hid in zip(head_entries, head_ids):
+                    heads[m[2]]["embedding_id"] = hid
+                fields["sentence_heads"] = heads
+            out[pos] = fields
+        return out
+
+    return run_sentence_stage(
+        sent_col, "embeddings", compute,
+        projection={"text": 1, "embedding_id": 1, "sentence_heads": 1},
+        limit=limit, ids=ids, batch=batch, missing_only=missing_only, from_start=from_start, lease=lease, verbose=verbose,
+    )
+
+
 __all__ = [
     "TrainConfig",
     "collect_training_corpus",
     "finetune_model",
     "update_corpus_embeddings",
+    "update_sentences_embeddings",
     "mark_finetuned",
 ]
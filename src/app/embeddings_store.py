@@ -3,11 +3,19 @@ from pymongo import InsertOne
 from typing import List, Optional, Any
 
 
-def insert_embeddings(col: Collection, corpus_id: Any, section: str, embeddings: List[List[float]], indices: List[int]) -> List[Any]:
+def insert_embeddings(
+    col: Collection,
+    corpus_id: Any,
+    section: str,
+    embeddings: List[List[float]],
+    indices: List[int],
+    sentence: Optional[int] = None,
+) -> List[Any]:
     """
     Insert embeddings into the embeddings collection and return their ObjectIds.
     section: 'sentences' or 'sentence_heads'
     indices: index in the section array
+    sentence: sentence index, for sentence_heads stored on a sentence document (sentences schema)
     """
     ops = []
     for vec, idx in zip(embeddings, indices):
@@ -17,6 +25,8 @@ def insert_embeddings(col: Collection, corpus_id: Any, section: str, embeddings:
             "index": idx,
             "embedding": vec
         }
+        if sentence is not None:
+            doc["sentence"] = sentence
         ops.append(InsertOne(doc))
     if not ops:
         return []
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import datetime as dt
+import os
+import socket
+import threading
+import uuid
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+
+
+# -------------------------------
+# Work leases
+# -------------------------------
+# Several workers may run the same stage against one collection. A worker claims a chunk
+# of documents by stamping process.<stage>_lease = {owner, token, expires}; a document is
+# claimable while that field is missing or expired. Expiry uses the server clock ($$NOW),
+# so nodes with skewed clocks still agree. The stage write replaces the lease with
+# {done: <server time>}; a crashed worker's leases simply expire and are claimed again.
+#
+# The done time matters when the filter does not exclude processed documents (--all): a
+# document finished since the run started is not claimable again, so the run ends instead of
+# reprocessing its own output forever.
+
+
+@dataclass(frozen=True)
+class Lease:
+    owner: str
+    ttl: float = 300.0  # seconds; renewed by the heartbeat every ttl/3
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def lease_field(flag: str) -> str:
+    return f"process.{flag}_lease"
+
+
+def server_now(col: Collection) -> dt.datetime:
+    """Current time on the server (the clock lease expiry and done times use)."""
+    try:
+        return col.database.command("hello")["localTime"]
+    except Exception:
+        return dt.datetime.utcnow()
+
+
+def lease_done_update(flag: str) -> Dict:
+    """Update parts that end a lease after the stage wrote its result (merge into the write)."""
+    field = lease_field(flag)
+    return {
+        "$unset": {f"{field}.owner": "", f"{field}.token": "", f"{field}.expires": ""},
+        "$currentDate": {f"{field}.done": True},
+    }
+
+
+def _claimable(flag: str, since: Optional[dt.datetime] = None) -> Dict:
+    field = lease_field(flag)
+    free: Dict = {"$or": [
+        {f"{field}.owner": {"$exists": False}},
+        {"$expr": {"$lt": [f"${field}.expires", "$$NOW"]}},
+    ]}
+    if since is None:
+        return free
+    return {"$and": [free, {f"{field}.done": {"$not": {"$gte": since}}}]}
+
+
+def claim_chunk(
+    col: Collection,
+    filt: Dict,
+    flag: str,
+    lease: Lease,
+    *,
+    size: int,
+    projection: Optional[dict] = None,
+    since: Optional[dt.datetime] = None,
+) -> List[dict]:
+    """Claim up to `size` documents matching `filt` and return them (ascending _id).
+
+    Candidates are stamped with a fresh token in one update_many; the update is atomic per
+    document, so a document lost to a concurrent worker just does not come back in the
+    token read. Documents finished at or after `since` are skipped. Returns [] when nothing
+    is claimable.
+    """
+    field = lease_field(flag)
+    free = {"$and": [filt, _claimable(flag, since)]}
+    while True:
+        ids = [d["_id"] for d in col.find(free, projection={"_id": 1}).sort("_id", ASCENDING).limit(size)]
+        if not ids:
+            return []
+        token = uuid.uuid4().hex
+        col.update_many(
+            {"$and": [{"_id": {"$in": ids}}, _claimable(flag, since)]},
+            [{"$set": {field: {
+                "owner": lease.owner,
+                "token": token,
+                "expires": {"$add": ["$$NOW", int(lease.ttl * 1000)]},
+            }}}],
+        )
+        proj = dict(projection) if projection else None
+        docs = list(col.find({f"{field}.token": token}, projection=proj).sort("_id", ASCENDING))
+        if docs:
+            return docs
+        # Every candidate was taken by another worker in between; look again
+
+
+def claim_pages(
+    col: Collection,
+    filt: Dict,
+    flag: str,
+    lease: Lease,
+    *,
+    projection: Optional[dict] = None,
+    page: int = 200,
+    limit: Optional[int] = None,
+) -> Iterator[List[dict]]:
+    """Yield claimed chunks until nothing is claimable (or `limit` documents were claimed).
+
+    Documents finished since this call started are never claimed again, so a filter that
+    matches processed documents still terminates.
+    """
+    since = server_now(col)
+    remaining = limit
+    while remaining is None or remaining > 0:
+        n = page if remaining is None else min(page, remaining)
+        docs = claim_chunk(col, filt, flag, lease, size=n, projection=projection, since=since)
+        if not docs:
+            return
+        yield docs
+        if remaining is not None:
+            remaining -= len(docs)
+
+
+def release_leases(col: Collection, flag: str, owner: str) -> int:
+    """Drop every lease `owner` still holds for `flag` (unprocessed claims after an error)."""
+    field = lease_field(flag)
+    return col.update_many({f"{field}.owner": owner}, {"$unset": {field: ""}}).modified_count
+
+
+class Heartbeat:
+    """Background thread that keeps extending the owner's leases while a stage runs."""
+
+    def __init__(self, col: Collection, flag: str, lease: Lease):
+        self.col = col
+        self.flag = flag
+        self.lease = lease
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"{flag}-lease-heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        field = lease_field(self.flag)
+        interval = max(1.0, self.lease.ttl / 3.0)
+        while not self._stop.wait(interval):
+            try:
+                self.col.update_many(
+                    {f"{field}.owner": self.lease.owner},
+                    [{"$set": {f"{field}.expires": {"$add": ["$$NOW", int(self.lease.ttl * 1000)]}}}],
+                )
+            except Exception as e:
+                # Keep beating; a missed renewal only matters if it outlasts the ttl
+                print(f"lease heartbeat ({self.flag}) failed: {e}")
+
+    def start(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, Optional
+
+from .constants import (
+    THAI_DIGIT_MAP,
+    RE_INT,
+    RE_DECIMAL,
+    RE_THOUSANDS,
+    RE_TIME,
+    RE_FRACTION,
+    RE_RANGE,
+    RE_PERCENT,
+    RE_PHONE,
+    THAI_MONTHS,
+    CURRENCY_WORDS,
+    CURRENCY_SYMBOLS,
+    UNIT_DISTANCE,
+    UNIT_WEIGHT,
+    UNIT_VOLUME,
+    UNIT_AREA,
+    UNIT_TIME,
+    TIME_TOKENS,
+    ERA_TOKENS,
+    PERCENT_TOKENS,
+)
+
+
+# -------------------------------
+# Numeric shapes
+# -------------------------------
+# One anchored alternation of the RE_* patterns in constants.py, each under a named group, so a
+# token is matched once instead of once per pattern. TIME (":") and PERCENT ("%") cannot match
+# any other alternative, so lastgroup identifies them exactly.
+
+SHAPE_INT = "int"
+SHAPE_DECIMAL = "decimal"
+SHAPE_THOUSANDS = "thousands"
+SHAPE_TIME = "time"
+SHAPE_FRACTION = "fraction"
+SHAPE_RANGE = "range"
+SHAPE_PERCENT = "percent"
+SHAPE_PHONE = "phone"
+
+
+def _body(p: re.Pattern) -> str:
+    return p.pattern[1:-1]  # strip ^...$
+
+
+NUMERIC_RE = re.compile(
+    "^(?:"
+    + "|".join(
+        f"(?P<{name}>{_body(p)})"
+        for name, p in (
+            (SHAPE_INT, RE_INT),
+            (SHAPE_DECIMAL, RE_DECIMAL),
+            (SHAPE_THOUSANDS, RE_THOUSANDS),
+            (SHAPE_TIME, RE_TIME),
+            (SHAPE_FRACTION, RE_FRACTION),
+            (SHAPE_RANGE, RE_RANGE),
+            (SHAPE_PERCENT, RE_PERCENT),
+            (SHAPE_PHONE, RE_PHONE),
+        )
+    )
+    + ")$"
+)
+
+
+def normalize_digits(text: str) -> str:
+    return (text or "").translate(THAI_DIGIT_MAP)
+
+
+def numeric_shape(s: str) -> Optional[str]:
+    """Name of the numeric shape `s` matches (ASCII digits expected), or None."""
+    m = NUMERIC_RE.match(s)
+    return m.lastgroup if m else None
+
+
+def is_number_like(text: str) -> bool:
+    if not text:
+        return False
+    return NUMERIC_RE.match(normalize_digits(text.strip())) is not None
+
+
+# -------------------------------
+# Domain lexicon
+# -------------------------------
+# Surface form -> bitmask of the domain sets it belongs to (a word may be in several, e.g. ปอนด์
+# is both a currency and a weight unit).
+
+MONTH = 1 << 0
+CURRENCY_WORD = 1 << 1
+CURRENCY_SYMBOL = 1 << 2
+DISTANCE = 1 << 3
+VOLUME = 1 << 4
+WEIGHT = 1 << 5
+AREA = 1 << 6
+DURATION = 1 << 7
+TIME_WORD = 1 << 8
+ERA = 1 << 9
+PERCENT = 1 << 10
+ORDINAL = 1 << 11
+
+CURRENCY = CURRENCY_WORD | CURRENCY_SYMBOL
+
+ORDINAL_TOKENS = {"อันดับ", "อันดับที่", "ครั้ง", "ครั้งที่", "ที่"}
+
+
+def _build_lexicon() -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for bit, words in (
+        (MONTH, THAI_MONTHS),
+        (CURRENCY_WORD, CURRENCY_WORDS),
+        (CURRENCY_SYMBOL, CURRENCY_SYMBOLS),
+        (DISTANCE, UNIT_DISTANCE),
+        (VOLUME, UNIT_VOLUME),
+        (WEIGHT, UNIT_WEIGHT),
+        (AREA, UNIT_AREA),
+        (DURATION, UNIT_TIME),
+        (TIME_WORD, TIME_TOKENS),
+        (ERA, ERA_TOKENS),
+        (PERCENT, PERCENT_TOKENS),
+        (ORDINAL, ORDINAL_TOKENS),
+    ):
+        for w in words:
+            out[w] = out.get(w, 0) | bit
+    return out
+
+
+LEXICON: Dict[str, int] = _build_lexicon()
+
+# Type of a non-numeric token, first matching category wins (order as in tokenize)
+_TYPE_ORDER = (
+    (MONTH, "MONTH"),
+    (CURRENCY, "CURRENCY"),
+    (DISTANCE, "UNIT_DISTANCE"),
+    (VOLUME, "UNIT_VOLUME"),
+    (WEIGHT, "UNIT_WEIGHT"),
+    (AREA, "UNIT_AREA"),
+    (DURATION | TIME_WORD, "TIME_UNIT"),
+    (ERA, "ERA"),
+    (PERCENT, "PERCENT_SIGN"),
+    (ORDINAL, "ORDINAL_MARK"),
+)
+
+WORD_TYPES: Dict[str, str] = {
+    w: next(t for bits, t in _TYPE_ORDER if mask & bits) for w, mask in LEXICON.items()
+}
+
+# Unit following a number -> its numeric type, first matching category wins
+_UNIT_ORDER = (
+    (DISTANCE, "DISTANCE"),
+    (VOLUME, "VOLUME"),
+    (WEIGHT, "WEIGHT"),
+    (AREA, "AREA"),
+    (DURATION, "DURATION"),
+    (TIME_WORD, "TIME"),
+)
+
+UNIT_TYPES: Dict[str, str] = {
+    w: next(t for bits, t in _UNIT_ORDER if mask & bits)
+    for w, mask in LEXICON.items()
+    if any(mask & bits for bits, _ in _UNIT_ORDER)
+}
+
+
+def lexicon_mask(text: str) -> int:
+    return LEXICON.get(text, 0) if isinstance(text, str) else 0
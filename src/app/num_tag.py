@@ -1,35 +1,11 @@
 from __future__ import annotations
 
-import re
 from typing import Dict, List
 
 from pymongo.collection import Collection
-from pymongo import UpdateOne
-from .constants import (
-    THAI_DIGIT_MAP,
-    RE_INT, RE_DECIMAL, RE_THOUSANDS, RE_TIME, RE_FRACTION,
-    RE_RANGE, RE_PERCENT, RE_PHONE,
-)
-
-
-def normalize_digits(s: str) -> str:
-    return s.translate(THAI_DIGIT_MAP)
-
-
-def is_numeric_like(text: str) -> bool:
-    if not text:
-        return False
-    s = normalize_digits(text.strip())
-    # quick bail-out if no digits at all
-    if not re.search(r"\d", s):
-        return False
-    return any(
-        p.match(s) is not None
-        for p in (
-            RE_INT, RE_DECIMAL, RE_THOUSANDS, RE_TIME, RE_FRACTION,
-            RE_RANGE, RE_PERCENT, RE_PHONE,
-        )
-    )
+from .leases import Lease
+from .lexicon import is_number_like as is_numeric_like
+from .stage_runner import checkpoint_mode, run_stage
 
 
 def tag_sentences_array(sentences: List[dict]) -> List[dict]:
@@ -49,15 +25,41 @@ def tag_sentences_array(sentences: List[dict]) -> List[dict]:
     return out if changed_any else sentences
 
 
+def _num_tag_fields(doc: dict) -> dict | None:
+    sentences = list(doc.get("sentences") or [])
+    new_sentences = tag_sentences_array(sentences)
+    # No sentence changes: only the process flag is set
+    return None if new_sentences is sentences else {"sentences": new_sentences}
+
+
+def _server_unchanged() -> Dict:
+    """Filter for documents without any digit in their sentence texts (flagged on the server)."""
+    from .pushdown import digit_class, regex
+
+    return {
+        "sentences.text": {"$not": regex(digit_class())},
+        # str() of a non-string text could still read as a number; leave those to Python
+        "sentences": {"$not": {"$elemMatch": {"text": {"$exists": True, "$not": {"$type": "string"}}}}},
+    }
+
+
 def tag_corpus_numbers(
     col: Collection,
     *,
     limit: int | None = None,
+    ids: list | None = None,
     batch: int = 200,
     missing_only: bool = False,
+    from_start: bool = False,
+    lease: Lease | None = None,
+    workers: int = 0,
+    server: bool = False,
 ) -> int:
     """Add type=NUM and pos=NUM to numeric-like sentences in corpus.
 
+    workers > 0 tags on a process pool (see stage_runner.run_stage).
+    server=True first flags digit-free documents inside MongoDB (see pushdown.py).
+
     Returns number of documents modified.
     """
     # Base: require sentences present and non-empty to limit scope
@@ -73,37 +75,55 @@ def tag_corpus_numbers(
         }
 
     proj = {"sentences": 1}
-    cursor = col.find(filt, projection=proj, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
-
-    ops: list[UpdateOne] = []
-    modified_docs = 0
-    try:
-        for doc in cursor:
-            doc_id = doc.get("_id")
-            sentences = list(doc.get("sentences") or [])
-            new_sentences = tag_sentences_array(sentences)
-            if new_sentences is sentences:
-                # No sentence changes, but still mark process flag
-                ops.append(UpdateOne({"_id": doc_id}, {"$set": {"process.num_tag": True}}))
-            else:
-                ops.append(
-                    UpdateOne(
-                        {"_id": doc_id},
-                        {"$set": {"sentences": new_sentences, "process.num_tag": True}},
-                    )
-                )
-            if len(ops) >= batch:
-                res = col.bulk_write(ops, ordered=False)
-                modified_docs += res.modified_count
-                ops = []
-        if ops:
-            res = col.bulk_write(ops, ordered=False)
-            modified_docs += res.modified_count
-    finally:
-        try:
-            cursor.close()
-        except Exception:
-            pass
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    server_modified = 0
+    if server:
+        from .pushdown import remaining_limit, server_update
+        from .stages import server_stamp
+
+        unchanged = _server_unchanged()
+        matched, server_modified = server_update(
+            col, {"$and": [filt, unchanged]}, {"process.num_tag": server_stamp("num_tag")}, limit=limit
+        )
+        filt = {"$and": [filt, {"$nor": [unchanged]}]}
+        limit = remaining_limit(limit, matched)
+        if limit == 0:
+            return server_modified
+    stats = run_stage(
+        col, filt, "num_tag",
+        compute=_num_tag_fields, projection=proj, limit=limit, batch=batch,
+        workers=workers, processes=True,
+        checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+    )
+    modified_docs = server_modified + stats.modified
     return modified_docs
+
+
+def _tag_sentence_doc(sdoc: dict) -> dict | None:
+    if not is_numeric_like(str(sdoc.get("text", ""))):
+        return None
+    if sdoc.get("type") == "NUM" and sdoc.get("pos") == "NUM":
+        return None
+    return {"type": "NUM", "pos": "NUM"}
+
+
+def tag_sentence_numbers(
+    sent_col: Collection,
+    *,
+    limit: int | None = None,
+    ids: list | None = None,
+    batch: int = 200,
+    missing_only: bool = False,
+    from_start: bool = False,
+    lease: Lease | None = None,
+    verbose: bool = False,
+) -> int:
+    """Sentences-schema variant of tag_corpus_numbers. Returns number of sentence documents modified."""
+    from .sentence_store import per_sentence, run_sentence_stage
+
+    return run_sentence_stage(
+        sent_col, "num_tag", per_sentence(_tag_sentence_doc),
+        projection={"text": 1, "type": 1, "pos": 1},
+        limit=limit, ids=ids, batch=batch, missing_only=missing_only, from_start=from_start, lease=lease, verbose=verbose,
+    )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import sys
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Tuple
+
+from bson.regex import Regex
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+
+
+# -------------------------------
+# Server-side stage execution (--server)
+# -------------------------------
+# Trivial transforms run as update_many with an aggregation-pipeline update, so documents never
+# leave the server. Whatever a server rule cannot decide exactly is left for the Python path,
+# which callers run afterwards as the fallback. Needs MongoDB 4.4+ ($regexFindAll, $$NOW).
+#
+# Python's \s and \d are Unicode-aware on str while Mongo's PCRE classes are ASCII-only,
+# so the classes below are generated from Python's own definitions (str.isspace /
+# str.isdecimal, which is what `re` uses) to keep both paths in agreement.
+
+
+def _pcre_class(pred: Callable[[str], bool], *, negate: bool = False) -> str:
+    parts = []
+    cp = 0
+    end = sys.maxunicode + 1
+    while cp < end:
+        if 0xD800 <= cp <= 0xDFFF or not pred(chr(cp)):
+            cp += 1
+            continue
+        start = cp
+        while cp + 1 < end and not 0xD800 <= cp + 1 <= 0xDFFF and pred(chr(cp + 1)):
+            cp += 1
+        parts.append(f"\\x{{{start:X}}}" if start == cp else f"\\x{{{start:X}}}-\\x{{{cp:X}}}")
+        cp += 1
+    return ("[^" if negate else "[") + "".join(parts) + "]"
+
+
+@lru_cache(maxsize=None)
+def whitespace_class(negate: bool = False) -> str:
+    """PCRE class equal to Python's \\s (or \\S with negate=True)."""
+    return _pcre_class(str.isspace, negate=negate)
+
+
+@lru_cache(maxsize=None)
+def digit_class() -> str:
+    """PCRE class equal to Python's \\d."""
+    return _pcre_class(str.isdecimal)
+
+
+def regex(pattern: str) -> Regex:
+    # Plain BSON regex (no flags); usable in find filters and under $not
+    return Regex(pattern)
+
+
+def server_update(
+    col: Collection,
+    filt: Dict,
+    fields: Dict,
+    *,
+    limit: Optional[int] = None,
+) -> Tuple[int, int]:
+    """Apply [{$set: fields + updated_at}] to documents matching `filt` in one update_many.
+
+    With `limit`, only the first `limit` matching _ids are updated (one _id-only query).
+    Returns (matched, modified).
+    """
+    if limit is not None:
+        if limit <= 0:
+            return 0, 0
+        ids = [d["_id"] for d in col.find(filt, projection={"_id": 1}).sort("_id", ASCENDING).limit(limit)]
+        if not ids:
+            return 0, 0
+        filt = {"$and": [filt, {"_id": {"$in": ids}}]}
+    res = col.update_many(filt, [{"$set": {**fields, "updated_at": "$$NOW"}}])
+    return res.matched_count, res.modified_count
+
+
+def remaining_limit(limit: Optional[int], used: int) -> Optional[int]:
+    return None if limit is None else max(0, limit - used)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+
+# -------------------------------
+# Single-pass rewrite rules
+# -------------------------------
+# Stages that normalize raw.content register their regex rules here per stage; ruleset(stage)
+# compiles them into one alternation that is scanned once over the text. At each position the
+# first registered rule that matches wins and scanning resumes after its match, so rules must be
+# written for that (a rule cannot see another rule's output) and must not match empty strings.
+# Each RuleSet counts hits per rule for --verbose; with a process pool every worker keeps its own.
+#
+# A rule may declare `first`, a regex class of the characters its matches can start with. When
+# every rule of a set does, the scanner is prefixed with a lookahead on their union, which lets
+# `re` reject most positions without trying each alternative.
+
+Repl = Union[str, Callable[[re.Match], str]]
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    pattern: str
+    repl: Repl  # template for Match.expand or a callable, as in re.sub
+    first: Optional[str] = None  # e.g. r"\d", r"\s"
+
+
+# Named groups become non-capturing in the combined scanner (names may repeat across rules);
+# non-literal hits are re-matched with the rule's own pattern to build the replacement.
+_NAMED_GROUP = re.compile(r"(?<!\\)\(\?P<[A-Za-z_]\w*>")
+
+
+class RuleSet:
+    def __init__(self, rules: Iterable[Rule], flags: int = 0):
+        self.rules: List[Rule] = list(rules)
+        self._patterns = [re.compile(r.pattern, flags) for r in self.rules]
+        # Literal replacements are used as-is, without re-matching the rule
+        self._literal = [
+            r.repl if isinstance(r.repl, str) and "\\" not in r.repl else None for r in self.rules
+        ]
+        body = "|".join(f"(?P<_r{i}>{_NAMED_GROUP.sub('(?:', r.pattern)})" for i, r in enumerate(self.rules))
+        if self.rules and all(r.first for r in self.rules):
+            body = f"(?=[{''.join(r.first for r in self.rules)}])(?:{body})"
+        self._scanner = re.compile(body, flags)
+        self.hits: Dict[str, int] = {r.name: 0 for r in self.rules}
+
+    def rewrite(self, text: str) -> str:
+        if not text or not self.rules:
+            return text
+        out: List[str] = []
+        last = 0
+        for m in self._scanner.finditer(text):
+            i = int(m.lastgroup[2:])
+            rule = self.rules[i]
+            out.append(text[last:m.start()])
+            literal = self._literal[i]
+            if literal is not None:
+                out.append(literal)
+            else:
+                rm = self._patterns[i].match(text, m.start())
+                out.append(rule.repl(rm) if callable(rule.repl) else rm.expand(rule.repl))
+            last = m.end()
+            self.hits[rule.name] += 1
+        if not out:
+            return text
+        out.append(text[last:])
+        return "".join(out)
+
+    def hit_summary(self) -> str:
+        return ", ".join(f"{name}: {n}" for name, n in self.hits.items())
+
+
+_RULES: Dict[str, List[Rule]] = {}
+_COMPILED: Dict[str, RuleSet] = {}
+
+
+def register(stage: str, name: str, pattern: str, repl: Repl, *, first: Optional[str] = None) -> None:
+    """Append a rule to `stage`'s rule set (order is match priority)."""
+    rules = _RULES.setdefault(stage, [])
+    if any(r.name == name for r in rules):
+        raise ValueError(f"rule already registered for {stage}: {name}")
+    rules.append(Rule(name, pattern, repl, first))
+    _COMPILED.pop(stage, None)
+
+
+def ruleset(stage: str) -> RuleSet:
+    """Compiled rule set of `stage` (built on first use, rebuilt after register)."""
+    rs = _COMPILED.get(stage)
+    if rs is None:
+        rs = _COMPILED[stage] = RuleSet(_RULES.get(stage, []))
+    return rs
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
 import datetime as dt
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 import re
 from pathlib import Path
-from typing import Dict, Iterator, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from .text_normalize import normalize_text
 from .constants import HEADING_RE
 
-
+# Duplicate-suffixed section keys like "Header (2)" (see split_sections)
+_HEADER_SUFFIX_RE = re.compile(r"^(.*?)(?: \(\d+\))?$")
 
 
 def split_sections(text: str) -> Dict[str, str]:
@@ -68,12 +71,13 @@ def split_nonempty_lines(block: str) -> List[str]:
 
 
 def to_corpus_records(title: str, sections: Dict[str, str]) -> List[Dict[str, object]]:
-    created_at = dt.datetime.utcnow().replace(microsecond=0).isoformat() + "Z"
+    now = dt.datetime.utcnow().replace(microsecond=0)
+    created_at = now.isoformat() + "Z"
     records: List[Dict[str, object]] = []
     idx = 1
     for header, content in sections.items():
         # Normalize duplicate-suffixed keys like "Header (2)" back to base header text
-        m = re.match(r"^(.*?)(?: \(\d+\))?$", header)
+        m = _HEADER_SUFFIX_RE.match(header)
         header_base = (m.group(1) if m else header).strip()
         header_text = header_base if header_base != "_root" else ""
         paras = split_paragraphs(content)
@@ -90,6 +94,7 @@ def to_corpus_records(title: str, sections: Dict[str, str]) -> List[Dict[str, ob
                         "content": norm,
                         "created_at": created_at,
                     },
+                    "updated_at": now,
                 }
                 records.append(rec)
                 idx += 1
@@ -117,3 +122,100 @@ def generate_records_grouped_by_file(cfg: SegmentDbConfig) -> Iterator[Tuple[str
         sections = split_sections(text)
         records = to_corpus_records(title, sections)
         yield title, records
+
+
+def parse_article_file(path: Path) -> Tuple[str, List[Dict[str, object]]]:
+    """Read one article file and build its corpus records (runs inside pool workers)."""
+    text = path.read_text(encoding="utf-8")
+    return path.stem, to_corpus_records(path.stem, split_sections(text))
+
+
+def generate_records_parallel(
+    cfg: SegmentDbConfig,
+    *,
+    workers: int,
+    prefetch: int = 16,
+    skip_titles: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, List[Dict[str, object]]]]:
+    """Yield (title, records) per file like generate_records_grouped_by_file, parsing in a process pool.
+
+    At most `prefetch` files are in flight at once, so memory stays bounded when the
+    writer is slower than the parsers. Titles in `skip_titles` are skipped before reading.
+    Output order follows the sorted file order.
+    """
+    paths = sorted([p for p in cfg.articles_dir.glob("*.txt") if p.is_file()])
+    if cfg.max_files is not None:
+        paths = paths[: cfg.max_files]
+    if skip_titles:
+        paths = [p for p in paths if p.stem not in skip_titles]
+    if not paths:
+        return
+    from .stage_runner import worker_context
+
+    pending: deque = deque()
+    with ProcessPoolExecutor(max_workers=max(1, workers), mp_context=worker_context()) as pool:
+        it = iter(paths)
+        for p in it:
+            pending.append(pool.submit(parse_article_file, p))
+            if len(pending) >= max(1, prefetch):
+                break
+        while pending:
+            title, records = pending.popleft().result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append(pool.submit(parse_article_file, nxt))
+            yield title, records
+
+
+def estimate_record_bytes(rec: Dict[str, object]) -> int:
+    """Cheap upper-bound estimate of a corpus record's BSON size (UTF-8 text plus fixed overhead)."""
+    raw = rec.get("raw") or {}
+    size = 128
+    for v in (rec.get("title"), raw.get("header"), raw.get("content"), raw.get("created_at")):
+        if isinstance(v, str):
+            size += len(v.encode("utf-8"))
+    return size
+
+
+def insert_records_streaming(
+    col,
+    items: Iterable[Tuple[str, List[Dict[str, object]]]],
+    *,
+    target_bytes: int = 4 * 1024 * 1024,
+    max_docs: int = 10000,
+    on_commit=None,
+    on_title=None,
+) -> int:
+    """Insert records from many articles using cross-article insert_many batches.
+
+    - A batch is flushed when its estimated size reaches `target_bytes` (or `max_docs` records).
+    - `on_title(title)` is called before a title's records are buffered (e.g. to delete old docs).
+    - `on_commit(titles)` is called after a flush is acknowledged with the titles whose records
+      are now fully inserted; titles split across batches are reported after their last batch.
+    Returns number of inserted documents.
+    """
+    buf: List[Dict[str, object]] = []
+    buf_bytes = 0
+    complete: List[str] = []
+    total = 0
+
+    def flush() -> None:
+        nonlocal buf, buf_bytes, complete, total
+        if buf:
+            col.insert_many(buf, ordered=False)
+            total += len(buf)
+        if complete and on_commit is not None:
+            on_commit(complete)
+        buf, buf_bytes, complete = [], 0, []
+
+    for title, records in items:
+        if on_title is not None:
+            on_title(title)
+        for rec in records:
+            buf.append(rec)
+            buf_bytes += estimate_record_bytes(rec)
+            if buf_bytes >= target_bytes or len(buf) >= max_docs:
+                flush()
+        complete.append(title)
+    flush()
+    return total
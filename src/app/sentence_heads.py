@@ -5,6 +5,10 @@ from typing import Dict, List, Optional
 from pymongo.collection import Collection
 from pymongo import UpdateOne
 
+from .leases import Lease
+from .stage_runner import checkpoint_mode, iter_id_docs, run_stage
+from .token_store import sentence_tokens
+
 
 def _lemma_or_text(tok: dict) -> str:
     v = tok.get("lemma")
@@ -13,74 +17,136 @@ def _lemma_or_text(tok: dict) -> str:
     return str(v)
 
 
-def build_sentence_heads(tokens: List[dict]) -> List[dict]:
+def build_sentence_heads(tokens: List[dict], *, sentence_index: Optional[int] = None) -> List[dict]:
     """Build head-based phrases from a token list.
 
     For each unique head id (including 0 for root), collect tokens whose head equals that id, and also include the token
     whose id equals that head id (the governor). Skip head==0 for output. Keep the original order by token id.
     Returns a list of items: { head: <head_lemma>, text: <joined_lemmas>, tokens: [<token subset>] }.
+    When sentence_index is given, items reference tokens instead of copying them:
+    { head, text, sentence: <sentence_index>, token_ids: [<token id>] } (see resolve_head_tokens).
     """
     if not tokens:
         return []
 
-    # Map id -> token for quick lookup and preserve ordering by id
+    # One pass: parse ids once, map id -> token (last wins) and collect unique int heads in order
     id_to_tok: Dict[int, dict] = {}
+    indexed: List[tuple[int, dict]] = []
+    heads: List[int] = []
+    seen = set()
     for t in tokens:
+        h = t.get("head")
+        if isinstance(h, int) and h not in seen:
+            heads.append(h)
+            seen.add(h)
         try:
             tid = int(t.get("id"))
         except Exception:
             continue
         id_to_tok[tid] = t
+        indexed.append((tid, t))
 
-    # Unique heads present in tokens (ints only)
-    heads: List[int] = []
-    seen = set()
-    for t in tokens:
+    # Tokens normally arrive in id order; sort once (stable) only when they do not
+    if any(indexed[i][0] > indexed[i + 1][0] for i in range(len(indexed) - 1)):
+        indexed.sort(key=lambda it: it[0])
+
+    # head -> members (dependents plus the governor itself), filled in id order
+    groups: Dict[int, List[tuple[int, dict]]] = {h: [] for h in heads if h != 0}
+    for tid, t in indexed:
         h = t.get("head")
-        if isinstance(h, int) and h not in seen:
-            heads.append(h)
-            seen.add(h)
+        if isinstance(h, (int, float)) and h in groups:
+            groups[h].append((tid, t))
+            if h == tid:
+                continue
+        if tid in groups:
+            groups[tid].append((tid, t))
 
     out: List[dict] = []
     for h in heads:
         if h == 0:
             continue  # skip root
-        # collect tokens with head==h plus the governor (id==h)
-        group: List[dict] = []
-        for t in tokens:
-            try:
-                tid = int(t.get("id"))
-            except Exception:
-                continue
-            if t.get("head") == h or tid == h:
-                group.append(t)
-        # Order by token id ascending
-        try:
-            group.sort(key=lambda x: int(x.get("id")))
-        except Exception:
-            pass
-
+        members = groups[h]
         # Determine head text
         head_tok: Optional[dict] = id_to_tok.get(h)
         head_text = _lemma_or_text(head_tok) if head_tok else str(h)
-        text = " ".join(_lemma_or_text(t) for t in group).strip()
-        out.append({"head": head_text, "text": text, "tokens": group})
+        text = " ".join(_lemma_or_text(t) for _, t in members).strip()
+        if sentence_index is None:
+            out.append({"head": head_text, "text": text, "tokens": [t for _, t in members]})
+        else:
+            out.append({
+                "head": head_text,
+                "text": text,
+                "sentence": sentence_index,
+                "token_ids": [tid for tid, _ in members],
+            })
     return out
 
 
+def resolve_head_tokens(
+    head_item: dict,
+    sentences: Optional[List[dict] | Dict[int, dict]],
+    cache: Optional[Dict[int, Dict[int, dict]]] = None,
+    lang: Optional[str] = None,
+) -> List[dict]:
+    """Return the token dicts of a sentence_heads item.
+
+    Supports both layouts: legacy items embedding `tokens`, and reference items with
+    `sentence` + `token_ids` resolved against sentences[].tokens. `sentences` may also be a
+    dict of sentence index -> sentence doc (sentences schema). `cache` (sentence index ->
+    id map) can be shared across items of the same document.
+    """
+    if "tokens" in head_item:
+        return list(head_item.get("tokens") or [])
+    si = head_item.get("sentence")
+    if not isinstance(si, int) or not sentences:
+        return []
+    if isinstance(sentences, dict):
+        sentence = sentences.get(si)
+    else:
+        sentence = sentences[si] if 0 <= si < len(sentences) else None
+    if sentence is None:
+        return []
+    id_map = cache.get(si) if cache is not None else None
+    if id_map is None:
+        id_map = {}
+        for t in sentence_tokens(sentence, lang):
+            try:
+                id_map[int(t.get("id"))] = t
+            except Exception:
+                continue
+        if cache is not None:
+            cache[si] = id_map
+    return [id_map[i] for i in head_item.get("token_ids") or [] if i in id_map]
+
+
+def _sentence_heads_fields(doc: dict) -> dict:
+    heads_all: List[dict] = []
+    for si, s in enumerate(doc.get("sentences") or []):
+        toks = sentence_tokens(s, doc.get("lang"))
+        heads = build_sentence_heads(toks, sentence_index=si)
+        if heads:
+            heads_all.extend(heads)
+    return {"sentence_heads": heads_all}
+
+
 def update_corpus_sentence_heads(
     col: Collection,
     *,
     limit: Optional[int] = None,
+    ids: Optional[list] = None,
     batch: int = 200,
     missing_only: bool = True,
+    from_start: bool = False,
+    lease: Optional[Lease] = None,
     verbose: bool = False,
+    workers: int = 0,
 ) -> int:
     """Compute dependency-based head phrases for each sentence and store into sentence_heads.
 
     - Skips documents with process.sentence_heads=true when missing_only is True
     - After processing, sets process.sentence_heads=true
     - Requires sentences[].tokens
+    - workers > 0 builds heads on a process pool (see stage_runner.run_stage)
     """
     base = {"sentences": {"$exists": True, "$ne": []}, "sentences.tokens": {"$exists": True}}
     if missing_only:
@@ -96,31 +162,82 @@ def update_corpus_sentence_heads(
     else:
         filt = base
 
-    projection = {"sentences": 1}
-    cursor = col.find(filt, projection=projection, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
+    projection = {"sentences.tokens": 1, "lang": 1}
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    stats = run_stage(
+        col, filt, "sentence_heads",
+        compute=_sentence_heads_fields, projection=projection, limit=limit, batch=batch,
+        workers=workers, processes=True, verbose=verbose,
+        checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+    )
+    processed = stats.processed
+    modified = stats.modified
+    if verbose:
+        print(f"sentence-heads summary -> processed: {processed}, modified_docs: {modified}")
+    return modified
+
+
+def update_sentences_sentence_heads(
+    sent_col: Collection,
+    *,
+    limit: Optional[int] = None,
+    ids: Optional[list] = None,
+    batch: int = 200,
+    missing_only: bool = True,
+    from_start: bool = False,
+    lease: Optional[Lease] = None,
+    verbose: bool = False,
+) -> int:
+    """Sentences-schema variant: store the sentence's head items on its own document.
+
+    Items reference tokens with `sentence` = the sentence doc's index. Returns number of sentence documents modified.
+    """
+    from .sentence_store import per_sentence, run_sentence_stage
+
+    def compute(sdoc: dict) -> Optional[dict]:
+        toks = sentence_tokens(sdoc, sdoc.get("lang"))
+        return {"sentence_heads": build_sentence_heads(toks, sentence_index=sdoc.get("index"))}
+
+    return run_sentence_stage(
+        sent_col, "sentence_heads", per_sentence(compute),
+        base={"tokens": {"$exists": True}},
+        projection={"tokens": 1, "lang": 1},
+        limit=limit, ids=ids, batch=batch, missing_only=missing_only, from_start=from_start, lease=lease, verbose=verbose,
+    )
+
+
+def migrate_sentence_heads(
+    col: Collection,
+    *,
+    limit: Optional[int] = None,
+    batch: int = 200,
+    verbose: bool = False,
+) -> int:
+    """Convert legacy sentence_heads (embedded token copies) to the reference format.
+
+    Heads are rebuilt from sentences[].tokens; embedding_id values are carried over by
+    position when the rebuilt item has the same text. Returns number of modified documents.
+    """
+    filt = {"sentence_heads.tokens": {"$exists": True}}
+    projection = {"sentences.tokens": 1, "sentence_heads": 1, "lang": 1}
+    cursor = iter_id_docs(col, filt, projection=projection, limit=limit)
 
     ops: List[UpdateOne] = []
     modified = 0
     processed = 0
+    carried = 0
     try:
         for doc in cursor:
-            doc_id = doc.get("_id")
-            sentences = list(doc.get("sentences") or [])
-            heads_all: List[dict] = []
-            for s in sentences:
-                toks = list(s.get("tokens") or [])
-                heads = build_sentence_heads(toks)
-                if heads:
-                    heads_all.extend(heads)
-
-            ops.append(
-                UpdateOne(
-                    {"_id": doc_id},
-                    {"$set": {"sentence_heads": heads_all, "process.sentence_heads": True}},
-                )
-            )
+            old_heads = list(doc.get("sentence_heads") or [])
+            new_heads: List[dict] = []
+            for si, s in enumerate(doc.get("sentences") or []):
+                new_heads.extend(build_sentence_heads(sentence_tokens(s, doc.get("lang")), sentence_index=si))
+            for old, new in zip(old_heads, new_heads):
+                if isinstance(old, dict) and old.get("embedding_id") and old.get("text") == new.get("text"):
+                    new["embedding_id"] = old["embedding_id"]
+                    carried += 1
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"sentence_heads": new_heads}, "$currentDate": {"updated_at": True}}))
             processed += 1
             if len(ops) >= batch:
                 res = col.bulk_write(ops, ordered=False)
@@ -135,5 +252,5 @@ def update_corpus_sentence_heads(
         except Exception:
             pass
     if verbose:
-        print(f"sentence-heads summary -> processed: {processed}, modified_docs: {modified}")
+        print(f"migrate sentence-heads -> processed: {processed}, embedding_ids_carried: {carried}, modified_docs: {modified}")
     return modified
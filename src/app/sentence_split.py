@@ -3,8 +3,9 @@ from __future__ import annotations
 from typing import Iterable, List
 
 from pymongo.collection import Collection
-from pymongo import UpdateOne
 from .constants import WS_RE
+from .leases import Lease
+from .stage_runner import checkpoint_mode, iter_id_docs, run_stage
 
 
 def split_by_space(text: str) -> List[str]:
@@ -20,15 +21,65 @@ def build_sentences_array(text: str) -> List[dict]:
     return [{"text": t} for t in tokens]
 
 
+def _sentences_fields(doc: dict) -> dict:
+    content = (((doc or {}).get("raw") or {}).get("content")) or ""
+    return {"sentences": build_sentences_array(content)}
+
+
+# What --server leaves to the Python path
+_PYTHON_ONLY = {"raw.content": {"$exists": True, "$ne": None, "$not": {"$type": "string"}}}
+
+
+def _server_sentences(col: Collection, filt: dict, *, limit: int | None) -> tuple[int, int]:
+    """Split on the server: sentences = {text} per run of non-whitespace in raw.content.
+
+    Same result as build_sentences_array (whitespace class generated from Python's \\s).
+    Returns (matched, modified); documents with a non-string, non-null raw.content are left
+    for the Python path (_PYTHON_ONLY).
+    """
+    from .pushdown import remaining_limit, server_update, whitespace_class
+    from .stages import server_stamp
+
+    stamp = server_stamp("sentence_split")
+    matched, modified = server_update(
+        col,
+        {"$and": [filt, {"raw.content": {"$type": "string"}}]},
+        {
+            "sentences": {"$map": {
+                "input": {"$regexFindAll": {"input": "$raw.content", "regex": whitespace_class(negate=True) + "+"}},
+                "as": "m",
+                "in": {"text": "$$m.match"},
+            }},
+            "process.sentence_split": stamp,
+        },
+        limit=limit,
+    )
+    m2, mod2 = server_update(
+        col,
+        {"$and": [filt, {"raw.content": None}]},
+        {"sentences": {"$literal": []}, "process.sentence_split": stamp},
+        limit=remaining_limit(limit, matched),
+    )
+    return matched + m2, modified + mod2
+
+
 def update_corpus_sentences(
     col: Collection,
     *,
     limit: int | None = None,
+    ids: list | None = None,
     batch: int = 500,
     missing_only: bool = True,
+    from_start: bool = False,
+    lease: Lease | None = None,
+    workers: int = 0,
+    server: bool = False,
 ) -> int:
     """Populate the 'sentences' array for documents in corpus.
 
+    workers > 0 splits on a process pool (see stage_runner.run_stage).
+    server=True splits inside MongoDB first (see pushdown.py); the Python path handles the rest.
+
     Returns number of documents updated.
     """
     filt = {}
@@ -42,33 +93,73 @@ def update_corpus_sentences(
         }
 
     proj = {"raw.content": 1}
-    cursor = col.find(filt, projection=proj, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    server_modified = 0
+    if server:
+        from .pushdown import remaining_limit
+
+        matched, server_modified = _server_sentences(col, filt, limit=limit)
+        filt = {"$and": [filt, _PYTHON_ONLY]}
+        limit = remaining_limit(limit, matched)
+        if limit == 0:
+            return server_modified
+    stats = run_stage(
+        col, filt, "sentence_split",
+        compute=_sentences_fields, projection=proj, limit=limit, batch=batch,
+        workers=workers, processes=True,
+        checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+    )
+    updated = server_modified + stats.modified
+    return updated
+
+
+def update_sentences_split(
+    col: Collection,
+    sent_col: Collection,
+    *,
+    limit: int | None = None,
+    ids: list | None = None,
+    missing_only: bool = True,
+    verbose: bool = False,
+) -> int:
+    """Sentences-schema variant: write one document per sentence into `sent_col`.
+
+    Sets process.sentence_split=true on the corpus document. Returns number of corpus documents updated.
+    """
+    from .sentence_store import ensure_sentence_indexes, replace_sentences
+    from .stages import stage_stamp
+
+    ensure_sentence_indexes(sent_col)
+    filt = {}
+    if missing_only:
+        filt = {
+            "$or": [
+                {"process.sentence_split": {"$exists": False}},
+                {"process.sentence_split": False},
+            ]
+        }
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    cursor = iter_id_docs(col, filt, projection={"raw.content": 1, "process": 1}, limit=limit)
 
-    ops: list[UpdateOne] = []
     updated = 0
+    inserted = 0
     try:
         for doc in cursor:
             doc_id = doc.get("_id")
             content = (((doc or {}).get("raw") or {}).get("content")) or ""
-            sentences = build_sentences_array(content)
-            ops.append(
-                UpdateOne(
-                    {"_id": doc_id},
-                    {"$set": {"sentences": sentences, "process.sentence_split": True}},
-                )
+            inserted += replace_sentences(sent_col, doc_id, build_sentences_array(content))
+            res = col.update_one(
+                {"_id": doc_id},
+                {"$set": {"process.sentence_split": stage_stamp("sentence_split", doc)}, "$currentDate": {"updated_at": True}},
             )
-            if len(ops) >= batch:
-                res = col.bulk_write(ops, ordered=False)
-                updated += res.modified_count + res.upserted_count
-                ops = []
-        if ops:
-            res = col.bulk_write(ops, ordered=False)
-            updated += res.modified_count + res.upserted_count
+            updated += res.modified_count
     finally:
         try:
             cursor.close()
         except Exception:
             pass
+    if verbose:
+        print(f"sentences (sentences) summary -> docs: {updated}, sentence_docs: {inserted}")
     return updated
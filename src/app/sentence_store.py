@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from pymongo import ASCENDING, InsertOne
+from pymongo.collection import Collection
+
+from .leases import Lease
+from .stage_runner import checkpoint_mode, iter_id_docs, run_stage
+from .stages import stage_stamp
+
+
+# -------------------------------
+# Sentence-per-document schema
+# -------------------------------
+# In "sentences" schema mode each sentence lives in its own document:
+#   { corpus_id, gen, gen_size, index, text, [type, pos, tokens, heads, embedding_id, ...], process: { <stage>: true } }
+# keyed by (corpus_id, gen, index). The corpus document keeps raw/title and document-level flags.
+#
+# A corpus document's sentences are replaced as a new generation: the new documents are inserted
+# under a fresh `gen` first and the older generations are deleted only after every insert was
+# acknowledged. If that is interrupted, both generations exist; readers take the newest complete
+# one (gen_size documents present), and the next replace removes the leftovers.
+
+SCHEMA_EMBEDDED = "embedded"
+SCHEMA_SENTENCES = "sentences"
+DEFAULT_SENTENCES_COLLECTION = "sentences"
+
+# Unique key before generations were introduced; dropped so two generations can coexist
+_LEGACY_INDEX = "corpus_id_1_index_1"
+
+
+def ensure_sentence_indexes(col: Collection) -> None:
+    if _LEGACY_INDEX in col.index_information():
+        col.drop_index(_LEGACY_INDEX)
+    col.create_index([("corpus_id", ASCENDING), ("gen", ASCENDING), ("index", ASCENDING)], unique=True)
+
+
+def sentence_docs(corpus_id, items: Sequence[dict], gen: Optional[ObjectId] = None) -> List[dict]:
+    """Build sentence documents for a corpus document from sentence items (process flags reset)."""
+    out: List[dict] = []
+    for i, item in enumerate(items):
+        d = {k: v for k, v in dict(item or {}).items() if k not in ("_id", "corpus_id", "gen", "gen_size", "index", "process")}
+        d["corpus_id"] = corpus_id
+        if gen is not None:
+            d["gen"] = gen
+            d["gen_size"] = len(items)
+        d["index"] = i
+        out.append(d)
+    return out
+
+
+def _current_generation(docs: List[dict]) -> List[dict]:
+    """Keep the newest complete generation of one corpus document's sentence docs."""
+    by_gen: Dict[Any, List[dict]] = {}
+    for d in docs:
+        by_gen.setdefault(d.get("gen"), []).append(d)
+    if len(by_gen) <= 1:
+        return docs
+    # Documents written before generations (gen missing) count as the oldest complete one
+    for gen in sorted(by_gen, key=lambda g: (g is not None, g), reverse=True):
+        group = by_gen[gen]
+        if gen is None or len(group) == group[0].get("gen_size"):
+            return group
+    return []
+
+
+def load_sentences(col: Collection, corpus_id, projection: Optional[dict] = None) -> List[dict]:
+    """Return the sentence documents of one corpus document ordered by index."""
+    if projection is not None:
+        projection = {**projection, "gen": 1, "gen_size": 1}
+    docs = list(col.find({"corpus_id": corpus_id}, projection=projection).sort("index", ASCENDING))
+    return _current_generation(docs)
+
+
+def _drop_other_generations(col: Collection, corpus_id, gen: ObjectId) -> None:
+    col.delete_many({"corpus_id": corpus_id, "gen": {"$ne": gen}})
+
+
+def _insert_generation(col: Collection, docs: List[dict]) -> None:
+    if not docs:
+        return
+    res = col.insert_many(docs, ordered=True)
+    if len(res.inserted_ids) != len(docs):
+        raise RuntimeError(f"inserted {len(res.inserted_ids)} of {len(docs)} sentence documents")
+
+
+def replace_sentences(col: Collection, corpus_id, items: Sequence[dict]) -> int:
+    """Replace all sentence documents of `corpus_id` with `items`. Returns number inserted.
+
+    The new generation is inserted before the previous one is deleted, so a failure in between
+    leaves the old sentences readable instead of none.
+    """
+    gen = ObjectId()
+    docs = sentence_docs(corpus_id, items, gen)
+    try:
+        _insert_generation(col, docs)
+    except Exception:
+        col.delete_many({"corpus_id": corpus_id, "gen": gen})
+        raise
+    _drop_other_generations(col, corpus_id, gen)
+    return len(docs)
+
+
+def explode_corpus_sentences(
+    corpus_col: Collection,
+    sent_col: Collection,
+    *,
+    limit: Optional[int] = None,
+    batch: int = 500,
+    unset: bool = False,
+    verbose: bool = False,
+) -> int:
+    """Copy embedded corpus.sentences arrays into the sentences collection.
+
+    Existing per-document state (tokens, type/pos, embedding_id) is kept; per-sentence process
+    flags are seeded from the corpus document's flags. With unset=True the embedded array is
+    removed afterwards, only for documents whose sentence inserts were all acknowledged.
+    Returns number of corpus documents exploded.
+    """
+    ensure_sentence_indexes(sent_col)
+    filt = {"sentences": {"$exists": True, "$ne": []}}
+    cursor = iter_id_docs(corpus_col, filt, projection={"sentences": 1, "process": 1}, limit=limit)
+
+    pending: List[Tuple[Any, ObjectId]] = []
+    sent_ops: List[InsertOne] = []
+    exploded = 0
+    inserted = 0
+
+    def flush() -> None:
+        nonlocal sent_ops, pending, inserted, exploded
+        if sent_ops:
+            got = sent_col.bulk_write(sent_ops, ordered=False).inserted_count
+            if got != len(sent_ops):
+                raise RuntimeError(f"inserted {got} of {len(sent_ops)} sentence documents; embedded arrays kept")
+            inserted += got
+        # Second pass over the confirmed documents: drop older generations, then the embedded array
+        for doc_id, gen in pending:
+            _drop_other_generations(sent_col, doc_id, gen)
+            if unset:
+                corpus_col.update_one({"_id": doc_id}, {"$unset": {"sentences": ""}, "$currentDate": {"updated_at": True}})
+        exploded += len(pending)
+        sent_ops = []
+        pending = []
+
+    try:
+        for doc in cursor:
+            doc_id = doc["_id"]
+            process = dict(doc.get("process") or {})
+            gen = ObjectId()
+            for d in sentence_docs(doc_id, doc.get("sentences") or [], gen):
+                d["process"] = dict(process)
+                sent_ops.append(InsertOne(d))
+            pending.append((doc_id, gen))
+            if len(sent_ops) >= batch:
+                flush()
+        flush()
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+    if verbose:
+        print(f"explode-sentences summary -> corpus_docs: {exploded}, sentence_docs: {inserted}")
+    return exploded
+
+
+# -------------------------------
+# Stage runners
+# -------------------------------
+
+
+def _missing_flag(flag: str) -> Dict:
+    return {"$or": [{f"process.{flag}": {"$exists": False}}, {f"process.{flag}": False}]}
+
+
+def run_sentence_stage(
+    col: Collection,
+    flag: str,
+    compute: Callable[[List[dict]], List[Optional[dict]]],
+    *,
+    base: Optional[Dict] = None,
+    projection: Optional[dict] = None,
+    limit: Optional[int] = None,
+    ids: Optional[list] = None,
+    batch: int = 200,
+    missing_only: bool = True,
+    from_start: bool = False,
+    lease: Optional[Lease] = None,
+    options: Optional[dict] = None,
+    verbose: bool = False,
+) -> int:
+    """Run a stage over sentence documents, one batch at a time.
+
+    `compute(docs)` returns, per sentence doc, a dict of fields to $set (or None to only set the
+    flag). Every processed sentence gets process.<flag>=true. `ids` restricts to corpus ids.
+    Returns number of modified sentence documents.
+    """
+    filt: Dict = dict(base or {})
+    if missing_only:
+        filt = {"$and": [filt, _missing_flag(flag)]} if filt else _missing_flag(flag)
+    if ids is not None:
+        filt = {"$and": [filt, {"corpus_id": {"$in": list(ids)}}]}
+    proj = dict(projection) if projection else None
+    if proj is not None:
+        proj.update({"corpus_id": 1, "index": 1})
+    stats = run_stage(
+        col, filt, flag,
+        compute_chunk=compute, projection=proj, limit=limit, batch=batch, verbose=verbose,
+        checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease, options=options,
+    )
+    modified = stats.modified
+    processed = stats.processed
+    changed = stats.changed
+    if verbose:
+        print(f"{flag} (sentences) summary -> processed: {processed}, changed_content: {changed}, modified_sentences: {modified}")
+    return modified
+
+
+def per_sentence(fn: Callable[[dict], Optional[dict]]) -> Callable[[List[dict]], List[Optional[dict]]]:
+    """Adapt a single-sentence compute function to run_sentence_stage's batch interface."""
+    return lambda docs: [fn(d) for d in docs]
+
+
+def run_corpus_restructure(
+    corpus_col: Collection,
+    sent_col: Collection,
+    flag: str,
+    transform: Callable[[List[dict]], Optional[List[dict]]],
+    *,
+    limit: Optional[int] = None,
+    ids: Optional[list] = None,
+    missing_only: bool = True,
+    options: Optional[dict] = None,
+    verbose: bool = False,
+) -> int:
+    """Run a stage that rewrites a document's whole sentence list (split/merge).
+
+    `transform(items)` gets the ordered sentence docs and returns new items or None when unchanged.
+    Changed documents get their sentence docs replaced (per-sentence flags start over).
+    Stamps process.<flag> (see stages.py, `options` as in run_stage) on the corpus document. Returns number of modified corpus documents.
+    """
+    ensure_sentence_indexes(sent_col)
+    filt: Dict = {"process.sentence_split": {"$nin": [None, False]}}
+    if missing_only:
+        filt = {"$and": [filt, _missing_flag(flag)]}
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    cursor = iter_id_docs(corpus_col, filt, projection={"process": 1}, limit=limit)
+
+    modified = 0
+    changed = 0
+    try:
+        for doc in cursor:
+            doc_id = doc["_id"]
+            items = load_sentences(sent_col, doc_id)
+            new_items = transform(items)
+            if new_items is not None:
+                replace_sentences(sent_col, doc_id, new_items)
+                changed += 1
+            res = corpus_col.update_one(
+                {"_id": doc_id},
+                {"$set": {f"process.{flag}": stage_stamp(flag, doc, options=options)}, "$currentDate": {"updated_at": True}},
+            )
+            modified += res.modified_count
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+    if verbose:
+        print(f"{flag} (sentences) summary -> changed_content: {changed}, modified_docs: {modified}")
+    return modified
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from typing import Dict, List
+import time
+from functools import lru_cache, partial
+from typing import Dict, List, Tuple
 
 from pymongo.collection import Collection
-from pymongo import UpdateOne
+
+from .leases import Lease
+from .stage_runner import checkpoint_mode, run_stage
 
 try:
     from pythainlp.tokenize import sent_tokenize
@@ -12,19 +16,45 @@ except Exception as e:
     raise
 
 
-def retokenize_sentences_array(sentences: List[dict]) -> List[dict] | None:
+# Per-process cache of sent_tokenize results. Wiki sentences repeat a lot (boilerplate lines,
+# list items, captions), and each pool worker keeps its own copy.
+CACHE_SIZE = 100_000
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _split_text(text: str) -> Tuple[str, ...]:
+    return tuple(s.strip() for s in (sent_tokenize(text) or []) if s and s.strip())
+
+
+def split_texts(texts: List[str], *, min_len: int = 0) -> Dict[str, Tuple[str, ...]]:
+    """Return {text: sub-sentences} for the distinct texts of one document.
+
+    Texts shorter than `min_len` characters are not sent to the tokenizer (they map to
+    themselves); the rest go through the cached sent_tokenize once per distinct text.
+    """
+    out: Dict[str, Tuple[str, ...]] = {}
+    for text in texts:
+        if text in out:
+            continue
+        out[text] = (text,) if len(text) < min_len else _split_text(text)
+    return out
+
+
+def retokenize_sentences_array(sentences: List[dict], *, min_len: int = 0) -> List[dict] | None:
     """Return a new sentences array after Thai sentence tokenization.
 
     - Input is the existing sentences array (list of {text, created_at, ...}).
     - For each item, split its text by PyThaiNLP sent_tokenize and expand in place.
+    - Items shorter than `min_len` characters are kept as-is without tokenizing.
     - Output items only contain {text} (no created_at).
     - Returns None if no changes were made (i.e., output equals input).
     """
+    texts = [str(item.get("text", "")) for item in sentences]
+    splits = split_texts(texts, min_len=min_len)
     out: List[dict] = []
     changed = False
-    for item in sentences:
-        text = str(item.get("text", ""))
-        subs = [s.strip() for s in (sent_tokenize(text) or []) if s and s.strip()]
+    for text in texts:
+        subs = splits[text]
         if subs and not (len(subs) == 1 and subs[0] == text):
             changed = True
         if not subs:
@@ -36,16 +66,29 @@ def retokenize_sentences_array(sentences: List[dict]) -> List[dict] | None:
     return out if changed else None
 
 
+def _sentence_token_fields(doc: dict, *, min_len: int = 0) -> dict | None:
+    new_sentences = retokenize_sentences_array(list(doc.get("sentences") or []), min_len=min_len)
+    return None if new_sentences is None else {"sentences": new_sentences}
+
+
 def update_corpus_sentence_tokenization(
     col: Collection,
     *,
     limit: int | None = None,
+    ids: list | None = None,
     batch: int = 200,
     missing_only: bool = True,
+    from_start: bool = False,
+    lease: Lease | None = None,
     verbose: bool = False,
+    workers: int = 0,
+    min_len: int = 0,
 ) -> int:
     """Re-tokenize existing sentences using PyThaiNLP and set process.sentence_token=true.
 
+    workers > 0 tokenizes on a process pool (see stage_runner.run_stage). Sentence items
+    shorter than `min_len` characters are kept without calling the tokenizer.
+
     Returns number of documents modified.
     """
     # Only process documents that have sentences and not yet processed by sentence_token
@@ -70,46 +113,48 @@ def update_corpus_sentence_tokenization(
         candidates = None
 
     proj = {"sentences": 1}
-    cursor = col.find(filt, projection=proj, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
-
-    ops: list[UpdateOne] = []
-    modified_docs = 0
-    changed_content = 0
-    flagged_only = 0
-    try:
-        for doc in cursor:
-            doc_id = doc.get("_id")
-            sentences = list(doc.get("sentences") or [])
-            new_sentences = retokenize_sentences_array(sentences)
-            if new_sentences is None:
-                # No change in content; still mark the process flag
-                ops.append(UpdateOne({"_id": doc_id}, {"$set": {"process.sentence_token": True}}))
-                flagged_only += 1
-            else:
-                ops.append(
-                    UpdateOne(
-                        {"_id": doc_id},
-                        {"$set": {"sentences": new_sentences, "process.sentence_token": True}},
-                    )
-                )
-                changed_content += 1
-            if len(ops) >= batch:
-                res = col.bulk_write(ops, ordered=False)
-                modified_docs += res.modified_count
-                ops = []
-        if ops:
-            res = col.bulk_write(ops, ordered=False)
-            modified_docs += res.modified_count
-    finally:
-        try:
-            cursor.close()
-        except Exception:
-            pass
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    t0 = time.perf_counter()
+    stats = run_stage(
+        col, filt, "sentence_token",
+        compute=partial(_sentence_token_fields, min_len=min_len), projection=proj, limit=limit, batch=batch,
+        workers=workers, processes=True, verbose=verbose,
+        checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+        options={"min_len": min_len},
+    )
+    modified_docs = stats.modified
+    changed_content = stats.changed
+    flagged_only = stats.flagged_only
+    elapsed = time.perf_counter() - t0
     if verbose:
         # Note: modified_docs may be less than changed_content+flagged_only if some docs already matched set values
         print(
             f"sentence-token summary -> changed_content: {changed_content}, flagged_only: {flagged_only}, modified_docs: {modified_docs}"
         )
+        rate = stats.processed / elapsed if elapsed > 0 else 0.0
+        print(f"sentence-token throughput -> docs: {stats.processed}, elapsed: {elapsed:.1f} s, docs/s: {rate:.1f}")
+        if workers <= 0:
+            # The cache lives in each worker process; only the in-process one is visible here
+            info = _split_text.cache_info()
+            print(f"sentence-token cache -> hits: {info.hits}, misses: {info.misses}, size: {info.currsize}/{info.maxsize}")
     return modified_docs
+
+
+def update_sentences_sentence_tokenization(
+    col: Collection,
+    sent_col: Collection,
+    *,
+    limit: int | None = None,
+    ids: list | None = None,
+    missing_only: bool = True,
+    verbose: bool = False,
+    min_len: int = 0,
+) -> int:
+    """Sentences-schema variant: re-tokenize a document's sentence docs and replace them when split."""
+    from .sentence_store import run_corpus_restructure
+
+    return run_corpus_restructure(
+        col, sent_col, "sentence_token", partial(retokenize_sentences_array, min_len=min_len),
+        limit=limit, ids=ids, missing_only=missing_only, options={"min_len": min_len}, verbose=verbose,
+    )
@@ -0,0 +1,474 @@
+from __future__ import annotations
+
+import datetime as dt
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import bson
+from pymongo import ASCENDING, UpdateOne
+from pymongo.collection import Collection
+
+from .stages import stage_projection, stage_stamp
+
+if TYPE_CHECKING:
+    from .leases import Lease
+
+
+# -------------------------------
+# Overlapped stage driver
+# -------------------------------
+# reader thread --(chunks of docs)--> compute (caller thread, optional pool) --(ops)--> writer thread
+# Both queues are bounded, so a slow writer stalls compute and a slow compute stalls the reader
+# instead of buffering the whole collection in memory.
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    changed: int = 0
+    modified: int = 0
+    flushes: int = 0
+    bytes_written: int = 0
+
+    @property
+    def flagged_only(self) -> int:
+        return self.processed - self.changed
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def _put(q: "queue.Queue", item, stop: threading.Event) -> bool:
+    # Blocking put that gives up once the pipeline is being torn down
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.2)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+# -------------------------------
+# _id range paging + checkpoints
+# -------------------------------
+# Instead of one long-lived cursor (no_cursor_timeout), documents are read in ascending _id
+# pages: {$and: [filt, {_id: {$gt: <last seen>}}]} sorted by _id, which walks the _id index.
+# The last committed _id of a stage run is kept in `stage_state`, keyed by
+# <collection>:<stage>:<mode> where mode is "missing" (default runs) or "all" (--all).
+
+STAGE_STATE_COLLECTION = "stage_state"
+
+
+def iter_id_pages(
+    col: Collection,
+    filt: Dict,
+    *,
+    projection: Optional[dict] = None,
+    page: int = 500,
+    limit: Optional[int] = None,
+    start_after: Any = None,
+) -> Iterator[List[dict]]:
+    """Yield pages of documents matching `filt` in ascending _id order (each page is one short query)."""
+    last = start_after
+    remaining = limit
+    page = max(1, page)
+    while remaining is None or remaining > 0:
+        q = filt if last is None else {"$and": [filt, {"_id": {"$gt": last}}]}
+        n = page if remaining is None else min(page, remaining)
+        docs = list(col.find(q, projection=projection).sort("_id", ASCENDING).limit(n))
+        if not docs:
+            return
+        yield docs
+        last = docs[-1]["_id"]
+        if remaining is not None:
+            remaining -= len(docs)
+        if len(docs) < n:
+            return
+
+
+def iter_id_docs(
+    col: Collection,
+    filt: Dict,
+    *,
+    projection: Optional[dict] = None,
+    page: int = 500,
+    limit: Optional[int] = None,
+) -> Iterator[dict]:
+    """Document-at-a-time view of iter_id_pages (drop-in for a plain find cursor)."""
+    for docs in iter_id_pages(col, filt, projection=projection, page=page, limit=limit):
+        yield from docs
+
+
+def checkpoint_mode(missing_only: bool, ids: Optional[list] = None) -> Optional[str]:
+    """Checkpoint mode for a stage run; None (no checkpoint) when restricted to explicit ids."""
+    if ids is not None:
+        return None
+    return "missing" if missing_only else "all"
+
+
+def _checkpoint_key(col: Collection, flag: str, mode: str) -> str:
+    return f"{col.name}:{flag}:{mode}"
+
+
+def load_checkpoint(col: Collection, flag: str, mode: str) -> Any:
+    doc = col.database[STAGE_STATE_COLLECTION].find_one({"_id": _checkpoint_key(col, flag, mode)})
+    return (doc or {}).get("last_id")
+
+
+def save_checkpoint(col: Collection, flag: str, mode: str, last_id: Any) -> None:
+    col.database[STAGE_STATE_COLLECTION].update_one(
+        {"_id": _checkpoint_key(col, flag, mode)},
+        {"$set": {
+            "collection": col.name,
+            "stage": flag,
+            "mode": mode,
+            "last_id": last_id,
+            "updated_at": dt.datetime.utcnow(),
+        }},
+        upsert=True,
+    )
+
+
+def clear_checkpoint(col: Collection, flag: str, mode: str) -> None:
+    col.database[STAGE_STATE_COLLECTION].delete_one({"_id": _checkpoint_key(col, flag, mode)})
+
+
+def _reader(pages: Iterator[List[dict]], out_q: "queue.Queue", stop: threading.Event, state: Dict) -> None:
+    try:
+        for chunk in pages:
+            if stop.is_set() or not _put(out_q, chunk, stop):
+                return
+        state["exhausted"] = True
+        _put(out_q, _DONE, stop)
+    except BaseException as e:  # surfaced by the caller thread
+        _put(out_q, _Failure(e), stop)
+
+
+# Flush sizing. Mongo caps a message at 48 MB; stay well below it.
+_MIN_FLUSH_BYTES = 64 * 1024
+_MAX_FLUSH_BYTES = 16 * 1024 * 1024
+_OP_OVERHEAD = 32  # per-op envelope (q/u keys, array index)
+
+
+def _env_number(name: str, default: float) -> float:
+    v = (os.getenv(name) or "").strip()
+    try:
+        return float(v) if v else default
+    except ValueError:
+        return default
+
+
+class FlushPolicy:
+    """Decide when the writer flushes, by estimated BSON bytes and observed latency.
+
+    The byte budget starts at `target_bytes`. With `target_ms` set, every flush updates it
+    from the observed write throughput so that one flush takes about `target_ms`.
+    Defaults come from STAGE_FLUSH_BYTES (4 MB) and STAGE_FLUSH_MS (500; 0 disables adapting).
+    """
+
+    def __init__(self, target_bytes: Optional[int] = None, target_ms: Optional[float] = None):
+        if target_bytes is None:
+            target_bytes = int(_env_number("STAGE_FLUSH_BYTES", 4 * 1024 * 1024))
+        if target_ms is None:
+            target_ms = _env_number("STAGE_FLUSH_MS", 500.0)
+        self.budget = min(max(int(target_bytes), _MIN_FLUSH_BYTES), _MAX_FLUSH_BYTES)
+        self.target_ms = target_ms if target_ms and target_ms > 0 else None
+
+    def observe(self, nbytes: int, seconds: float) -> None:
+        if self.target_ms is None or nbytes <= 0 or seconds <= 0:
+            return
+        desired = nbytes / seconds * (self.target_ms / 1000.0)
+        # Smooth so a single slow flush does not collapse the budget
+        budget = 0.5 * self.budget + 0.5 * desired
+        self.budget = int(min(max(budget, _MIN_FLUSH_BYTES), _MAX_FLUSH_BYTES))
+
+
+def estimate_op_bytes(filt: dict, update: dict) -> int:
+    """Exact encoded size of an update op (a full bson.encode; see OpSizeEstimator)."""
+    return len(bson.encode(filt)) + len(bson.encode(update)) + _OP_OVERHEAD
+
+
+class OpSizeEstimator:
+    """Op sizes for flush sizing without encoding every flag-only op twice.
+
+    Ops that $set stage fields vary by orders of magnitude (a thai_clock flag next to a
+    tokenized document), so they are always encoded and flushes hold their byte budget.
+    Flag-only ops are nearly constant in size: only the first `warmup` and one in `every`
+    afterwards are encoded, the rest get the running mean (pymongo encodes each op again on
+    write, so skipping those encodes halves the writer's encoding work on flag-heavy runs).
+    """
+
+    def __init__(self, every: int = 16, warmup: int = 8):
+        self.every = max(1, every)
+        self.warmup = warmup
+        self.ops = 0
+        self.encoded = 0
+        self._sum = 0
+        self._count = 0
+
+    def estimate(self, filt: dict, update: dict, *, changed: bool) -> int:
+        self.ops += 1
+        if changed:
+            self.encoded += 1
+            return estimate_op_bytes(filt, update)
+        if self._count < self.warmup or self.ops % self.every == 0:
+            size = estimate_op_bytes(filt, update)
+            self._sum += size
+            self._count += 1
+            self.encoded += 1
+            return size
+        return self._sum // self._count
+
+
+def _writer(
+    col: Collection,
+    in_q: "queue.Queue",
+    stats: StageStats,
+    errors: List[BaseException],
+    stop: threading.Event,
+    policy: FlushPolicy,
+    label: str,
+    verbose: bool,
+    on_commit: Optional[Callable[[Any], None]],
+) -> None:
+    pending: List[UpdateOne] = []
+    pending_bytes = 0
+    pending_last_id: Any = None
+
+    def flush() -> None:
+        nonlocal pending, pending_bytes
+        if not pending or errors:
+            pending, pending_bytes = [], 0
+            return
+        t0 = time.perf_counter()
+        try:
+            res = col.bulk_write(pending, ordered=False)
+            # Flushes are sequential and ops arrive in _id order, so everything up to
+            # the last op of this flush is committed
+            if on_commit is not None:
+                on_commit(pending_last_id)
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+            pending, pending_bytes = [], 0
+            return
+        elapsed = time.perf_counter() - t0
+        stats.modified += res.modified_count
+        stats.flushes += 1
+        stats.bytes_written += pending_bytes
+        policy.observe(pending_bytes, elapsed)
+        if verbose:
+            print(
+                f"{label} flush -> ops: {len(pending)}, bytes: {pending_bytes / 1024:.1f} KB, "
+                f"latency: {elapsed * 1000:.0f} ms, next budget: {policy.budget / 1024:.0f} KB"
+            )
+        pending, pending_bytes = [], 0
+
+    while True:
+        item = in_q.get()
+        if item is _DONE:
+            flush()
+            return
+        if errors:
+            continue  # drain so the producer never blocks on a dead writer
+        for op, nbytes, doc_id in item:
+            if pending and pending_bytes + nbytes > policy.budget:
+                flush()
+            pending.append(op)
+            pending_bytes += nbytes
+            pending_last_id = doc_id
+        # Nothing else queued: write now instead of holding ops back.
+        # When compute outruns the writer, queued chunks coalesce into larger flushes.
+        if in_q.empty():
+            flush()
+
+
+def worker_context() -> multiprocessing.context.BaseContext:
+    """Start method for process pools created after the MongoClient exists.
+
+    Pools start lazily on the first task, by which time the client's monitor threads and the
+    reader/writer threads are running; forking then can copy a held lock into the child.
+    forkserver (POSIX) and spawn start workers from a clean interpreter instead.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def make_executor(
+    workers: int,
+    *,
+    processes: bool = False,
+    fork: bool = False,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+) -> Optional[Executor]:
+    """Return a pool for the compute step, or None to compute inline (workers <= 0).
+
+    fork=True starts process workers with fork, so state loaded before the first task (models)
+    is inherited copy-on-write instead of pickled or reloaded (POSIX only); the caller must
+    start the workers before any thread exists (see tokenize.prepare_tokenize). Otherwise
+    workers use worker_context(), so compute functions and their arguments must pickle.
+    """
+    if workers <= 0:
+        return None
+    if processes:
+        ctx = multiprocessing.get_context("fork") if fork else worker_context()
+        return ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=initializer, initargs=initargs)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def run_stage(
+    col: Collection,
+    filt: Dict,
+    flag: str,
+    *,
+    compute: Optional[Callable[[dict], Optional[dict]]] = None,
+    compute_chunk: Optional[Callable[[List[dict]], List[Optional[dict]]]] = None,
+    projection: Optional[dict] = None,
+    limit: Optional[int] = None,
+    batch: int = 200,
+    workers: int = 0,
+    processes: bool = False,
+    prefetch: int = 2,
+    flush_bytes: Optional[int] = None,
+    flush_ms: Optional[float] = None,
+    checkpoint: Optional[str] = None,
+    from_start: bool = False,
+    lease: Optional["Lease"] = None,
+    options: Optional[dict] = None,
+    verbose: bool = False,
+) -> StageStats:
+    """Run a stage over documents matching `filt` with overlapped read / compute / write.
+
+    - `compute(doc)` returns extra fields to $set (None or {} = only set the flag). With
+      workers > 0 it runs on a thread pool (or a process pool with processes=True, in which
+      case it must be picklable). Results keep cursor order.
+    - `compute_chunk(docs)` is the alternative for stages that work on a whole chunk at once.
+    - Each document gets {$set: {..fields, process.<flag>: <stamp>}, $currentDate: {updated_at}},
+      where the stamp is the versioned {v, h} entry from stages.py (the projection is widened
+      with `process` and the stage's source fields for it). `options` are the stage options
+      that change its output; they go into the stamp (see stages.py).
+    - `prefetch` bounds both queues (in chunks of `batch` documents).
+    - Writes are flushed by estimated BSON size, not by `batch` (see FlushPolicy);
+      verbose prints bytes/ops/latency per flush.
+    - Documents are read in ascending _id pages. With `checkpoint` ("missing"/"all", see
+      checkpoint_mode) the last committed _id is saved in stage_state after every flush and
+      the next run resumes after it; the checkpoint is cleared once a run reaches the end.
+      from_start=True discards it first.
+    - With `lease` (see leases.py) documents are claimed in chunks instead, so several workers
+      can run the same stage; writes only land while the lease is still ours and mark it done,
+      and documents done since the run started are not claimed again (so --all ends).
+      Checkpoints are not used in lease mode.
+    """
+    if (compute is None) == (compute_chunk is None):
+        raise ValueError("pass exactly one of compute / compute_chunk")
+    if projection is not None:
+        projection = {**projection, **stage_projection(flag)}
+    heartbeat = None
+    if lease is not None:
+        from .leases import Heartbeat, claim_pages, lease_done_update, lease_field
+
+        checkpoint = None
+        heartbeat = Heartbeat(col, flag, lease).start()
+    start_after = None
+    if checkpoint is not None:
+        if from_start:
+            clear_checkpoint(col, flag, checkpoint)
+        start_after = load_checkpoint(col, flag, checkpoint)
+        if verbose and start_after is not None:
+            print(f"{flag}: resuming after _id {start_after} ({checkpoint})")
+
+    def on_commit(last_id: Any) -> None:
+        if checkpoint is not None:
+            save_checkpoint(col, flag, checkpoint, last_id)
+
+    if lease is not None:
+        pages = claim_pages(col, filt, flag, lease, projection=projection, page=batch, limit=limit)
+    else:
+        pages = iter_id_pages(col, filt, projection=projection, page=batch, limit=limit, start_after=start_after)
+
+    stats = StageStats()
+    errors: List[BaseException] = []
+    stop = threading.Event()
+    read_q: "queue.Queue" = queue.Queue(maxsize=max(1, prefetch))
+    write_q: "queue.Queue" = queue.Queue(maxsize=max(1, prefetch))
+    reader_state: Dict = {"exhausted": False}
+    reader = threading.Thread(target=_reader, args=(pages, read_q, stop, reader_state), name=f"{flag}-reader", daemon=True)
+    policy = FlushPolicy(flush_bytes, flush_ms)
+    sizer = OpSizeEstimator()
+    writer = threading.Thread(
+        target=_writer,
+        args=(col, write_q, stats, errors, stop, policy, flag, verbose, on_commit),
+        name=f"{flag}-writer",
+        daemon=True,
+    )
+    executor = make_executor(workers, processes=processes) if compute is not None else None
+    reader.start()
+    writer.start()
+    try:
+        while True:
+            item = read_q.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Failure):
+                raise item.exc
+            if errors:
+                break
+            if compute_chunk is not None:
+                results = compute_chunk(item)
+            elif executor is not None:
+                results = list(executor.map(compute, item))
+            else:
+                results = [compute(doc) for doc in item]
+            ops: List[Tuple[UpdateOne, int, Any]] = []
+            for doc, fields in zip(item, results):
+                update = {f"process.{flag}": stage_stamp(flag, doc, fields, options)}
+                if fields:
+                    update = {**fields, **update}
+                    stats.changed += 1
+                q = {"_id": doc["_id"]}
+                u = {"$set": update, "$currentDate": {"updated_at": True}}
+                if lease is not None:
+                    q[f"{lease_field(flag)}.owner"] = lease.owner
+                    done = lease_done_update(flag)
+                    u["$unset"] = done["$unset"]
+                    u["$currentDate"] = {**u["$currentDate"], **done["$currentDate"]}
+                ops.append((UpdateOne(q, u), sizer.estimate(q, u, changed=bool(fields)), doc["_id"]))
+            stats.processed += len(item)
+            if ops:
+                write_q.put(ops)
+    finally:
+        stop.set()
+        # Unblock and stop the reader, then let the writer finish what was queued
+        while reader.is_alive():
+            try:
+                read_q.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        write_q.put(_DONE)
+        writer.join()
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if heartbeat is not None:
+            from .leases import release_leases
+
+            heartbeat.stop()
+            release_leases(col, flag, lease.owner)
+    if errors:
+        raise errors[0]
+    # A run cut short by `limit` keeps its checkpoint; one that reached the end starts over next time
+    reached_end = reader_state["exhausted"] and (limit is None or stats.processed < limit)
+    if checkpoint is not None and reached_end:
+        clear_checkpoint(col, flag, checkpoint)
+    return stats
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+
+
+# -------------------------------
+# Stage DAG + versioned process flags
+# -------------------------------
+# A finished stage stores process.<stage> = {"v": <version>, "h": <input hash>} instead of true.
+# - v is the stage's code/config version below; bump it when a stage's output would change.
+# - h digests what the stage consumed: the (v, h) entries of its upstream stages, plus the
+#   document data it reads for root stages (hashed after the stage's own write, so a stage
+#   that rewrites its input in place, like thai_clock, still matches on the next check).
+# - o (optional) digests the options the stage ran with when they change its output (e.g.
+#   connectors' min_len). It is part of the entry downstream stages hash, so rerunning a stage
+#   with other options invalidates everything downstream even though its version is unchanged.
+# A stage is stale when its v differs from the current version or its h no longer matches the
+# current upstream entries; staleness propagates to every downstream stage. Flags stay truthy,
+# so {"process.<stage>": {"$exists": False}} / False filters keep working; plain `true` flags
+# written before versioning are reported as "legacy".
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str  # process.<name>
+    version: int
+    deps: Tuple[str, ...] = ()
+    source: Optional[Callable[[dict], Any]] = None  # root stages: document data the stage reads
+    source_projection: Optional[dict] = None
+
+
+def _raw_content(doc: dict) -> Any:
+    return (doc.get("raw") or {}).get("content")
+
+
+# Pipeline order (same as scripts/pipeline.ps1); deps always point to earlier entries
+STAGES: List[Stage] = [
+    Stage("thai_clock", 1, source=_raw_content, source_projection={"raw.content": 1}),
+    Stage("sentence_split", 1, ("thai_clock",)),
+    Stage("sentence_token", 1, ("sentence_split",)),
+    Stage("num_tag", 1, ("sentence_token",)),
+    Stage("connector", 1, ("num_tag",)),
+    Stage("abbreviation", 2, ("connector",)),  # 2: dotted surfaces keep vowels/tone marks (มี.ค. no longer seen as ค.)
+    Stage("tokenize", 4, ("abbreviation",)),  # 2: long sentences parsed in chunks, 3: monotonic offsets, 4: no offsets for unmatched tokens
+    Stage("sentence_heads", 1, ("tokenize",)),
+    Stage("word_pattern", 1, ("sentence_heads",)),
+    Stage("embeddings", 1, ("sentence_heads",)),
+    Stage("wordvec", 1, ("tokenize",)),  # set by train-wordvec (no watcher runner)
+]
+
+STAGE_INDEX: Dict[str, Stage] = {s.name: s for s in STAGES}
+
+
+def _digest(obj: Any) -> str:
+    raw = json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def _entry(value: Any) -> Any:
+    # Upstream flag as it enters a hash: [v, h(, o)] for versioned flags, True for legacy, None if unset
+    if isinstance(value, dict):
+        entry = [value.get("v"), value.get("h")]
+        if value.get("o") is not None:
+            entry.append(value["o"])
+        return entry
+    return True if value else None
+
+
+def options_digest(options: Optional[dict]) -> Optional[str]:
+    """Digest of output-affecting stage options for the stamp's `o` (None when there are none)."""
+    return _digest(options) if options else None
+
+
+def stage_projection(name: str) -> dict:
+    """Fields run_stage must read in addition to the stage's own projection to stamp its flag."""
+    st = STAGE_INDEX.get(name)
+    proj = {"process": 1}
+    if st is not None and st.source_projection:
+        proj.update(st.source_projection)
+    return proj
+
+
+def _with_fields(doc: dict, fields: Optional[dict]) -> dict:
+    """Return `doc` as it looks after {$set: fields} (dotted keys supported, doc left untouched)."""
+    if not fields:
+        return doc
+    out = dict(doc)
+    for key, value in fields.items():
+        parts = key.split(".")
+        cur = out
+        for p in parts[:-1]:
+            nxt = cur.get(p)
+            nxt = dict(nxt) if isinstance(nxt, dict) else {}
+            cur[p] = nxt
+            cur = nxt
+        cur[parts[-1]] = value
+    return out
+
+
+def input_hash(st: Stage, doc: dict) -> str:
+    process = doc.get("process") or {}
+    parts: List[Any] = [[d, _entry(process.get(d))] for d in st.deps]
+    if st.source is not None:
+        parts.append(st.source(doc))
+    return _digest(parts)
+
+
+def stage_stamp(name: str, doc: dict, fields: Optional[dict] = None, options: Optional[dict] = None) -> Any:
+    """Value for process.<name> after the stage wrote `fields` to `doc` (true for unknown stages).
+
+    `options` are the stage options that change its output; they are stamped as `o`.
+    """
+    st = STAGE_INDEX.get(name)
+    if st is None:
+        return True
+    stamp = {"v": st.version, "h": input_hash(st, _with_fields(doc, fields))}
+    o = options_digest(options)
+    if o is not None:
+        stamp["o"] = o
+    return stamp
+
+
+def server_stamp(name: str) -> Any:
+    """Value for process.<name> written by a server-side update (see pushdown.py).
+
+    The server cannot compute the input hash, so h is null: plan checks the version only and
+    downstream stages hash the entry as-is.
+    """
+    st = STAGE_INDEX.get(name)
+    if st is None:
+        return True
+    return {"$literal": {"v": st.version, "h": None}}
+
+
+# -------------------------------
+# Planning
+# -------------------------------
+
+MISSING = "missing"
+LEGACY = "legacy"
+VERSION = "version"
+INPUT = "input"
+UPSTREAM = "upstream"
+REASONS = (MISSING, LEGACY, VERSION, INPUT, UPSTREAM)
+
+
+def plan_document(doc: dict, *, include_legacy: bool = False) -> Dict[str, str]:
+    """Return {stage: reason} for every stage the document needs (re)run, in pipeline order.
+
+    Reasons: missing (never ran), legacy (unversioned true flag, only with include_legacy),
+    version (code/config changed), input (upstream entries/data changed since it ran; skipped
+    for server-side stamps, which carry no hash), upstream (an upstream stage needs work first).
+    """
+    process = doc.get("process") or {}
+    need: Dict[str, str] = {}
+    for st in STAGES:
+        value = process.get(st.name)
+        if not value:
+            need[st.name] = MISSING
+        elif any(d in need for d in st.deps):
+            need[st.name] = UPSTREAM
+        elif not isinstance(value, dict):
+            if include_legacy:
+                need[st.name] = LEGACY
+        else:
+            reason = _own_reason(st, value, doc)
+            if reason is not None:
+                need[st.name] = reason
+    return need
+
+
+def _own_reason(st: Stage, value: dict, doc: dict) -> Optional[str]:
+    if value.get("v") != st.version:
+        return VERSION
+    if value.get("h") is not None and value.get("h") != input_hash(st, doc):
+        return INPUT
+    return None
+
+
+def stale_reason(name: str, doc: dict) -> Optional[str]:
+    """VERSION or INPUT when the stage's own stamp in `doc` is out of date, else None.
+
+    Unlike plan_document this ignores upstream stages that still need work, and missing or
+    legacy flags count as not stale.
+    """
+    value = (doc.get("process") or {}).get(name)
+    st = STAGE_INDEX.get(name)
+    if st is None or not isinstance(value, dict):
+        return None
+    return _own_reason(st, value, doc)
+
+
+def stale_stages(need: Dict[str, str]) -> List[str]:
+    """Stages of a plan_document result whose flags plan_corpus(apply=True) unsets.
+
+    Own staleness (legacy, version, input) always counts; an upstream stage only counts when a
+    stage it waits on is itself stale. Stages that wait only on missing stages keep their flags:
+    they were stamped against what exists now, and running the missing stage later makes them
+    stale by input on the next plan.
+    """
+    stale: List[str] = []
+    for st in STAGES:
+        reason = need.get(st.name)
+        if reason is None or reason == MISSING:
+            continue
+        if reason != UPSTREAM or any(d in stale for d in st.deps):
+            stale.append(st.name)
+    return stale
+
+
+def plan_corpus(
+    col: Collection,
+    *,
+    limit: Optional[int] = None,
+    batch: int = 500,
+    include_legacy: bool = False,
+    apply: bool = False,
+    verbose: bool = False,
+) -> Dict[str, Dict[str, int]]:
+    """Count, per stage and reason, the documents of `col` that need work.
+
+    With apply=True the flags of stale stages (see stale_stages) are unset so the normal
+    missing-only runs pick exactly those documents up again. Returns the counts.
+    """
+    from .stage_runner import iter_id_docs
+
+    proj: Dict = {"process": 1}
+    for st in STAGES:
+        proj.update(st.source_projection or {})
+    counts: Dict[str, Dict[str, int]] = {st.name: {r: 0 for r in REASONS} for st in STAGES}
+    ops: List[UpdateOne] = []
+    docs = 0
+    unset_docs = 0
+    for doc in iter_id_docs(col, {}, projection=proj, page=batch, limit=limit):
+        docs += 1
+        need = plan_document(doc, include_legacy=include_legacy)
+        for name, reason in need.items():
+            counts[name][reason] += 1
+        stale = stale_stages(need)
+        if apply and stale:
+            ops.append(UpdateOne(
+                {"_id": doc["_id"]},
+                {"$unset": {f"process.{name}": "" for name in stale}, "$currentDate": {"updated_at": True}},
+            ))
+            if len(ops) >= batch:
+                unset_docs += col.bulk_write(ops, ordered=False).modified_count
+                ops = []
+    if ops:
+        unset_docs += col.bulk_write(ops, ordered=False).modified_count
+    if verbose:
+        print(f"plan summary -> docs: {docs}" + (f", unset_docs: {unset_docs}" if apply else ""))
+    return counts
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-from .constants import EMOJI_RE, NOISE_RE, WS_RE
+import re
+
+from .constants import EMOJI_RE, NOISE_RE
+
+
+def _class_body(p: re.Pattern) -> str:
+    return p.pattern[1:-1]  # strip [...]
+
+
+# Single-pass normalizer: emojis, control characters and any whitespace run collapse
+# into one space (same result as EMOJI_RE/NOISE_RE substitution followed by WS_RE collapse).
+_NORMALIZE_RE = re.compile(f"[{_class_body(EMOJI_RE)}{_class_body(NOISE_RE)}\\s]+")
 
 
 def normalize_text(s: str) -> str:
     if not s:
         return ""
-    # Remove emojis and control characters
-    s = EMOJI_RE.sub(" ", s)
-    s = NOISE_RE.sub(" ", s)
-    # Replace newlines/tabs with space and collapse
-    s = s.replace("\t", " ").replace("\r", " ").replace("\n", " ")
-    s = WS_RE.sub(" ", s)
-    return s.strip()
+    return _NORMALIZE_RE.sub(" ", s).strip()
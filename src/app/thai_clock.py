@@ -1,21 +1,40 @@
 from __future__ import annotations
 
-import re
-from typing import Dict
+from typing import Dict, Optional
 
 from pymongo.collection import Collection
-from pymongo import UpdateOne
+
+from .leases import Lease
+from .rewrite import register, ruleset
+from .stage_runner import checkpoint_mode, run_stage
 
 
 # --- Text transformation ----------------------------------------------------
 
-_RE_COLON_TIME = re.compile(r"(?<!\d)(\d{1,2}):(\d{2})(?!\d)")
-# For HH.MM + suffix handling:
+# All rules run in one pass (see rewrite.py); together they give the same result as applying,
+# in order: HH:MM -> HH.MM, the "น." suffix, the "น" + space suffix and the whitespace collapse.
 # - Before 'น' (no nu), spaces may or may not exist
 # - Case 'น.' (with dot): do NOT require space after it
 # - Case 'น' (no dot): REQUIRE there is at least one space following 'น'
-_RE_DOT_TIME_N_DOT = re.compile(r"(?<!\d)(?P<h>\d{1,2})\.(?P<m>[0-5]\d)\s*น\.")
-_RE_DOT_TIME_N_SPACE = re.compile(r"(?<!\d)(?P<h>\d{1,2})\.(?P<m>[0-5]\d)\s*น(?= )")
+
+# HH.MM or HH:MM followed by the suffix -> HH.MM นาฬิกา
+register(
+    "thai_clock", "clock_suffix",
+    r"(?<!\d)(?P<h>\d{1,2})[:.](?P<m>[0-5]\d)\s*น(?:\.|(?= ))",
+    lambda m: f"{m.group('h')}.{m.group('m')} นาฬิกา",
+    first=r"\d",
+)
+# HH:MM -> HH.MM (strict minutes two digits; avoids touching ratios like 1:2). The minutes may
+# themselves start a suffixed dot time (1:12.30 น. -> 1.12.30 นาฬิกา), which is matched here
+# since the scan resumes after them.
+register(
+    "thai_clock", "colon_time",
+    r"(?<!\d)(?P<h>\d{1,2}):(?P<m>\d{2})(?!\d)(?:\.(?P<m2>[0-5]\d)\s*น(?:\.|(?= )))?",
+    lambda m: f"{m.group('h')}.{m.group('m')}" + (f".{m.group('m2')} นาฬิกา" if m.group("m2") else ""),
+    first=r"\d",
+)
+# Normalize duplicate spaces
+register("thai_clock", "spaces", r"\s{2,}", " ", first=r"\s")
 
 
 def transform_thai_clock_in_text(text: str) -> str:
@@ -24,7 +43,8 @@ def transform_thai_clock_in_text(text: str) -> str:
     Rules:
       - Convert HH:MM to HH.MM
       - For HH.MM followed by "น." or "น" (with optional spaces), replace that suffix with "นาฬิกา".
-      - For colon-form inputs with suffix, the first rule converts them to dot-form, then the suffix rule applies.
+      - For colon-form inputs with suffix, both happen at once.
+      - Collapse whitespace runs to one space and trim edges.
 
     Examples:
       01:00 น.  -> 01.00 นาฬิกา
@@ -35,30 +55,49 @@ def transform_thai_clock_in_text(text: str) -> str:
     """
     if not text:
         return text
+    return ruleset("thai_clock").rewrite(text).strip()
 
-    # 1) Convert HH:MM -> HH.MM (strict minutes two digits; avoids touching ratios like 1:2)
-    out = _RE_COLON_TIME.sub(lambda m: f"{m.group(1)}.{m.group(2)}", text)
 
-    # 2) Replace suffixes with the rules above
-    out = _RE_DOT_TIME_N_DOT.sub(lambda m: f"{m.group('h')}.{m.group('m')} นาฬิกา", out)
-    out = _RE_DOT_TIME_N_SPACE.sub(lambda m: f"{m.group('h')}.{m.group('m')} นาฬิกา", out)
-    # Normalize duplicate spaces and trim edges
-    out = re.sub(r"\s{2,}", " ", out).strip()
-    return out
+# --- MongoDB updater --------------------------------------------------------
 
+def _thai_clock_fields(doc: dict) -> Optional[dict]:
+    content = doc.get("raw", {}).get("content", "")
+    new_content = transform_thai_clock_in_text(str(content))
+    if new_content != content:
+        return {"raw.content": new_content}
+    return None
+
+
+def _server_unchanged() -> Dict:
+    """Filter for documents the transform would leave unchanged (flagged on the server).
+
+    transform_thai_clock_in_text is the identity unless the text has a digit followed by ':' or
+    '.' and a digit, a whitespace run, or leading/trailing whitespace.
+    """
+    from .pushdown import digit_class, regex, whitespace_class
+
+    d, ws = digit_class(), whitespace_class()
+    return {"raw.content": {"$type": "string", "$not": regex(f"{d}[:.]{d}|{ws}{ws}|^{ws}|{ws}$")}}
 
-# --- MongoDB updater --------------------------------------------------------
 
 def update_corpus_thai_clock(
     col: Collection,
     *,
     limit: int | None = None,
+    ids: list | None = None,
     batch: int = 200,
     missing_only: bool = True,
+    from_start: bool = False,
+    lease: Lease | None = None,
     verbose: bool = False,
+    workers: int = 0,
+    server: bool = False,
 ) -> int:
     """Update raw.content by normalizing Thai time expressions and set process.thai_clock=true.
 
+    workers > 0 runs the transform on a process pool (see stage_runner.run_stage).
+    server=True first flags documents with nothing to rewrite inside MongoDB (see pushdown.py).
+
     Returns number of documents modified by MongoDB.
     """
     base: Dict = {"raw.content": {"$type": "string"}}
@@ -80,46 +119,36 @@ def update_corpus_thai_clock(
             pass
 
     proj = {"raw.content": 1}
-    cursor = col.find(filt, projection=proj, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
-
-    ops: list[UpdateOne] = []
-    modified_docs = 0
-    changed_content = 0
-    flagged_only = 0
-    try:
-        for doc in cursor:
-            _id = doc.get("_id")
-            content = doc.get("raw", {}).get("content", "")
-            new_content = transform_thai_clock_in_text(str(content))
-            if new_content != content:
-                changed_content += 1
-                ops.append(
-                    UpdateOne(
-                        {"_id": _id},
-                        {"$set": {"raw.content": new_content, "process.thai_clock": True}},
-                    )
-                )
-            else:
-                flagged_only += 1
-                ops.append(UpdateOne({"_id": _id}, {"$set": {"process.thai_clock": True}}))
-
-            if len(ops) >= batch:
-                res = col.bulk_write(ops, ordered=False)
-                modified_docs += res.modified_count
-                ops = []
-        if ops:
-            res = col.bulk_write(ops, ordered=False)
-            modified_docs += res.modified_count
-    finally:
-        try:
-            cursor.close()
-        except Exception:
-            pass
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    server_modified = 0
+    if server:
+        from .pushdown import remaining_limit, server_update
+        from .stages import server_stamp
+
+        unchanged = _server_unchanged()
+        matched, server_modified = server_update(
+            col, {"$and": [filt, unchanged]}, {"process.thai_clock": server_stamp("thai_clock")}, limit=limit
+        )
+        filt = {"$and": [filt, {"$nor": [unchanged]}]}
+        limit = remaining_limit(limit, matched)
+        if verbose:
+            print(f"thai-clock server flag-only -> matched: {matched}, modified_docs: {server_modified}")
+        if limit == 0:
+            return server_modified
+    stats = run_stage(
+        col, filt, "thai_clock",
+        compute=_thai_clock_fields, projection=proj, limit=limit, batch=batch,
+        workers=workers, processes=True, verbose=verbose,
+        checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+    )
+    modified_docs = server_modified + stats.modified
 
     if verbose:
         print(
-            f"thai-clock summary -> changed_content: {changed_content}, flagged_only: {flagged_only}, modified_docs: {modified_docs}"
+            f"thai-clock summary -> changed_content: {stats.changed}, flagged_only: {stats.flagged_only}, modified_docs: {modified_docs}"
         )
+        if workers <= 0:
+            # Hit counts live in the process that ran the rules; pool workers keep their own
+            print(f"thai-clock rule hits -> {ruleset('thai_clock').hit_summary()}")
     return modified_docs
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from pymongo.collection import Collection
+
+
+# -------------------------------
+# Shared vocabularies for columnar tokens
+# -------------------------------
+# Codes are list positions, so these lists are append-only: never reorder or remove entries.
+
+UPOS_VOCAB: List[str] = [
+    "ADJ", "ADP", "ADV", "AUX", "CCONJ", "DET", "INTJ", "NOUN", "NUM",
+    "PART", "PRON", "PROPN", "PUNCT", "SCONJ", "SYM", "VERB", "X",
+]
+
+DEPREL_VOCAB: List[str] = [
+    "root", "acl", "acl:relcl", "advcl", "advmod", "amod", "appos", "aux", "aux:pass",
+    "case", "cc", "ccomp", "clf", "compound", "conj", "cop", "csubj", "dep", "det",
+    "discourse", "dislocated", "expl", "fixed", "flat", "flat:name", "goeswith", "iobj",
+    "list", "mark", "nmod", "nmod:poss", "nsubj", "nsubj:pass", "nummod", "obj", "obl",
+    "obl:poss", "obl:tmod", "orphan", "parataxis", "punct", "reparandum", "vocative", "xcomp",
+]
+
+TYPE_VOCAB: List[str] = [
+    "NUM", "NUMBER", "TIME", "PERCENT", "MONEY", "DISTANCE", "VOLUME", "WEIGHT", "AREA",
+    "DURATION", "YEAR", "DATE", "MONTH", "CURRENCY", "UNIT_DISTANCE", "UNIT_VOLUME",
+    "UNIT_WEIGHT", "UNIT_AREA", "TIME_UNIT", "ERA", "PERCENT_SIGN", "ORDINAL_MARK",
+]
+
+_VOCABS: Dict[str, List[str]] = {"pos": UPOS_VOCAB, "depparse": DEPREL_VOCAB, "type": TYPE_VOCAB}
+_CODES: Dict[str, Dict[str, int]] = {k: {v: i for i, v in enumerate(vs)} for k, vs in _VOCABS.items()}
+
+COLUMNAR_VERSION = 1
+DEFAULT_LANG = "th"
+
+
+def _encode_value(field: str, v: Any) -> Any:
+    # Unknown labels are stored verbatim (strings), known ones as small ints
+    if isinstance(v, str):
+        code = _CODES[field].get(v)
+        return v if code is None else code
+    return v
+
+
+def _decode_value(field: str, v: Any) -> Any:
+    if isinstance(v, int) and not isinstance(v, bool):
+        vocab = _VOCABS[field]
+        return vocab[v] if 0 <= v < len(vocab) else None
+    return v
+
+
+# -------------------------------
+# Encode / decode
+# -------------------------------
+
+
+def is_columnar(tokens: Any) -> bool:
+    return isinstance(tokens, dict) and "text" in tokens
+
+
+def encode_tokens(tokens: Sequence[dict]) -> dict:
+    """Encode a row token list into the columnar layout.
+
+    Layout: {"v", "id", "text", "pos", "lemma", "depparse", "head", "start", "end"[, "type"]}
+    - pos/depparse/type are codes into the shared vocabularies (unknown labels kept as strings)
+    - lemma is None where it equals text
+    - lang is not stored per token; it lives on the corpus document (doc.lang)
+    """
+    out: Dict[str, Any] = {"v": COLUMNAR_VERSION}
+    out["id"] = [t.get("id") for t in tokens]
+    out["text"] = [t.get("text") for t in tokens]
+    out["pos"] = [_encode_value("pos", t.get("pos")) for t in tokens]
+    out["lemma"] = [None if t.get("lemma") == t.get("text") else t.get("lemma") for t in tokens]
+    out["depparse"] = [_encode_value("depparse", t.get("depparse")) for t in tokens]
+    out["head"] = [t.get("head") for t in tokens]
+    out["start"] = [t.get("start") for t in tokens]
+    out["end"] = [t.get("end") for t in tokens]
+    if any("type" in t for t in tokens):
+        out["type"] = [_encode_value("type", t.get("type")) for t in tokens]
+    return out
+
+
+def decode_tokens(cols: dict, lang: str = DEFAULT_LANG) -> List[dict]:
+    """Decode a columnar token block back into row dicts (same keys as annotate_sentence)."""
+    texts = cols.get("text") or []
+    n = len(texts)
+
+    def col(name: str) -> list:
+        v = cols.get(name)
+        return v if isinstance(v, list) and len(v) == n else [None] * n
+
+    ids, pos, lemmas, deps = col("id"), col("pos"), col("lemma"), col("depparse")
+    heads, starts, ends = col("head"), col("start"), col("end")
+    types = cols.get("type") if isinstance(cols.get("type"), list) else None
+    out: List[dict] = []
+    for i in range(n):
+        tok = {
+            "id": ids[i],
+            "text": texts[i],
+            "pos": _decode_value("pos", pos[i]),
+            "lemma": texts[i] if lemmas[i] is None else lemmas[i],
+            "depparse": _decode_value("depparse", deps[i]),
+            "head": heads[i],
+            "start": starts[i],
+            "end": ends[i],
+            "lang": lang,
+        }
+        if types is not None and i < len(types) and types[i] is not None:
+            tok["type"] = _decode_value("type", types[i])
+        out.append(tok)
+    return out
+
+
+def sentence_tokens(sentence: Optional[dict], lang: Optional[str] = None) -> List[dict]:
+    """Return row tokens of a sentence item regardless of storage layout.
+
+    All readers go through this accessor; `lang` is the document-level language for columnar docs.
+    """
+    toks = (sentence or {}).get("tokens")
+    if not toks:
+        return []
+    if is_columnar(toks):
+        return decode_tokens(toks, lang or DEFAULT_LANG)
+    return list(toks)
+
+
+# -------------------------------
+# Layout measurement
+# -------------------------------
+
+
+def measure_token_layouts(col: Collection, *, sample: int = 200) -> Dict[str, float]:
+    """Compare BSON size and decode time of row vs columnar tokens on a sample of tokenized docs."""
+    import bson
+
+    cursor = col.aggregate([
+        {"$match": {"sentences.tokens": {"$exists": True}}},
+        {"$sample": {"size": max(1, sample)}},
+        {"$project": {"sentences.tokens": 1, "lang": 1}},
+    ])
+    docs = 0
+    row_bytes = 0
+    col_bytes = 0
+    row_decode = 0.0
+    col_decode = 0.0
+    for doc in cursor:
+        lang = doc.get("lang")
+        rows_doc = {"sentences": [{"tokens": sentence_tokens(s, lang)} for s in doc.get("sentences") or []]}
+        cols_doc = {"sentences": [{"tokens": encode_tokens(s["tokens"])} for s in rows_doc["sentences"]]}
+        row_raw = bson.encode(rows_doc)
+        col_raw = bson.encode(cols_doc)
+        row_bytes += len(row_raw)
+        col_bytes += len(col_raw)
+        t0 = time.perf_counter()
+        for s in bson.decode(row_raw)["sentences"]:
+            sentence_tokens(s)
+        t1 = time.perf_counter()
+        for s in bson.decode(col_raw)["sentences"]:
+            sentence_tokens(s, lang)
+        t2 = time.perf_counter()
+        row_decode += t1 - t0
+        col_decode += t2 - t1
+        docs += 1
+    return {
+        "docs": docs,
+        "row_bytes": row_bytes,
+        "columnar_bytes": col_bytes,
+        "row_decode_ms": row_decode * 1000.0,
+        "columnar_decode_ms": col_decode * 1000.0,
+    }
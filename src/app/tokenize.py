@@ -1,16 +1,22 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
-from typing import Dict, List, Optional, Sequence
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
 from pymongo.collection import Collection
-from pymongo import UpdateOne
 
 # External NLP libs
 import stanza
 import torch
 
+try:
+    from stanza.pipeline.core import UnsupportedProcessorError
+except ImportError:  # older Stanza
+    UnsupportedProcessorError = ()
+
 try:
     from pythainlp.tokenize import word_tokenize
     from pythainlp.util import Trie
@@ -18,50 +24,28 @@ except Exception:
     # Defer import error to runtime if pythainlp is missing
     pass
 
-from .constants import (
-    THAI_DIGIT_MAP,
-    RE_INT,
-    RE_DECIMAL,
-    RE_THOUSANDS,
-    RE_TIME,
-    RE_FRACTION,
-    RE_RANGE,
-    RE_PERCENT,
-    RE_PHONE,
-    WS_RE,
-    THAI_MONTHS,
-    CURRENCY_WORDS,
-    CURRENCY_SYMBOLS,
-    UNIT_DISTANCE,
-    UNIT_WEIGHT,
-    UNIT_VOLUME,
-    UNIT_AREA,
-    UNIT_TIME,
-    TIME_TOKENS,
-    ERA_TOKENS,
-    PERCENT_TOKENS,
+from .align import align_tokens
+from .leases import Lease
+from .stage_runner import checkpoint_mode, make_executor, run_stage
+from .token_store import DEFAULT_LANG, encode_tokens
+from .constants import ALL_PUNCTS, THAI_CONNECTORS_PREFIX, WS_RE
+from .lexicon import (
+    CURRENCY,
+    ERA,
+    MONTH,
+    PERCENT,
+    SHAPE_PERCENT,
+    SHAPE_TIME,
+    UNIT_TYPES,
+    WORD_TYPES,
+    is_number_like,
+    lexicon_mask,
+    normalize_digits,
+    numeric_shape,
 )
 
 
-# -------------------------------
-# Utilities
-# -------------------------------
-
-
-def _normalize_digits(text: str) -> str:
-    return (text or "").translate(THAI_DIGIT_MAP)
-
-
-def _is_number_like(text: str) -> bool:
-    if not text:
-        return False
-    s = _normalize_digits(text.strip())
-    if not any(ch.isdigit() for ch in s):
-        return False
-    return any(p.match(s) is not None for p in (RE_INT, RE_DECIMAL, RE_THOUSANDS, RE_TIME, RE_FRACTION, RE_RANGE, RE_PERCENT, RE_PHONE))
-
-
-# Domain dictionaries moved to constants.py
+# Domain dictionaries live in constants.py; number/domain classification in lexicon.py
 
 
 # -------------------------------
@@ -93,47 +77,84 @@ def load_custom_dict(path: str = "data/input/custom_dict.txt") -> CustomDict:
 # -------------------------------
 # Stanza init (download model on-demand)
 # -------------------------------
+# Processor profiles. Thai lemmas are the surface form: pos+depparse keeps the lemma processor
+# (the parser requires it) but in identity mode, which copies each word instead of running the
+# lemmatizer model; pos-only has no lemma processor and annotate_sentence fills lemma with the
+# word. pos-only also skips depparse and stores flat heads (head=0, depparse=None), for which
+# sentence_heads yields no phrases.
+
+PROFILES: Dict[str, str] = {
+    "full": "tokenize,pos,lemma,depparse",
+    "pos+depparse": "tokenize,pos,lemma,depparse",
+    "pos-only": "tokenize,pos",
+}
+# Extra stanza.Pipeline arguments per profile
+PROFILE_OPTIONS: Dict[str, Dict] = {
+    "pos+depparse": {"lemma_use_identity": True},
+}
+DEFAULT_PROFILE = "full"
+
+_PIPELINES: Dict[tuple, stanza.Pipeline] = {}
+
+
+def _missing_resources(e: BaseException) -> bool:
+    """True when a pipeline build failed for lack of downloaded files (a download may fix it).
+
+    Stanza reports a missing resources.json, language directory or model file as a
+    FileNotFoundError subclass; processors the language does not offer share that base, but
+    downloading cannot help them.
+    """
+    return isinstance(e, FileNotFoundError) and not isinstance(e, UnsupportedProcessorError)
 
 
 def _ensure_stanza(
+    profile: str = DEFAULT_PROFILE,
     lang: str = "th",
-    processors: str = "tokenize,pos,lemma,depparse",
     tokenize_pretokenized: bool = True,
 ) -> stanza.Pipeline:
-    def _build(p: str) -> stanza.Pipeline:
-        return stanza.Pipeline(
+    """Return the pipeline for `profile`, built once per process.
+
+    Models already on disk are loaded without contacting the download server; only when the
+    build fails because resources are missing (see _missing_resources) are they downloaded
+    (once) and the build retried. Other errors are raised as they are.
+    """
+    if profile not in PROFILES:
+        raise ValueError(f"unknown tokenize profile: {profile} (choose from {', '.join(PROFILES)})")
+    processors = PROFILES[profile]
+    use_gpu = bool(torch.cuda.is_available())
+    key = (lang, profile, tokenize_pretokenized, use_gpu)
+    nlp = _PIPELINES.get(key)
+    if nlp is not None:
+        return nlp
+
+    def _build() -> stanza.Pipeline:
+        kwargs = dict(
             lang=lang,
-            processors=p,
-            use_gpu=bool(torch.cuda.is_available()),
+            processors=processors,
+            use_gpu=use_gpu,
             tokenize_pretokenized=tokenize_pretokenized,
             verbose=False,
+            **PROFILE_OPTIONS.get(profile, {}),
         )
+        try:
+            return stanza.Pipeline(download_method=None, **kwargs)
+        except TypeError:
+            # Older Stanza without download_method never downloads on its own
+            return stanza.Pipeline(**kwargs)
 
-    # Try full pipeline first
     try:
-        return _build(processors)
-    except Exception:
-        # Try download if missing, then build again
-        try:
-            resources_dir = os.getenv("STANZA_RESOURCES_DIR")
-            if resources_dir:
-                stanza.download(lang, model_dir=resources_dir)
-            else:
-                stanza.download(lang)
-        except Exception:
-            pass
-        # Try again with full processors
-        try:
-            return _build(processors)
-        except Exception:
-            # Gradually degrade: remove lemma, then depparse, but keep tokenize for POS requirements
-            for p in ("tokenize,pos,depparse", "tokenize,pos"):
-                try:
-                    return _build(p)
-                except Exception:
-                    continue
-            # As a last resort, raise the original error
-            return _build("tokenize,pos")
+        nlp = _build()
+    except Exception as e:
+        if not _missing_resources(e):
+            raise
+        resources_dir = os.getenv("STANZA_RESOURCES_DIR")
+        if resources_dir:
+            stanza.download(lang, model_dir=resources_dir, processors=processors)
+        else:
+            stanza.download(lang, processors=processors)
+        nlp = _build()
+    _PIPELINES[key] = nlp
+    return nlp
 
 
 # -------------------------------
@@ -145,44 +166,36 @@ def _classify_numeric(idx: int, words: Sequence[Dict]) -> Optional[str]:
     """Heuristics to assign a finer-grained type for numeric tokens based on context."""
     cur = words[idx]
     text = cur.get("text", "")
-    t_norm = _normalize_digits(text)
+    t_norm = normalize_digits(text)
     upos = (cur.get("pos") or cur.get("upos") or "").upper()
 
     prev_w = words[idx - 1] if idx - 1 >= 0 else None
     next_w = words[idx + 1] if idx + 1 < len(words) else None
     prev = (prev_w or {}).get("text", "")
     next = (next_w or {}).get("text", "")
+    prev_m = lexicon_mask(prev)
+    next_m = lexicon_mask(next)
+    shape = numeric_shape(t_norm)
 
     # Time like 12:34 or 12:34:56
-    if RE_TIME.match(t_norm):
+    if shape == SHAPE_TIME:
         return "TIME"
 
     # Percent
-    if (next in PERCENT_TOKENS) or (text in PERCENT_TOKENS) or RE_PERCENT.match(t_norm):
+    if (next_m & PERCENT) or (lexicon_mask(text) & PERCENT) or shape == SHAPE_PERCENT:
         return "PERCENT"
 
     # Money
-    if (prev in CURRENCY_SYMBOLS) or (next in CURRENCY_SYMBOLS) or (prev in CURRENCY_WORDS) or (next in CURRENCY_WORDS):
+    if (prev_m | next_m) & CURRENCY:
         return "MONEY"
 
-    # Distance / Volume / Weight / Area / Duration by following unit
-    if next in UNIT_DISTANCE:
-        return "DISTANCE"
-    if next in UNIT_VOLUME:
-        return "VOLUME"
-    if next in UNIT_WEIGHT:
-        return "WEIGHT"
-    if next in UNIT_AREA:
-        return "AREA"
-    if next in UNIT_TIME:
-        return "DURATION"
-
-    # Time words (e.g., 5 โมง, 10 นาฬิกา)
-    if next in TIME_TOKENS:
-        return "TIME"
+    # Distance / Volume / Weight / Area / Duration by following unit, time words (e.g., 5 โมง, 10 นาฬิกา)
+    unit_type = UNIT_TYPES.get(next) if next_m else None
+    if unit_type:
+        return unit_type
 
     # Date contexts: adjacent to month or era or preceded/followed by ปี
-    if (prev in ERA_TOKENS) or (next in ERA_TOKENS):
+    if (prev_m | next_m) & ERA:
         # Likely year number
         return "YEAR"
     if (prev == "ปี") or (next == "ปี"):
@@ -196,7 +209,7 @@ def _classify_numeric(idx: int, words: Sequence[Dict]) -> Optional[str]:
         # Otherwise duration (e.g., 3 ปี)
         if next == "ปี":
             return "DURATION"
-    if (prev in THAI_MONTHS) or (next in THAI_MONTHS):
+    if (prev_m | next_m) & MONTH:
         return "DATE"
 
     # Range marks might be separated; keep NUMBER if unsure
@@ -207,35 +220,14 @@ def _classify_numeric(idx: int, words: Sequence[Dict]) -> Optional[str]:
 
 def _classify_non_numeric(idx: int, words: Sequence[Dict]) -> Optional[str]:
     text = words[idx].get("text", "")
-    if text in THAI_MONTHS:
-        return "MONTH"
-    if text in CURRENCY_SYMBOLS or text in CURRENCY_WORDS:
-        return "CURRENCY"
-    if text in UNIT_DISTANCE:
-        return "UNIT_DISTANCE"
-    if text in UNIT_VOLUME:
-        return "UNIT_VOLUME"
-    if text in UNIT_WEIGHT:
-        return "UNIT_WEIGHT"
-    if text in UNIT_AREA:
-        return "UNIT_AREA"
-    if text in UNIT_TIME or text in TIME_TOKENS:
-        return "TIME_UNIT"
-    if text in ERA_TOKENS:
-        return "ERA"
-    if text in PERCENT_TOKENS:
-        return "PERCENT_SIGN"
-    # Ordinal indicators
-    if text in {"อันดับ", "อันดับที่", "ครั้ง", "ครั้งที่", "ที่"}:
-        return "ORDINAL_MARK"
-    return None
+    return WORD_TYPES.get(text) if lexicon_mask(text) else None
 
 
 def _assign_types(words: List[Dict]) -> None:
     for i, w in enumerate(words):
         upos = (w.get("pos") or w.get("upos") or "").upper()
         t: Optional[str]
-        if upos == "NUM" or _is_number_like(w.get("text", "")):
+        if upos == "NUM" or is_number_like(w.get("text", "")):
             t = _classify_numeric(i, words)
         else:
             t = _classify_non_numeric(i, words)
@@ -257,49 +249,90 @@ def _pretok_with_pythainlp(text: str, cd: Optional[Trie]) -> List[str]:
         return word_tokenize(text, engine="newmm", keep_whitespace=False)
 
 
+# Depparse cost grows superlinearly with sentence length, and flattened lists/tables/references
+# can run to hundreds of tokens. Longer pretokenized sequences are parsed in chunks of at most
+# this many tokens (0 disables chunking); see _chunk_bounds.
+DEFAULT_MAX_PARSE_TOKENS = 120
+
+
+@dataclass
+class ParseStats:
+    sentences: int = 0
+    chunked: int = 0  # sentences parsed in more than one chunk
+    latencies_ms: List[float] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lat = sorted(self.latencies_ms)
+
+        def pct(q: float) -> float:
+            return lat[min(len(lat) - 1, int(q * len(lat)))] if lat else 0.0
+
+        return (
+            f"sentences: {self.sentences}, chunked: {self.chunked}, "
+            f"latency_ms p50: {pct(0.5):.1f}, p90: {pct(0.9):.1f}, max: {lat[-1] if lat else 0.0:.1f}"
+        )
+
+
+def _is_break_after(tk: str) -> bool:
+    t = tk.strip()
+    return not t or t in ALL_PUNCTS
+
+
+def _chunk_bounds(tokens: Sequence[str], max_tokens: int) -> List[Tuple[int, int]]:
+    """Split token positions [0, n) into spans of at most `max_tokens`.
+
+    Each cut is the last safe boundary in the window: after punctuation/whitespace or before a
+    connector (THAI_CONNECTORS_PREFIX); without one the window is cut at its full length.
+    """
+    n = len(tokens)
+    if max_tokens <= 0 or n <= max_tokens:
+        return [(0, n)]
+    out: List[Tuple[int, int]] = []
+    start = 0
+    while n - start > max_tokens:
+        cut = start + max_tokens
+        for k in range(start + max_tokens, start, -1):
+            # cut between tokens k-1 and k
+            if _is_break_after(tokens[k - 1]) or tokens[k] in THAI_CONNECTORS_PREFIX:
+                cut = k
+                break
+        out.append((start, cut))
+        start = cut
+    out.append((start, n))
+    return out
+
+
 def annotate_sentence(
     text: str,
     nlp: stanza.Pipeline,
     custom_trie: Optional[Trie] = None,
+    *,
+    max_tokens: int = DEFAULT_MAX_PARSE_TOKENS,
+    stats: Optional[ParseStats] = None,
+    depparse: bool = True,
 ) -> List[Dict]:
+    """Tokens of `text` annotated by `nlp`; depparse=False for pipelines without a parser."""
+    t0 = time.perf_counter()
     # 1) Pre-tokenize (so custom dict is respected)
     pretok = _pretok_with_pythainlp(text, custom_trie)
     if not pretok:
         pretok = [text]
 
-    # Compute character offsets for each token by left-to-right alignment
-    offsets: List[tuple[int | None, int | None]] = []
-    pos = 0
-    for tk in pretok:
-        if not tk:
-            offsets.append((None, None))
-            continue
-        # Try to find starting at current cursor
-        idx = text.find(tk, pos)
-        if idx == -1:
-            # Try global search as fallback
-            idx = text.find(tk)
-        if idx == -1:
-            # Skip intervening whitespace and approximate
-            while pos < len(text) and text[pos].isspace():
-                pos += 1
-            start = pos
-            end = start + len(tk)
-            offsets.append((start, end))
-            pos = end
-        else:
-            start = idx
-            end = idx + len(tk)
-            offsets.append((start, end))
-            pos = end
-
-    # 2) Run Stanza with pretokenized tokens
-    doc = nlp([pretok])
-    if not doc.sentences:
+    # Character offsets for each token (monotonic, single pass; see align.py)
+    starts, ends = align_tokens(text, pretok)
+
+    # 2) Run Stanza with pretokenized tokens; over-long sequences go in as one batch of chunks,
+    #    each parsed as its own sentence and stitched back below
+    bounds = _chunk_bounds(pretok, max_tokens if depparse else 0)
+    doc = nlp([pretok[a:b] for a, b in bounds])
+    if stats is not None:
+        stats.sentences += 1
+        stats.chunked += len(bounds) > 1
+    if len(doc.sentences) != len(bounds):
         # Fallback to simple tokens with offsets and sequential IDs
         out: List[Dict] = []
         for i, tk in enumerate(pretok):
-            st, en = offsets[i] if i < len(offsets) else (None, None)
+            st, en = (starts[i], ends[i]) if i < len(starts) else (None, None)
             out.append({
                 "id": i + 1,
                 "text": tk,
@@ -311,28 +344,196 @@ def annotate_sentence(
                 "end": en,
                 "lang": "th",
             })
+        if stats is not None:
+            stats.latencies_ms.append((time.perf_counter() - t0) * 1000.0)
         return out
 
-    sent = doc.sentences[0]
+    # Chunk ids/heads are shifted by the chunk's token offset; the root of every later chunk
+    # attaches to the first chunk's root as parataxis, so each sentence keeps a single root
     words: List[Dict] = []
-    for i, w in enumerate(sent.words):
-        st, en = offsets[i] if i < len(offsets) else (None, None)
-        words.append({
-            "id": getattr(w, "id", i + 1),
-            "text": w.text,
-            "pos": w.upos,
-            "lemma": w.lemma if getattr(w, "lemma", None) is not None else w.text,
-            "depparse": w.deprel if getattr(w, "deprel", None) is not None else None,
-            "head": getattr(w, "head", 0),
-            "start": st,
-            "end": en,
-            "lang": "th",
-        })
+    root_id = None
+    for (a, _), sent in zip(bounds, doc.sentences):
+        for j, w in enumerate(sent.words):
+            i = a + j
+            st, en = (starts[i], ends[i]) if i < len(starts) else (None, None)
+            wid = getattr(w, "id", j + 1) + a
+            # Without a parser there is a single chunk and every head is 0
+            head = getattr(w, "head", 0) if depparse else 0
+            deprel = w.deprel if getattr(w, "deprel", None) is not None else None
+            if head:
+                head += a
+            elif root_id is None:
+                root_id = wid
+            elif a:
+                head, deprel = root_id, "parataxis"
+            words.append({
+                "id": wid,
+                "text": w.text,
+                "pos": w.upos,
+                "lemma": w.lemma if getattr(w, "lemma", None) is not None else w.text,
+                "depparse": deprel,
+                "head": head,
+                "start": st,
+                "end": en,
+                "lang": "th",
+            })
 
     _assign_types(words)
+    if stats is not None:
+        stats.latencies_ms.append((time.perf_counter() - t0) * 1000.0)
     return words
 
 
+# -------------------------------
+# Worker pool (fork after load)
+# -------------------------------
+# The parent builds the Stanza pipeline once and workers are forked from it afterwards, reaching
+# the compute closure through _WORKER_COMPUTE, so model weights are shared copy-on-write instead
+# of loaded per process. Each worker caps torch's intra-op threads to avoid oversubscription.
+# Forking copies only the calling thread, and a lock another thread held at that moment stays
+# held in the child forever; prepare_tokenize therefore forks every worker before the run opens
+# a MongoClient (monitor threads) or run_stage starts its reader/writer and lease heartbeat.
+
+_WORKER_COMPUTE: Dict[str, Callable[[dict], Optional[dict]]] = {}
+
+
+def _init_worker(threads: int) -> None:
+    torch.set_num_threads(threads)
+
+
+def _run_worker(doc: dict) -> Optional[dict]:
+    return _WORKER_COMPUTE["compute"](doc)
+
+
+def _worker_ready() -> bool:
+    return True
+
+
+def _make_pool(workers: int, threads: int, compute: Callable[[dict], Optional[dict]]) -> Optional[Executor]:
+    if workers <= 0:
+        return None
+    if torch.cuda.is_available():
+        print("tokenize: --workers ignored on GPU (CUDA state cannot be forked); running in-process")
+        return None
+    _WORKER_COMPUTE["compute"] = compute
+    threads = threads if threads > 0 else max(1, (os.cpu_count() or 1) // workers)
+    pool = make_executor(workers, processes=True, fork=True, initializer=_init_worker, initargs=(threads,))
+    # A fork-context pool starts all its workers on the first task; do it now rather than
+    # from inside run_stage
+    pool.submit(_worker_ready).result()
+    return pool
+
+
+@dataclass
+class TokenizeRun:
+    """Everything a tokenize run needs before it touches the database (see prepare_tokenize)."""
+
+    compute: Callable[[dict], Optional[dict]]  # corpus document or sentence document -> fields
+    parse_stats: ParseStats
+    profile: str
+    max_tokens: int
+    pool: Optional[Executor] = None
+
+    @property
+    def options(self) -> Dict:
+        # Output-affecting settings, stamped into process.tokenize (see stages.stage_stamp)
+        return {"profile": self.profile, "max_tokens": self.max_tokens}
+
+    def compute_chunk(self, docs: List[dict]) -> List[Optional[dict]]:
+        return list(self.pool.map(_run_worker, docs))
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+
+def prepare_tokenize(
+    *,
+    sentences: bool = False,
+    columnar: bool = False,
+    max_tokens: int = DEFAULT_MAX_PARSE_TOKENS,
+    workers: int = 0,
+    threads: int = 0,
+    profile: str = DEFAULT_PROFILE,
+    verbose: bool = False,
+) -> TokenizeRun:
+    """Load the custom dict and Stanza pipeline and, with workers > 0, fork the pool.
+
+    Call it before get_collection: the workers must be forked while the process has no other
+    threads. sentences=True builds the compute for sentence documents (sentences schema).
+    The run is passed to update_corpus_tokenize / update_sentences_tokenize, which close it.
+    """
+    custom = load_custom_dict()
+    if verbose:
+        print(f"tokenize: custom_dict entries -> {custom.size}, profile -> {profile}")
+    nlp = _ensure_stanza(profile)
+    depparse = "depparse" in PROFILES[profile]
+    parse_stats = ParseStats()
+
+    def annotate(text: str) -> List[Dict]:
+        tokens = annotate_sentence(text, nlp, custom.trie, max_tokens=max_tokens, stats=parse_stats, depparse=depparse)
+        return encode_tokens(tokens) if columnar else tokens
+
+    def compute_doc(doc: dict) -> Optional[dict]:
+        sents = list(doc.get("sentences") or [])
+        changed = False
+        new_sents: List[dict] = []
+        for s in sents:
+            tokens = annotate(str(s.get("text", "")))
+            # Compare with existing tokens (basic length check)
+            if s.get("tokens") != tokens:
+                changed = True
+            new_item = dict(s)
+            new_item["tokens"] = tokens
+            new_sents.append(new_item)
+        if not changed:
+            # still ensure process flag is set
+            return None
+        fields: Dict = {"sentences": new_sents}
+        if columnar:
+            fields["lang"] = DEFAULT_LANG
+        return fields
+
+    def compute_sentence(sdoc: dict) -> Optional[dict]:
+        tokens = annotate(str(sdoc.get("text", "")))
+        if sdoc.get("tokens") == tokens:
+            return None
+        fields: Dict = {"tokens": tokens}
+        if columnar:
+            fields["lang"] = DEFAULT_LANG
+        return fields
+
+    compute = compute_sentence if sentences else compute_doc
+    return TokenizeRun(
+        compute=compute, parse_stats=parse_stats, profile=profile, max_tokens=max_tokens,
+        pool=_make_pool(workers, threads, compute),
+    )
+
+
+def _rss_summary() -> str:
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return "n/a"
+    # ru_maxrss is KB on Linux; a worker's figure includes the pages it shares with the parent
+    self_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    child_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return f"parent_peak_mb: {self_mb:.0f}, worker_peak_mb: {child_mb:.0f}"
+
+
+def _report(verbose: bool, processed: int, elapsed: float, parse_stats: ParseStats, pooled: bool) -> None:
+    if not verbose:
+        return
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    print(f"tokenize throughput -> docs: {processed}, elapsed: {elapsed:.1f} s, docs/s: {rate:.2f}, {_rss_summary()}")
+    if pooled:
+        # Parse stats are collected in each worker and not sent back
+        print("tokenize parse -> (per worker; run without --workers for latency stats)")
+    else:
+        print(f"tokenize parse -> {parse_stats.summary()}")
+
+
 # -------------------------------
 # Corpus updater
 # -------------------------------
@@ -342,13 +543,29 @@ def update_corpus_tokenize(
     col: Collection,
     *,
     limit: Optional[int] = None,
+    ids: Optional[list] = None,
     batch: int = 200,
     missing_only: bool = True,
+    from_start: bool = False,
+    lease: Optional[Lease] = None,
     verbose: bool = False,
+    columnar: bool = False,
+    max_tokens: int = DEFAULT_MAX_PARSE_TOKENS,
+    workers: int = 0,
+    threads: int = 0,
+    profile: str = DEFAULT_PROFILE,
+    run: Optional[TokenizeRun] = None,
 ) -> int:
     """Annotate each sentence with tokens (text,pos,lemma,depparse,type,lang) using Stanza.
 
     Skips documents with process.tokenize=true. After processing, sets process.tokenize=true.
+    With columnar=True tokens are stored per sentence as parallel arrays (see token_store)
+    and lang is stored once on the document. Sentences longer than `max_tokens` are parsed
+    in chunks (0 disables). workers > 0 annotates on a forked pool sharing the loaded
+    pipeline, `threads` torch threads each (0 = CPUs / workers). `profile` picks the Stanza
+    processors (see PROFILES). `run` is a prepare_tokenize() result made before `col` was
+    opened and replaces columnar/max_tokens/workers/threads/profile; pass one whenever
+    workers > 0 so the pool is not forked next to pymongo's threads.
 
     Returns number of documents modified.
     """
@@ -380,52 +597,87 @@ def update_corpus_tokenize(
 
     projection = {"sentences": 1}
 
-    cursor = col.find(filt, projection=projection, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
-
-    # Prepare NLP resources
-    custom = load_custom_dict()
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    if run is None:
+        run = prepare_tokenize(
+            columnar=columnar, max_tokens=max_tokens, workers=workers, threads=threads, profile=profile, verbose=verbose
+        )
+    pool = run.pool
+    t0 = time.perf_counter()
+    try:
+        if pool is not None:
+            stats = run_stage(
+                col, filt, "tokenize",
+                compute_chunk=run.compute_chunk,
+                projection=projection, limit=limit, batch=batch, verbose=verbose,
+                checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+                options=run.options,
+            )
+        else:
+            stats = run_stage(
+                col, filt, "tokenize",
+                compute=run.compute, projection=projection, limit=limit, batch=batch, verbose=verbose,
+                checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+                options=run.options,
+            )
+    finally:
+        run.close()
+    processed = stats.processed
+    modified = stats.modified
     if verbose:
-        print(f"tokenize: custom_dict entries -> {custom.size}")
-    nlp = _ensure_stanza()
+        print(f"tokenize summary -> processed: {processed}, modified_docs: {modified}")
+    _report(verbose, processed, time.perf_counter() - t0, run.parse_stats, pool is not None)
+    return modified
+
 
-    ops: List[UpdateOne] = []
-    modified = 0
+def update_sentences_tokenize(
+    sent_col: Collection,
+    *,
+    limit: Optional[int] = None,
+    ids: Optional[list] = None,
+    batch: int = 200,
+    missing_only: bool = True,
+    from_start: bool = False,
+    lease: Optional[Lease] = None,
+    verbose: bool = False,
+    columnar: bool = False,
+    max_tokens: int = DEFAULT_MAX_PARSE_TOKENS,
+    workers: int = 0,
+    threads: int = 0,
+    profile: str = DEFAULT_PROFILE,
+    run: Optional[TokenizeRun] = None,
+) -> int:
+    """Sentences-schema variant: annotate each sentence document with tokens.
+
+    Sets process.tokenize=true per sentence; `run` as in update_corpus_tokenize (built with
+    sentences=True). Returns number of sentence documents modified.
+    """
+    from .sentence_store import per_sentence, run_sentence_stage
+
+    if run is None:
+        run = prepare_tokenize(
+            sentences=True, columnar=columnar, max_tokens=max_tokens, workers=workers, threads=threads, profile=profile,
+            verbose=verbose,
+        )
+    pool = run.pool
+    run_chunk = per_sentence(run.compute) if pool is None else run.compute_chunk
     processed = 0
+
+    def compute_chunk(docs: List[dict]) -> List[Optional[dict]]:
+        nonlocal processed
+        processed += len(docs)
+        return run_chunk(docs)
+
+    t0 = time.perf_counter()
     try:
-        for doc in cursor:
-            doc_id = doc.get("_id")
-            sents = list(doc.get("sentences") or [])
-            changed = False
-            new_sents: List[dict] = []
-            for s in sents:
-                text = str(s.get("text", ""))
-                tokens = annotate_sentence(text, nlp, custom.trie)
-                # Compare with existing tokens (basic length check)
-                if s.get("tokens") != tokens:
-                    changed = True
-                new_item = dict(s)
-                new_item["tokens"] = tokens
-                new_sents.append(new_item)
-            if changed:
-                ops.append(UpdateOne({"_id": doc_id}, {"$set": {"sentences": new_sents, "process.tokenize": True}}))
-            else:
-                # still ensure process flag is set
-                ops.append(UpdateOne({"_id": doc_id}, {"$set": {"process.tokenize": True}}))
-            processed += 1
-            if len(ops) >= batch:
-                res = col.bulk_write(ops, ordered=False)
-                modified += res.modified_count
-                ops = []
-        if ops:
-            res = col.bulk_write(ops, ordered=False)
-            modified += res.modified_count
+        modified = run_sentence_stage(
+            sent_col, "tokenize", compute_chunk,
+            projection={"text": 1, "tokens": 1},
+            limit=limit, ids=ids, batch=batch, missing_only=missing_only, from_start=from_start, lease=lease, verbose=verbose,
+            options=run.options,
+        )
     finally:
-        try:
-            cursor.close()
-        except Exception:
-            pass
-    if verbose:
-        print(f"tokenize summary -> processed: {processed}, modified_docs: {modified}")
+        run.close()
+    _report(verbose, processed, time.perf_counter() - t0, run.parse_stats, pool is not None)
     return modified
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import datetime as dt
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pymongo import ASCENDING
+from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
+
+
+from .stages import STAGES
+
+
+# -------------------------------
+# Stage table (pipeline order from stages.STAGES)
+# -------------------------------
+
+
+def _run_thai_clock(col: Collection, ids: Optional[list]) -> int:
+    from .thai_clock import update_corpus_thai_clock
+    return update_corpus_thai_clock(col, ids=ids)
+
+
+def _run_sentences(col: Collection, ids: Optional[list]) -> int:
+    from .sentence_split import update_corpus_sentences
+    return update_corpus_sentences(col, ids=ids)
+
+
+def _run_sentence_token(col: Collection, ids: Optional[list]) -> int:
+    from .sentence_token import update_corpus_sentence_tokenization
+    return update_corpus_sentence_tokenization(col, ids=ids)
+
+
+def _run_num_tag(col: Collection, ids: Optional[list]) -> int:
+    from .num_tag import tag_corpus_numbers
+    return tag_corpus_numbers(col, ids=ids, missing_only=True)
+
+
+def _run_connectors(col: Collection, ids: Optional[list]) -> int:
+    from .connectors import update_corpus_connectors
+    return update_corpus_connectors(col, ids=ids)
+
+
+def _run_abbreviation(col: Collection, ids: Optional[list]) -> int:
+    from .abbreviation import update_corpus_abbreviation
+    return update_corpus_abbreviation(col, ids=ids)
+
+
+def _run_tokenize(col: Collection, ids: Optional[list]) -> int:
+    from .tokenize import update_corpus_tokenize
+    return update_corpus_tokenize(col, ids=ids)
+
+
+def _run_sentence_heads(col: Collection, ids: Optional[list]) -> int:
+    from .sentence_heads import update_corpus_sentence_heads
+    return update_corpus_sentence_heads(col, ids=ids)
+
+
+def _run_word_pattern(col: Collection, ids: Optional[list]) -> int:
+    from .word_pattern import update_corpus_word_pattern
+    db = col.database
+    return update_corpus_word_pattern(col, db["words"], db["patterns"], ids=ids)
+
+
+# Stages the daemon can run, by process flag; order and membership follow stages.STAGES
+_RUNNERS: Dict[str, Callable[[Collection, Optional[list]], int]] = {
+    "thai_clock": _run_thai_clock,
+    "sentence_split": _run_sentences,
+    "sentence_token": _run_sentence_token,
+    "num_tag": _run_num_tag,
+    "connector": _run_connectors,
+    "abbreviation": _run_abbreviation,
+    "tokenize": _run_tokenize,
+    "sentence_heads": _run_sentence_heads,
+    "word_pattern": _run_word_pattern,
+}
+
+
+@dataclass(frozen=True)
+class WatchStage:
+    flag: str  # process.<flag>
+    run: Callable[[Collection, Optional[list]], int]
+
+
+WATCH_STAGES: List[WatchStage] = [WatchStage(st.name, _RUNNERS[st.name]) for st in STAGES if st.name in _RUNNERS]
+
+
+def select_stages(flags: Optional[Sequence[str]]) -> List[WatchStage]:
+    if not flags:
+        return list(WATCH_STAGES)
+    wanted = {f.strip() for f in flags if f and f.strip()}
+    unknown = wanted - {s.flag for s in WATCH_STAGES}
+    if unknown:
+        raise ValueError(f"unknown stages: {', '.join(sorted(unknown))}")
+    return [s for s in WATCH_STAGES if s.flag in wanted]
+
+
+def next_stage(process: Optional[dict], stages: Sequence[WatchStage]) -> Optional[WatchStage]:
+    """Return the first stage whose process flag is missing/false, or None when all are done."""
+    process = process or {}
+    for st in stages:
+        if not process.get(st.flag):
+            return st
+    return None
+
+
+# -------------------------------
+# Dispatcher
+# -------------------------------
+
+
+class _Dispatcher:
+    """Collect document ids per stage and run each stage restricted to those ids."""
+
+    def __init__(self, col: Collection, stages: Sequence[WatchStage], *, verbose: bool = False):
+        self.col = col
+        self.stages = list(stages)
+        self.verbose = verbose
+        self.pending: Dict[str, list] = {}
+        self.size = 0
+
+    def add(self, doc_id, process: Optional[dict]) -> None:
+        st = next_stage(process, self.stages)
+        if st is None:
+            return
+        self.pending.setdefault(st.flag, []).append(doc_id)
+        self.size += 1
+
+    def flush(self) -> int:
+        if not self.pending:
+            return 0
+        total = 0
+        for st in self.stages:
+            ids = self.pending.get(st.flag)
+            if not ids:
+                continue
+            modified = st.run(self.col, ids)
+            total += modified
+            if self.verbose:
+                print(f"watch: {st.flag} <- {len(ids)} docs (modified: {modified})")
+        self.pending = {}
+        self.size = 0
+        return total
+
+
+# -------------------------------
+# Persisted watch state (resume token / polling cursor)
+# -------------------------------
+
+
+def _load_state(state_col: Collection, key: str) -> dict:
+    return state_col.find_one({"_id": key}) or {}
+
+
+def _save_state(state_col: Collection, key: str, fields: dict) -> None:
+    state_col.update_one(
+        {"_id": key},
+        {"$set": {**fields, "saved_at": dt.datetime.utcnow()}},
+        upsert=True,
+    )
+
+
+def catch_up(col: Collection, stages: Sequence[WatchStage], *, verbose: bool = False) -> int:
+    """Run every stage once over all pending documents (used before subscribing)."""
+    total = 0
+    for st in stages:
+        modified = st.run(col, None)
+        total += modified
+        if verbose:
+            print(f"watch catch-up: {st.flag} (modified: {modified})")
+    return total
+
+
+def watch_change_stream(
+    col: Collection,
+    state_col: Collection,
+    stages: Sequence[WatchStage],
+    *,
+    batch: int = 200,
+    max_wait: float = 2.0,
+    max_idle: Optional[float] = None,
+    verbose: bool = False,
+) -> int:
+    """Subscribe to a change stream on `col` and dispatch changed documents to their next stage.
+
+    The resume token is persisted only after the corresponding batch was dispatched, so a
+    restart replays at most one batch (stages are idempotent through their process flags).
+    Requires a replica set or sharded cluster. Returns number of modified documents.
+    """
+    key = f"watch:{col.name}"
+    state = _load_state(state_col, key)
+    token = state.get("resume_token")
+    pipeline = [
+        {"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}},
+        {"$project": {"documentKey": 1, "operationType": 1, "fullDocument._id": 1, "fullDocument.process": 1}},
+    ]
+    disp = _Dispatcher(col, stages, verbose=verbose)
+    total = 0
+    last_token = token
+    with col.watch(pipeline, full_document="updateLookup", resume_after=token, max_await_time_ms=500) as stream:
+        if verbose:
+            print(f"watch: change stream on '{col.name}' ({'resumed' if token else 'new'})")
+        window_start = time.monotonic()
+        last_activity = time.monotonic()
+        while stream.alive:
+            change = stream.try_next()
+            now = time.monotonic()
+            if change is not None:
+                last_activity = now
+                full = change.get("fullDocument")
+                if full is not None:
+                    disp.add(change["documentKey"]["_id"], full.get("process"))
+                last_token = stream.resume_token
+            if disp.size and (disp.size >= batch or now - window_start >= max_wait or change is None):
+                total += disp.flush()
+                window_start = time.monotonic()
+            if last_token is not None and last_token != token and not disp.size:
+                _save_state(state_col, key, {"mode": "stream", "resume_token": last_token})
+                token = last_token
+            if change is None and max_idle is not None and now - last_activity >= max_idle:
+                break
+    return total
+
+
+# A write can become visible with updated_at at or just below the polling position (same
+# millisecond but a smaller _id, or committed after a later write was already read). Once the
+# position has caught up, the last POLL_LOOKBACK seconds before it are re-read and documents not
+# yet dispatched at their current updated_at are dispatched too (stages are idempotent). The
+# re-read is paged like the main query: each loop reads at most what is left of `batch`, and a
+# full page carries its (updated_at, _id) position over to the next loop.
+POLL_LOOKBACK = 5.0
+
+
+def _after(ts: Any, _id: Any) -> Dict:
+    return {"$or": [{"updated_at": {"$gt": ts}}, {"updated_at": ts, "_id": {"$gt": _id}}]}
+
+
+def watch_polling(
+    col: Collection,
+    state_col: Collection,
+    stages: Sequence[WatchStage],
+    *,
+    batch: int = 200,
+    interval: float = 5.0,
+    max_idle: Optional[float] = None,
+    lookback: float = POLL_LOOKBACK,
+    verbose: bool = False,
+) -> int:
+    """Fallback for standalone servers: poll documents by (updated_at, _id) in ascending order.
+
+    Stages set `updated_at` with $currentDate, so every write re-queues the document for its
+    next stage. The polling position is persisted after each dispatched batch.
+    """
+    col.create_index([("updated_at", ASCENDING), ("_id", ASCENDING)])
+    key = f"watch:{col.name}"
+    state = _load_state(state_col, key)
+    last_ts = state.get("last_updated_at")
+    last_id = state.get("last_id")
+    disp = _Dispatcher(col, stages, verbose=verbose)
+    projection = {"process": 1, "updated_at": 1}
+    order = [("updated_at", ASCENDING), ("_id", ASCENDING)]
+    seen: Dict[Any, Any] = {}  # _id -> updated_at already dispatched inside the lookback window
+    late_pos: Optional[Tuple[Any, Any]] = None  # where an unfinished lookback re-read continues
+    total = 0
+    last_activity = time.monotonic()
+    if verbose:
+        print(f"watch: polling '{col.name}' on updated_at every {interval}s")
+    while True:
+        if last_ts is None:
+            filt: Dict = {"updated_at": {"$exists": True}}
+        else:
+            filt = _after(last_ts, last_id)
+        docs = list(col.find(filt, projection=projection).sort(order).limit(batch))
+        late: List[dict] = []
+        if last_ts is not None and len(docs) < batch:
+            room = batch - len(docs)
+            floor = last_ts - dt.timedelta(seconds=lookback)
+            late_filt: Dict = {"updated_at": {"$gte": floor, "$lte": last_ts}}
+            if late_pos is not None:
+                late_filt = {"$and": [late_filt, _after(*late_pos)]}
+            page = list(col.find(late_filt, projection=projection).sort(order).limit(room))
+            late_pos = (page[-1].get("updated_at"), page[-1]["_id"]) if len(page) == room else None
+            in_page = {d["_id"] for d in docs}
+            late = [d for d in page if d["_id"] not in in_page and seen.get(d["_id"]) != d.get("updated_at")]
+        if not docs and not late:
+            if late_pos is not None:
+                # Only already-dispatched documents on this page; read the rest of the window
+                continue
+            if max_idle is not None and time.monotonic() - last_activity >= max_idle:
+                break
+            time.sleep(interval)
+            continue
+        last_activity = time.monotonic()
+        for d in late + docs:
+            disp.add(d["_id"], d.get("process"))
+            seen[d["_id"]] = d.get("updated_at")
+        if verbose and late:
+            print(f"watch: {len(late)} late writes at or before the polling position")
+        # Advance the cursor before dispatching: the stages' own writes bump updated_at
+        # past it, so processed documents come back with their next stage due.
+        if docs:
+            last_ts = docs[-1].get("updated_at")
+            last_id = docs[-1]["_id"]
+        total += disp.flush()
+        if last_ts is not None:
+            floor = last_ts - dt.timedelta(seconds=lookback)
+            seen = {i: ts for i, ts in seen.items() if ts is not None and ts >= floor}
+        _save_state(state_col, key, {"mode": "poll", "last_updated_at": last_ts, "last_id": last_id})
+    return total
+
+
+def run_watch(
+    col: Collection,
+    state_col: Collection,
+    *,
+    mode: str = "auto",
+    stages: Optional[Sequence[str]] = None,
+    batch: int = 200,
+    max_wait: float = 2.0,
+    interval: float = 5.0,
+    max_idle: Optional[float] = None,
+    do_catch_up: bool = False,
+    verbose: bool = False,
+) -> int:
+    """Run the continuous pipeline. mode: 'stream', 'poll' or 'auto' (stream, falling back to poll)."""
+    selected = select_stages(stages)
+    total = 0
+    if do_catch_up:
+        total += catch_up(col, selected, verbose=verbose)
+    if mode in ("auto", "stream"):
+        try:
+            return total + watch_change_stream(
+                col, state_col, selected, batch=batch, max_wait=max_wait, max_idle=max_idle, verbose=verbose
+            )
+        except OperationFailure as e:
+            # 40573: change streams are only supported on replica sets
+            if mode == "stream" or e.code not in (40573, 40324):
+                raise
+            if verbose:
+                print(f"watch: change streams unavailable ({e.code}); falling back to polling")
+    return total + watch_polling(
+        col, state_col, selected, batch=batch, interval=interval, max_idle=max_idle, verbose=verbose
+    )
@@ -5,6 +5,9 @@ from typing import Dict, List, Optional
 from pymongo.collection import Collection
 
 from .constants import MASK_POS, NOT_MASK_TYPE
+from .leases import Lease
+from .stage_runner import checkpoint_mode, run_stage
+from .sentence_heads import resolve_head_tokens
 
 
 def _lemma(tok: dict) -> str:
@@ -53,14 +56,23 @@ def build_pattern_for_tokens(tokens: List[dict], pivot_index: int) -> str:
     return " ".join(parts).strip()
 
 
-def update_word_pattern_for_doc(words_col: Collection, patterns_col: Collection, sentence_heads: List[dict]) -> int:
+def update_word_pattern_for_doc(
+    words_col: Collection,
+    patterns_col: Collection,
+    sentence_heads: List[dict],
+    sentences: Optional[List[dict] | Dict[int, dict]] = None,
+    lang: Optional[str] = None,
+) -> int:
     """Update the words collection using sentence_heads from a single corpus document.
 
+    Reference-style heads (sentence + token_ids) are resolved against `sentences`
+    (a list, or a dict of index -> sentence doc in the sentences schema).
     Returns number of upserts/updates performed (roughly equals number of pivot tokens processed).
     """
     updated = 0
+    id_maps: Dict[int, Dict[int, dict]] = {}
     for sh in sentence_heads or []:
-        toks = list(sh.get("tokens") or [])
+        toks = resolve_head_tokens(sh, sentences, id_maps, lang)
         if not toks:
             continue
         for idx, tok in enumerate(toks):
@@ -168,8 +180,11 @@ def update_corpus_word_pattern(
     patterns_col: Collection,
     *,
     limit: Optional[int] = None,
+    ids: Optional[list] = None,
     batch: int = 200,
     missing_only: bool = True,
+    from_start: bool = False,
+    lease: Optional[Lease] = None,
     verbose: bool = False,
 ) -> int:
     """Generate masked word patterns from sentence_heads and record into words collection.
@@ -192,28 +207,55 @@ def update_corpus_word_pattern(
     else:
         filt = base
 
-    projection = {"sentence_heads": 1}
-    cursor = corpus_col.find(filt, projection=projection, no_cursor_timeout=True)
-    if limit is not None:
-        cursor = cursor.limit(limit)
-
-    processed = 0
-    flagged = 0
-    try:
-        for doc in cursor:
-            sid = doc.get("_id")
-            heads = list(doc.get("sentence_heads") or [])
-            _ = update_word_pattern_for_doc(words_col, patterns_col, heads)
-
-            # flag corpus doc
-            res = corpus_col.update_one({"_id": sid}, {"$set": {"process.word_pattern": True}})
-            flagged += res.modified_count
-            processed += 1
-    finally:
-        try:
-            cursor.close()
-        except Exception:
-            pass
+    projection = {"sentence_heads": 1, "sentences.tokens": 1, "lang": 1}
+    if ids is not None:
+        filt = {"$and": [filt, {"_id": {"$in": list(ids)}}]}
+    def compute(doc: dict) -> None:
+        heads = list(doc.get("sentence_heads") or [])
+        update_word_pattern_for_doc(words_col, patterns_col, heads, doc.get("sentences"), doc.get("lang"))
+        # only the corpus flag is written back
+        return None
+
+    # Inline compute: word/pattern upserts use find-then-push and must not race each other
+    stats = run_stage(
+        corpus_col, filt, "word_pattern",
+        compute=compute, projection=projection, limit=limit, batch=batch, verbose=verbose,
+        checkpoint=checkpoint_mode(missing_only, ids), from_start=from_start, lease=lease,
+    )
+    processed = stats.processed
+    flagged = stats.modified
     if verbose:
         print(f"word-pattern summary -> processed_docs: {processed}, flagged_docs: {flagged}")
     return flagged
+
+
+def update_sentences_word_pattern(
+    sent_col: Collection,
+    words_col: Collection,
+    patterns_col: Collection,
+    *,
+    limit: Optional[int] = None,
+    ids: Optional[list] = None,
+    batch: int = 200,
+    missing_only: bool = True,
+    from_start: bool = False,
+    lease: Optional[Lease] = None,
+    verbose: bool = False,
+) -> int:
+    """Sentences-schema variant: record word patterns from each sentence document's heads.
+
+    Sets process.word_pattern=true per sentence. Returns number of sentence documents flagged.
+    """
+    from .sentence_store import per_sentence, run_sentence_stage
+
+    def compute(sdoc: dict) -> Optional[dict]:
+        heads = list(sdoc.get("sentence_heads") or [])
+        update_word_pattern_for_doc(words_col, patterns_col, heads, {sdoc.get("index"): sdoc}, sdoc.get("lang"))
+        return None
+
+    return run_sentence_stage(
+        sent_col, "word_pattern", per_sentence(compute),
+        base={"sentence_heads": {"$exists": True}},
+        projection={"sentence_heads": 1, "tokens": 1, "lang": 1},
+        limit=limit, ids=ids, batch=batch, missing_only=missing_only, from_start=from_start, lease=lease, verbose=verbose,
+    )
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection
+
+from gensim.models import FastText, Word2Vec
+from gensim.models.keyedvectors import KeyedVectors
+from gensim.utils import SaveLoad
+
+from .stage_runner import iter_id_docs
+from .stages import stage_stamp, stale_reason
+from .token_store import sentence_tokens
+
+
+# -------------------------------
+# Word vectors over corpus lemmas (gensim)
+# -------------------------------
+# Training streams sentences[].tokens[].lemma from tokenized corpus documents; nothing is
+# materialized, gensim just iterates the corpus once for the vocabulary and once per epoch.
+# The output directory holds:
+#   model       full gensim model (needed to continue training)
+#   vectors.kv  KeyedVectors only, arrays stored as separate .npy files so they can be mmapped
+# Documents used for training get a versioned process.wordvec stamp (wordvec sits below tokenize
+# in the stage DAG, see stages.py); later runs continue the saved model on the documents
+# tokenized since (build_vocab(update=True)), plus those whose stamp went stale because they
+# were tokenized again. Model settings cannot change on a continued model.
+
+DEFAULT_OUTPUT_DIR = "models/wordvec"
+MODEL_FILE = "model"
+VECTORS_FILE = "vectors.kv"
+ALGORITHMS = ("word2vec", "fasttext")
+DEFAULT_VECTOR_SIZE = 100
+DEFAULT_WINDOW = 5
+DEFAULT_MIN_COUNT = 5
+
+
+def _lemma(tok: dict) -> str:
+    if (tok.get("pos") or "").upper() == "PUNCT":
+        return ""
+    v = tok.get("lemma")
+    if not isinstance(v, str) or not v.strip():
+        v = tok.get("text")
+    return v.strip() if isinstance(v, str) else ""
+
+
+class CorpusSentences:
+    """Restartable iterable of lemma lists, one per tokenized sentence of matching documents.
+
+    Every iteration runs a fresh _id-paged query. The _ids seen by the first full pass are
+    kept in `ids`, with their process.wordvec stamps in `stamps` (written once training succeeded).
+    """
+
+    def __init__(self, col: Collection, filt: Dict, *, limit: Optional[int] = None, batch: int = 500):
+        self.col = col
+        self.filt = filt
+        self.limit = limit
+        self.batch = batch
+        self.ids: List = []
+        self.stamps: List[Any] = []
+        self.sentences = 0
+        self._passes = 0
+
+    def __iter__(self) -> Iterator[List[str]]:
+        first = self._passes == 0
+        self._passes += 1
+        projection = {"sentences.tokens": 1, "lang": 1, "process": 1}
+        for doc in iter_id_docs(self.col, self.filt, projection=projection, page=self.batch, limit=self.limit):
+            if first:
+                self.ids.append(doc["_id"])
+                self.stamps.append(stage_stamp("wordvec", doc))
+            lang = doc.get("lang")
+            for s in doc.get("sentences") or []:
+                words = [w for w in (_lemma(t) for t in sentence_tokens(s, lang)) if w]
+                if words:
+                    if first:
+                        self.sentences += 1
+                    yield words
+
+
+def _mark_trained(col: Collection, ids: List, stamps: List[Any], *, chunk: int = 1000) -> int:
+    modified = 0
+    ops: List[UpdateOne] = []
+    for _id, stamp in zip(ids, stamps):
+        ops.append(UpdateOne(
+            {"_id": _id},
+            {"$set": {"process.wordvec": stamp}, "$currentDate": {"updated_at": True}},
+        ))
+        if len(ops) >= chunk:
+            modified += col.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        modified += col.bulk_write(ops, ordered=False).modified_count
+    return modified
+
+
+def _clear_stale(col: Collection, *, batch: int = 500) -> int:
+    """Unset process.wordvec where its stamp is stale (tokenize ran again since); returns count."""
+    ops: List[UpdateOne] = []
+    cleared = 0
+    for doc in iter_id_docs(col, {"process.wordvec": {"$exists": True}}, projection={"process": 1}, page=batch):
+        if stale_reason("wordvec", doc) is None:
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$unset": {"process.wordvec": ""}, "$currentDate": {"updated_at": True}}))
+        if len(ops) >= batch:
+            cleared += col.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        cleared += col.bulk_write(ops, ordered=False).modified_count
+    return cleared
+
+
+def _model_settings(model: Word2Vec) -> Dict[str, Any]:
+    # FastText subclasses Word2Vec in gensim 4
+    return {
+        "algorithm": "fasttext" if isinstance(model, FastText) else "word2vec",
+        "vector_size": model.vector_size,
+        "window": model.window,
+        "min_count": model.min_count,
+    }
+
+
+def _check_settings(model: Word2Vec, requested: Dict[str, Any]) -> None:
+    """Raise ValueError when an explicitly requested setting differs from the saved model's."""
+    saved = _model_settings(model)
+    conflicts = [f"{k}={v} (saved: {saved[k]})" for k, v in requested.items() if v is not None and v != saved[k]]
+    if conflicts:
+        raise ValueError(
+            f"settings conflict with the saved model: {', '.join(conflicts)}; omit them to continue it, "
+            "or rebuild to train a new model"
+        )
+
+
+def train_wordvec(
+    col: Collection,
+    *,
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    algorithm: Optional[str] = None,
+    vector_size: Optional[int] = None,
+    window: Optional[int] = None,
+    min_count: Optional[int] = None,
+    epochs: int = 5,
+    workers: int = 4,
+    limit: Optional[int] = None,
+    batch: int = 500,
+    rebuild: bool = False,
+    verbose: bool = False,
+) -> int:
+    """Train (or continue) word2vec/fastText on corpus lemmas and save model + KeyedVectors.
+
+    Without a saved model (or with rebuild=True) a new model is trained on every tokenized
+    document; otherwise the saved model's vocabulary is extended and it is trained further on
+    documents without process.wordvec (stale stamps are cleared first). algorithm/vector_size/
+    window/min_count default to the saved model's settings when continuing, and to the
+    DEFAULT_* values (word2vec) for a new model; given values that differ from a saved model raise
+    ValueError. Returns number of documents flagged.
+    """
+    if algorithm is not None and algorithm not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm: {algorithm} (choose from {', '.join(ALGORITHMS)})")
+    out = Path(output_dir)
+    model_path = out / MODEL_FILE
+    incremental = model_path.exists() and not rebuild
+
+    filt: Dict = {"sentences.tokens": {"$exists": True}, "process.tokenize": {"$nin": [None, False]}}
+    if incremental:
+        filt["$or"] = [{"process.wordvec": {"$exists": False}}, {"process.wordvec": False}]
+    corpus = CorpusSentences(col, filt, limit=limit, batch=batch)
+
+    if incremental:
+        model = SaveLoad.load(str(model_path))
+        _check_settings(model, {"algorithm": algorithm, "vector_size": vector_size, "window": window, "min_count": min_count})
+        if verbose:
+            print(f"wordvec: continuing {type(model).__name__} from {model_path} (vocab: {len(model.wv)})")
+        cleared = _clear_stale(col, batch=batch)
+        if verbose and cleared:
+            print(f"wordvec: stale stamps cleared (re-tokenized documents) -> {cleared}")
+        model.workers = max(1, workers)
+        model.build_vocab(corpus, update=True)
+    else:
+        cls = FastText if algorithm == "fasttext" else Word2Vec
+        model = cls(
+            vector_size=DEFAULT_VECTOR_SIZE if vector_size is None else vector_size,
+            window=DEFAULT_WINDOW if window is None else window,
+            min_count=DEFAULT_MIN_COUNT if min_count is None else min_count,
+            workers=max(1, workers),
+            epochs=epochs,
+        )
+        model.build_vocab(corpus)
+    if not corpus.ids:
+        if verbose:
+            print("wordvec: no new tokenized documents")
+        return 0
+    model.train(corpus, total_examples=model.corpus_count, epochs=model.epochs)
+
+    os.makedirs(out, exist_ok=True)
+    model.save(str(model_path))
+    # sep_limit=0 stores every array as its own .npy file, which is what mmap="r" maps
+    model.wv.save(str(out / VECTORS_FILE), sep_limit=0)
+    flagged = _mark_trained(col, corpus.ids, corpus.stamps)
+    if verbose:
+        print(
+            f"wordvec summary -> docs: {len(corpus.ids)}, sentences: {corpus.sentences}, "
+            f"vocab: {len(model.wv)}, flagged_docs: {flagged}, saved: {out}"
+        )
+    return flagged
+
+
+def load_vectors(output_dir: str = DEFAULT_OUTPUT_DIR) -> KeyedVectors:
+    """Load saved KeyedVectors memory-mapped read-only (fast startup, pages shared across processes)."""
+    return KeyedVectors.load(str(Path(output_dir) / VECTORS_FILE), mmap="r")
+
+
+def similar_words(kv: KeyedVectors, word: str, *, topn: int = 10) -> List[Tuple[str, float]]:
+    """Nearest words by cosine similarity; [] when `word` has no vector (fastText builds one from n-grams)."""
+    try:
+        return [(w, float(score)) for w, score in kv.most_similar(word, topn=topn)]
+    except KeyError:
+        return []
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+FIXTURES = ROOT / "tests" / "fixtures"
+
+# Same layout as the image (PYTHONPATH=/app/src)
+sys.path.insert(0, str(ROOT / "src"))
+
+
+def load_articles() -> List[Dict[str, str]]:
+    with open(FIXTURES / "articles.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+@pytest.fixture(scope="session")
+def articles() -> List[Dict[str, str]]:
+    return load_articles()
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import random
+from typing import List, Tuple
+
+import mongomock
+import pytest
+
+pytest.importorskip("pythainlp")
+
+from app import abbreviation  # noqa: E402
+from app.abbreviation import (  # noqa: E402
+    AbbreviationCache,
+    _abbreviation_fields,
+    _to_float,
+    may_contain_abbreviation,
+)
+from app.segmenter import split_nonempty_lines  # noqa: E402
+from app.sentence_split import build_sentences_array  # noqa: E402
+from app.text_normalize import normalize_text  # noqa: E402
+
+SURFACES = {"เม.ย.": "เมษายน", "พ.ศ.": "พุทธศักราช", "ตร.กม.": "ตารางกิโลเมตร", "กรุงเทพฯ": "กรุงเทพมหานคร"}
+
+
+def fake_model(text: str) -> List[Tuple[str, float]]:
+    """Deterministic stand-in for abbreviation_to_full_text: expands SURFACES only."""
+    best = text
+    for abbr, full in SURFACES.items():
+        best = best.replace(abbr, full)
+    return [] if best == text else [(best, 0.9), (text, 0.1)]
+
+
+def reference_expand(text: str, model=None) -> Tuple[str, list]:
+    """expand_abbreviation_for_text before the prefilter and cache: every non-empty text hits the model."""
+    if not text:
+        return text, []
+    cands = [(str(c[0]), _to_float(c[1])) for c in (model or abbreviation.abbreviation_to_full_text)(text) or []]
+    if not cands:
+        return text, []
+    return max(cands, key=lambda it: -1e18 if it[1] is None else it[1])[0], cands
+
+
+def reference_fields(doc: dict, model) -> dict | None:
+    out, changed = [], False
+    for item in doc.get("sentences") or []:
+        text = str((item or {}).get("text", ""))
+        best, _ = reference_expand(text, model)
+        new_item = dict(item)
+        if best and best != text:
+            new_item["text"] = best
+            changed = True
+        out.append(new_item)
+    return {"sentences": out} if changed else None
+
+
+def fixture_texts(articles) -> List[str]:
+    texts = []
+    for art in articles:
+        for line in split_nonempty_lines(art["content"]):
+            texts.extend(s["text"] for s in build_sentences_array(normalize_text(line)))
+    return texts
+
+
+@pytest.fixture()
+def model(monkeypatch):
+    calls: List[str] = []
+
+    def counting(text):
+        calls.append(text)
+        return fake_model(text)
+
+    monkeypatch.setattr(abbreviation, "abbreviation_to_full_text", counting)
+    return calls
+
+
+def test_prefilter_keeps_every_abbreviation_shape():
+    for text in ["เม.ย.", "วันที่ 21 เม.ย. 2568", "พ.ศ.2325", "กรุงเทพฯ", "ฯลฯ", "1,568.737 ตร.กม."]:
+        assert may_contain_abbreviation(text), text
+    for text in ["", "ข้อความธรรมดา", "3.14", "version 1.2.3", "Mr. Smith", "ก ข ค", "จบ ."]:
+        assert not may_contain_abbreviation(text), text
+
+
+def test_prefiltered_texts_get_no_expansion_from_the_model(articles):
+    # Real model: a text the prefilter rejects must come back unchanged without the prefilter
+    rejected = [t for t in fixture_texts(articles) if not may_contain_abbreviation(t)]
+    assert rejected
+    for text in rejected[:300]:
+        best, _ = reference_expand(text)
+        assert best == text, text
+
+
+def test_cached_expansion_matches_uncached_path(articles, model):
+    texts = fixture_texts(articles)
+    rng = random.Random(41)
+    docs = [{"sentences": [{"text": t, "pos": "X"} for t in rng.sample(texts, 12)]} for _ in range(60)]
+    expected = [reference_fields(d, fake_model) for d in docs]
+    assert any(e is not None for e in expected)
+
+    store = mongomock.MongoClient().db.abbreviation_cache
+    cache = AbbreviationCache(store, maxsize=16)
+    for i in range(0, len(docs), 7):
+        chunk = docs[i:i + 7]
+        expansions = cache.expand_many([item["text"] for d in chunk for item in d["sentences"]])
+        assert [_abbreviation_fields(d, expansions) for d in chunk] == expected[i:i + 7]
+
+    # Each distinct text with an abbreviation shape reaches the model once, even after LRU eviction
+    all_texts = [item["text"] for d in docs for item in d["sentences"]]
+    shaped = {t for t in all_texts if may_contain_abbreviation(t)}
+    assert sorted(model) == sorted(shaped)
+    assert cache.stats.model_calls == len(shaped)
+    assert cache.stats.skipped == sum(1 for t in all_texts if t not in shaped)
+    assert len(cache._lru) <= 16
+
+    # A new process finds them all in the persistent store
+    model.clear()
+    again = AbbreviationCache(store, maxsize=16)
+    assert again.expand_many(all_texts) == cache.expand_many(all_texts)
+    assert model == [] and again.stats.stored_hits == len(shaped)
+
+
+def test_lru_only_cache_stays_bounded(articles, model):
+    texts = [t for t in fixture_texts(articles) if may_contain_abbreviation(t)]
+    cache = AbbreviationCache(None, maxsize=4)
+    for t in texts * 2:
+        assert cache.expand_many([t]) == {t: reference_expand(t, fake_model)}
+        assert len(cache._lru) <= 4
+    assert cache.stats.lru_hits + cache.stats.model_calls == len(texts) * 2
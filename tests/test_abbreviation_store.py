@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import mongomock
+import pytest
+
+from app.abbreviation_store import (
+    candidate_pairs,
+    expand_with_table,
+    find_surfaces,
+    load_abbreviation_table,
+    record_candidates,
+)
+
+MONTHS = {
+    "ม.ค.": "มกราคม", "ก.พ.": "กุมภาพันธ์", "มี.ค.": "มีนาคม", "เม.ย.": "เมษายน",
+    "พ.ค.": "พฤษภาคม", "มิ.ย.": "มิถุนายน", "ก.ค.": "กรกฎาคม", "ส.ค.": "สิงหาคม",
+    "ก.ย.": "กันยายน", "ต.ค.": "ตุลาคม", "พ.ย.": "พฤศจิกายน", "ธ.ค.": "ธันวาคม",
+}
+
+
+def _surfaces(text):
+    return [text[a:b] for a, b in find_surfaces(text)]
+
+
+@pytest.mark.parametrize("abbr", sorted(MONTHS))
+def test_month_abbreviations_are_whole_surfaces(abbr):
+    assert _surfaces(f"วันที่ 5 {abbr} 2567") == [abbr]
+    assert _surfaces(f"{abbr}2567") == [abbr]
+    assert _surfaces(f"({abbr})") == [abbr]
+
+
+@pytest.mark.parametrize("abbr", sorted(MONTHS))
+def test_month_candidate_pairs_map_whole_abbreviation(abbr):
+    full = MONTHS[abbr]
+    text = f"ประชุมวันที่ 5 {abbr} 2567"
+    assert candidate_pairs(text, [(text.replace(abbr, full), 0.9)]) == [(abbr, full, 0.9)]
+
+
+def test_other_dotted_abbreviations():
+    assert _surfaces("พ.ศ. 2500 ดร.สมชาย ระยะ 5 ตร.กม.") == ["พ.ศ.", "ดร.", "ตร.กม."]
+
+
+def test_dotted_cluster_glued_to_thai_word_is_not_a_surface():
+    assert _surfaces("ประเทศไทยก.พ.") == []
+    assert _surfaces("มี.ค.") == ["มี.ค."]
+
+
+def test_table_expansion_does_not_corrupt_vowels():
+    table = {"มี.ค.": "มีนาคม", "ค.": "คม"}
+    assert expand_with_table("วันที่ 1 มี.ค. 2567", table) == "วันที่ 1 มีนาคม 2567"
+
+
+def test_record_candidates_counts_each_text_once():
+    db = mongomock.MongoClient().db
+    table, sources = db.abbreviation, db.abbreviation_sources
+    text = "วันที่ 5 ก.พ. 2567"
+    cands = [("วันที่ 5 กุมภาพันธ์ 2567", 0.8)]
+    assert record_candidates(table, [(text, cands), (text, cands)], sources=sources) == 1
+    # Rerun (or cache hit) of the same text adds nothing
+    assert record_candidates(table, [(text, cands)], sources=sources) == 0
+    other = "เดือน ก.พ. มีฝนน้อย"
+    record_candidates(table, [(other, [("เดือน กุมภาพันธ์ มีฝนน้อย", 0.6)])], sources=sources)
+    row = table.find_one({"abbr": "ก.พ.", "expansion": "กุมภาพันธ์"})
+    assert row["count"] == 2
+    assert row["score_sum"] == pytest.approx(1.4)
+    assert load_abbreviation_table(table, min_count=2) == {"ก.พ.": "กุมภาพันธ์"}
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import random
+import unicodedata
+
+from app.align import align_tokens
+
+
+def _check_monotonic(text, starts, ends):
+    pos = 0
+    for s, e in zip(starts, ends):
+        if s is None:
+            assert e is None
+            continue
+        assert pos <= s <= e <= len(text)
+        pos = e
+
+
+def _pieces(rng, text):
+    """Split `text` into tokens at random points, dropping whitespace like keep_whitespace=False."""
+    out = []
+    for word in text.split():
+        while word:
+            k = rng.randint(1, len(word))
+            out.append(word[:k])
+            word = word[k:]
+    return out
+
+
+def test_literal_tokens_round_trip(articles):
+    rng = random.Random(47)
+    for art in articles:
+        text = art["content"]
+        tokens = _pieces(rng, text)
+        starts, ends = align_tokens(text, tokens)
+        _check_monotonic(text, starts, ends)
+        assert [text[s:e] for s, e in zip(starts, ends)] == tokens
+
+
+def test_unmatched_tokens_get_no_offsets_and_do_not_shift_the_rest():
+    rng = random.Random(470)
+    alphabet = list("กขคงจ่้ะา ab1 ")
+    junk = ["#", "@@", "ฮฮฮ", "XYZ"]
+    for _ in range(3000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+        tokens = _pieces(rng, text)
+        real = set(range(len(tokens)))
+        for _ in range(rng.randint(0, 4)):
+            i = rng.randint(0, len(tokens))
+            tokens.insert(i, rng.choice(junk))
+            real = {j + (j >= i) for j in real}
+        starts, ends = align_tokens(text, tokens)
+        _check_monotonic(text, starts, ends)
+        for i, tk in enumerate(tokens):
+            if i in real:
+                assert text[starts[i]:ends[i]] == tk, (text, tokens, i)
+            else:
+                assert starts[i] is None and ends[i] is None, (text, tokens, i)
+
+
+def test_loose_matches_fold_to_the_token():
+    rng = random.Random(4700)
+    wide = {c: unicodedata.normalize("NFKC", c) for c in "１２３ＡＢ"}
+    alphabet = list(wide) + list("กขค ")
+    for _ in range(3000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 40)))
+        # The tokenizer hands back folded text and merges across single spaces
+        tokens = [unicodedata.normalize("NFKC", w) for w in text.replace(" ", "", rng.randint(0, 2)).split()]
+        starts, ends = align_tokens(text, tokens)
+        _check_monotonic(text, starts, ends)
+        for tk, s, e in zip(tokens, starts, ends):
+            assert s is not None, (text, tokens)
+            piece = text[s:e]
+            assert piece == tk or "".join(unicodedata.normalize("NFKC", piece).split()) == tk, (text, tokens)
+
+
+def test_empty_tokens_and_long_gaps():
+    text = "ก" + " " * 200 + "ข"
+    starts, ends = align_tokens(text, ["ก", "", "ข"])
+    assert starts == [0, None, 201]
+    assert ends == [1, None, 202]
+    starts, ends = align_tokens("", ["ก"])
+    assert starts == [None] and ends == [None]
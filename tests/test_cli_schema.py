@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import pytest
+
+from app.__main__ import build_parser, main
+
+
+@pytest.mark.parametrize("argv, options", [
+    (["sentences", "--batch", "10", "--server"], "--batch, --server"),
+    (["sentences", "--workers", "2", "--lease", "--from-start"], "--workers, --lease, --from-start"),
+    (["tag-num", "--workers", "2", "--server"], "--workers, --server"),
+    (["sentence-token", "--batch", "10"], "--batch"),
+    (["connectors", "--lease"], "--lease"),
+    (["abbreviation", "--workers", "4"], "--workers"),
+    (["sentence-heads", "--workers", "4"], "--workers"),
+])
+def test_ignored_flags_are_rejected_with_sentences_schema(argv, options, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(argv + ["--schema", "sentences"])
+    assert exc.value.code == 2
+    assert f"{options} not supported with --schema sentences" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv", [
+    ["sentences", "--workers", "2", "--server"],
+    ["sentences", "--schema", "sentences", "--limit", "5", "--all"],
+    ["tag-num", "--schema", "sentences", "--batch", "10", "--lease", "--from-start"],
+    ["abbreviation", "--schema", "sentences", "--workers", "0", "--batch", "10"],
+    ["tokenize", "--schema", "sentences", "--workers", "2"],
+])
+def test_supported_combinations_pass(argv):
+    args = build_parser().parse_args(argv)
+    check = getattr(args, "check_schema", None)
+    if check is not None:
+        check(args)
@@ -0,0 +1,63 @@
+"""Light CLI commands must not import the heavy NLP/ML packages (see __main__.py).
+
+Each command runs in a fresh interpreter. Importable stand-ins for the heavy packages come
+first on the path, so a lazy import that regressed would show up in sys.modules rather than
+fail for lack of the real package; MongoDB is replaced by mongomock.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from conftest import ROOT
+
+HEAVY = ("torch", "stanza", "sentence_transformers", "pythainlp", "gensim")
+
+DRIVER = textwrap.dedent("""
+    import json, sys
+    import mongomock
+    import app.db
+
+    client = mongomock.MongoClient()
+    app.db.get_collection = lambda name, bulk=False: client.db[name]
+    client.db.corpus.insert_one({"_id": 1, "raw": {"content": "เวลา 10:30 น.  ข้อความ"}})
+    from app.__main__ import main
+
+    try:
+        main(json.loads(sys.argv[1]))
+    except SystemExit:
+        pass
+    print(json.dumps([m for m in json.loads(sys.argv[2]) if m in sys.modules]))
+""")
+
+
+@pytest.fixture(scope="module")
+def stub_path(tmp_path_factory):
+    root = tmp_path_factory.mktemp("heavy")
+    for name in HEAVY:
+        (root / name).mkdir()
+        (root / name / "__init__.py").write_text("")
+    return root
+
+
+@pytest.mark.parametrize("argv", [
+    ["greet"],
+    ["sentences", "--help"],
+    ["sentences"],
+    ["thai-clock"],
+    ["tag-num"],
+    ["connectors"],
+    ["plan"],
+])
+def test_light_commands_skip_heavy_imports(stub_path, argv):
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join([str(stub_path), str(ROOT / "src")])}
+    out = subprocess.run(
+        [sys.executable, "-c", DRIVER, json.dumps(argv), json.dumps(HEAVY)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    assert json.loads(out.strip().splitlines()[-1]) == []
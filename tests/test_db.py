@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import importlib.util
+
+from app.db import bulk_write_concern, usable_compressors
+
+
+def test_bulk_write_concern_defaults_to_server(monkeypatch):
+    monkeypatch.delenv("MONGO_BULK_W", raising=False)
+    monkeypatch.delenv("MONGO_BULK_J", raising=False)
+    assert bulk_write_concern() is None
+
+
+def test_bulk_write_concern_from_env(monkeypatch):
+    monkeypatch.setenv("MONGO_BULK_W", "majority")
+    monkeypatch.delenv("MONGO_BULK_J", raising=False)
+    assert bulk_write_concern().document == {"w": "majority"}
+    monkeypatch.setenv("MONGO_BULK_W", "0")
+    monkeypatch.setenv("MONGO_BULK_J", "false")
+    assert bulk_write_concern().document == {"w": 0, "j": False}
+
+
+def test_compressors_without_their_package_fall_back(monkeypatch):
+    real = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None if name in ("zstandard", "snappy") else real(name))
+    assert usable_compressors("zstd,snappy,zlib") == "zlib"
+    assert usable_compressors("zstd") == "zlib"
+    assert usable_compressors(" ZLIB ") == "zlib"
+
+
+def test_compressors_with_their_package_are_kept(monkeypatch):
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: object())
+    assert usable_compressors("zstd, snappy,zlib") == "zstd,snappy,zlib"
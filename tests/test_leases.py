@@ -0,0 +1,95 @@
+"""Lease mode against a real server ($$NOW and pipeline updates are not emulated by mongomock).
+
+Uses MONGO_TEST_URI (default mongodb://localhost:27017) and skips when no server answers.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import multiprocessing
+import os
+import uuid
+from collections import Counter
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from app.leases import Lease, lease_field
+from app.stage_runner import run_stage
+
+URI = os.getenv("MONGO_TEST_URI", "mongodb://localhost:27017")
+FLAG = "lease_test"
+
+
+@pytest.fixture()
+def db_name():
+    try:
+        client = MongoClient(URI, serverSelectionTimeoutMS=1000)
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"no MongoDB at {URI}")
+    name = f"wiki_nlp_test_{uuid.uuid4().hex[:8]}"
+    yield name
+    client.drop_database(name)
+    client.close()
+
+
+def _run_worker(db_name: str, owner: str, missing_only: bool, batch: int = 7) -> None:
+    db = MongoClient(URI)[db_name]
+    log = db.log
+
+    def compute(doc):
+        log.insert_one({"doc": doc["_id"], "owner": owner})
+        return {"seen_by": owner}
+
+    filt = {f"process.{FLAG}": {"$exists": False}} if missing_only else {}
+    run_stage(db.corpus, filt, FLAG, compute=compute, projection={"_id": 1}, batch=batch, lease=Lease(owner, ttl=30))
+
+
+def _processed(db) -> Counter:
+    return Counter(d["doc"] for d in db.log.find({}, {"doc": 1}))
+
+
+def test_concurrent_workers_process_each_document_once(db_name):
+    db = MongoClient(URI)[db_name]
+    db.corpus.insert_many([{"_id": i} for i in range(300)])
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_run_worker, args=(db_name, f"w{i}", True)) for i in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(120)
+        assert p.exitcode == 0
+    counts = _processed(db)
+    assert len(counts) == 300
+    assert set(counts.values()) == {1}
+    assert db.corpus.count_documents({f"process.{FLAG}": True}) == 300
+    assert db.corpus.count_documents({f"{lease_field(FLAG)}.owner": {"$exists": True}}) == 0
+
+
+def test_all_mode_ends_after_one_pass(db_name):
+    db = MongoClient(URI)[db_name]
+    db.corpus.insert_many([{"_id": i, "process": {FLAG: True}} for i in range(50)])
+    _run_worker(db_name, "solo", missing_only=False)
+    counts = _processed(db)
+    assert len(counts) == 50
+    assert set(counts.values()) == {1}
+    # A later --all run processes everything again, once
+    _run_worker(db_name, "solo", missing_only=False)
+    assert set(_processed(db).values()) == {2}
+
+
+def test_expired_lease_is_reclaimed(db_name):
+    db = MongoClient(URI)[db_name]
+    past = dt.datetime.utcnow() - dt.timedelta(hours=1)
+    future = dt.datetime.utcnow() + dt.timedelta(hours=1)
+    field = lease_field(FLAG).split(".", 1)[1]
+    db.corpus.insert_many([
+        {"_id": "expired", "process": {field: {"owner": "dead", "token": "t1", "expires": past}}},
+        {"_id": "held", "process": {field: {"owner": "alive", "token": "t2", "expires": future}}},
+        {"_id": "free"},
+    ])
+    _run_worker(db_name, "rescuer", missing_only=True)
+    assert dict(_processed(db)) == {"expired": 1, "free": 1}
+    held = db.corpus.find_one({"_id": "held"})
+    assert held["process"][field]["owner"] == "alive"
@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import copy
+import random
+import re
+from typing import Dict, List, Optional, Sequence
+
+import pytest
+
+from app.constants import (
+    CURRENCY_SYMBOLS,
+    CURRENCY_WORDS,
+    ERA_TOKENS,
+    PERCENT_TOKENS,
+    RE_DECIMAL,
+    RE_FRACTION,
+    RE_INT,
+    RE_PERCENT,
+    RE_PHONE,
+    RE_RANGE,
+    RE_THOUSANDS,
+    RE_TIME,
+    THAI_DIGIT_MAP,
+    THAI_MONTHS,
+    TIME_TOKENS,
+    UNIT_AREA,
+    UNIT_DISTANCE,
+    UNIT_TIME,
+    UNIT_VOLUME,
+    UNIT_WEIGHT,
+)
+from app.lexicon import ORDINAL_TOKENS, UNIT_TYPES, WORD_TYPES, is_number_like, numeric_shape, normalize_digits
+
+_SHAPES = (RE_INT, RE_DECIMAL, RE_THOUSANDS, RE_TIME, RE_FRACTION, RE_RANGE, RE_PERCENT, RE_PHONE)
+
+# -------------------------------
+# References: the per-pattern / per-set code before lexicon.py
+# -------------------------------
+
+
+def _normalize_digits(text: str) -> str:
+    return (text or "").translate(THAI_DIGIT_MAP)
+
+
+def ref_is_number_like(text: str) -> bool:
+    """tokenize._is_number_like."""
+    if not text:
+        return False
+    s = _normalize_digits(text.strip())
+    if not any(ch.isdigit() for ch in s):
+        return False
+    return any(p.match(s) is not None for p in _SHAPES)
+
+
+def ref_is_numeric_like(text: str) -> bool:
+    """num_tag.is_numeric_like."""
+    if not text:
+        return False
+    s = text.strip().translate(THAI_DIGIT_MAP)
+    if not re.search(r"\d", s):
+        return False
+    return any(p.match(s) is not None for p in _SHAPES)
+
+
+def ref_classify_numeric(idx: int, words: Sequence[Dict]) -> Optional[str]:
+    cur = words[idx]
+    text = cur.get("text", "")
+    t_norm = _normalize_digits(text)
+    upos = (cur.get("pos") or cur.get("upos") or "").upper()
+    prev_w = words[idx - 1] if idx - 1 >= 0 else None
+    next_w = words[idx + 1] if idx + 1 < len(words) else None
+    prev = (prev_w or {}).get("text", "")
+    next = (next_w or {}).get("text", "")
+    if RE_TIME.match(t_norm):
+        return "TIME"
+    if (next in PERCENT_TOKENS) or (text in PERCENT_TOKENS) or RE_PERCENT.match(t_norm):
+        return "PERCENT"
+    if (prev in CURRENCY_SYMBOLS) or (next in CURRENCY_SYMBOLS) or (prev in CURRENCY_WORDS) or (next in CURRENCY_WORDS):
+        return "MONEY"
+    if next in UNIT_DISTANCE:
+        return "DISTANCE"
+    if next in UNIT_VOLUME:
+        return "VOLUME"
+    if next in UNIT_WEIGHT:
+        return "WEIGHT"
+    if next in UNIT_AREA:
+        return "AREA"
+    if next in UNIT_TIME:
+        return "DURATION"
+    if next in TIME_TOKENS:
+        return "TIME"
+    if (prev in ERA_TOKENS) or (next in ERA_TOKENS):
+        return "YEAR"
+    if (prev == "ปี") or (next == "ปี"):
+        try:
+            val = int("".join(ch for ch in t_norm if ch.isdigit()))
+            if val >= 1000:
+                return "YEAR"
+        except Exception:
+            pass
+        if next == "ปี":
+            return "DURATION"
+    if (prev in THAI_MONTHS) or (next in THAI_MONTHS):
+        return "DATE"
+    if upos == "NUM":
+        return "NUMBER"
+    return None
+
+
+def ref_classify_non_numeric(idx: int, words: Sequence[Dict]) -> Optional[str]:
+    text = words[idx].get("text", "")
+    if text in THAI_MONTHS:
+        return "MONTH"
+    if text in CURRENCY_SYMBOLS or text in CURRENCY_WORDS:
+        return "CURRENCY"
+    if text in UNIT_DISTANCE:
+        return "UNIT_DISTANCE"
+    if text in UNIT_VOLUME:
+        return "UNIT_VOLUME"
+    if text in UNIT_WEIGHT:
+        return "UNIT_WEIGHT"
+    if text in UNIT_AREA:
+        return "UNIT_AREA"
+    if text in UNIT_TIME or text in TIME_TOKENS:
+        return "TIME_UNIT"
+    if text in ERA_TOKENS:
+        return "ERA"
+    if text in PERCENT_TOKENS:
+        return "PERCENT_SIGN"
+    if text in {"อันดับ", "อันดับที่", "ครั้ง", "ครั้งที่", "ที่"}:
+        return "ORDINAL_MARK"
+    return None
+
+
+def ref_assign_types(words: List[Dict]) -> None:
+    for i, w in enumerate(words):
+        upos = (w.get("pos") or w.get("upos") or "").upper()
+        if upos == "NUM" or ref_is_number_like(w.get("text", "")):
+            t = ref_classify_numeric(i, words)
+        else:
+            t = ref_classify_non_numeric(i, words)
+        if t:
+            w["type"] = t
+
+
+# -------------------------------
+# Inputs
+# -------------------------------
+
+DOMAIN_WORDS = sorted(
+    set(THAI_MONTHS) | set(CURRENCY_WORDS) | set(CURRENCY_SYMBOLS) | set(UNIT_DISTANCE) | set(UNIT_VOLUME)
+    | set(UNIT_WEIGHT) | set(UNIT_AREA) | set(UNIT_TIME) | set(TIME_TOKENS) | set(ERA_TOKENS)
+    | set(PERCENT_TOKENS) | ORDINAL_TOKENS
+)
+OTHER_WORDS = ["ปี", "บ้าน", "และ", "ของ", "", "x", "ปีที่", "km", "%"]
+
+
+def random_number(rng: random.Random) -> str:
+    digits = "0123456789" if rng.random() < 0.7 else "๐๑๒๓๔๕๖๗๘๙"
+
+    def d(lo: int, hi: int) -> str:
+        return "".join(rng.choice(digits) for _ in range(rng.randint(lo, hi)))
+
+    shape = rng.choice([
+        lambda: d(1, 6),
+        lambda: rng.choice("+-") + d(1, 4),
+        lambda: d(1, 4) + rng.choice(".,") + d(1, 3),
+        lambda: d(1, 3) + "".join(rng.choice(" ,.'’") + d(3, 3) for _ in range(rng.randint(1, 3))),
+        lambda: d(1, 2) + ":" + d(2, 2) + (":" + d(2, 2) if rng.random() < 0.3 else ""),
+        lambda: d(1, 3) + "/" + d(1, 3),
+        lambda: d(1, 4) + rng.choice("-–—") + d(1, 4),
+        lambda: d(1, 3) + rng.choice(["", ".5", ",25"]) + "%",
+        lambda: rng.choice(["", "+"]) + d(1, 3) + rng.choice(["-", " ", "(", ")"]) + d(3, 4) + "-" + d(3, 4),
+        lambda: "".join(rng.choice(digits + "+-.,:/%() ’'–xก²") for _ in range(rng.randint(1, 10))),
+    ])()
+    if rng.random() < 0.1:
+        shape = rng.choice([" ", "\t"]) + shape + rng.choice(["", " "])
+    return shape
+
+
+def random_word(rng: random.Random) -> str:
+    r = rng.random()
+    if r < 0.4:
+        return random_number(rng)
+    if r < 0.8:
+        return rng.choice(DOMAIN_WORDS)
+    return rng.choice(OTHER_WORDS)
+
+
+# -------------------------------
+# Tests
+# -------------------------------
+
+
+def test_is_number_like_matches_references():
+    rng = random.Random(44)
+    samples = [random_number(rng) for _ in range(50000)] + DOMAIN_WORDS + OTHER_WORDS + ["", "   ", "²", "๑"]
+    for s in samples:
+        expected = ref_is_number_like(s)
+        assert ref_is_numeric_like(s) == expected, repr(s)
+        assert is_number_like(s) == expected, repr(s)
+        shape = numeric_shape(normalize_digits(s.strip()))
+        assert (shape is not None) == expected, repr(s)
+
+
+def test_word_types_match_set_precedence():
+    for w in DOMAIN_WORDS:
+        assert WORD_TYPES.get(w) == ref_classify_non_numeric(0, [{"text": w}]), w
+    for w in OTHER_WORDS:
+        if w not in DOMAIN_WORDS:
+            assert w not in WORD_TYPES
+
+
+def test_unit_types_match_following_unit_precedence():
+    def ref_unit_type(next: str) -> Optional[str]:
+        # The following-unit chain of _classify_numeric
+        for words, t in ((UNIT_DISTANCE, "DISTANCE"), (UNIT_VOLUME, "VOLUME"), (UNIT_WEIGHT, "WEIGHT"),
+                         (UNIT_AREA, "AREA"), (UNIT_TIME, "DURATION"), (TIME_TOKENS, "TIME")):
+            if next in words:
+                return t
+        return None
+
+    for w in DOMAIN_WORDS + OTHER_WORDS:
+        assert UNIT_TYPES.get(w) == ref_unit_type(w), w
+
+
+def test_assign_types_matches_reference_on_random_windows():
+    tokenize = pytest.importorskip("app.tokenize", reason="tokenize needs stanza, torch and pythainlp")
+    rng = random.Random(440)
+    for _ in range(20000):
+        words = []
+        for _ in range(rng.randint(1, 6)):
+            w: Dict = {"text": random_word(rng)}
+            key = rng.choice(["pos", "upos", None])
+            if key:
+                w[key] = rng.choice(["NUM", "num", "NOUN", "", None])
+            words.append(w)
+        expected = copy.deepcopy(words)
+        ref_assign_types(expected)
+        tokenize._assign_types(words)
+        assert words == expected
@@ -0,0 +1,77 @@
+"""--server (pipeline updates on MongoDB) against the Python path on the fixture corpus.
+
+Pipeline updates are not emulated by mongomock, so this needs a real server: MONGO_TEST_URI
+(default mongodb://localhost:27017); skips when none answers.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from app.num_tag import tag_corpus_numbers
+from app.sentence_split import update_corpus_sentences
+from app.thai_clock import update_corpus_thai_clock
+
+URI = os.getenv("MONGO_TEST_URI", "mongodb://localhost:27017")
+
+
+@pytest.fixture()
+def db():
+    try:
+        client = MongoClient(URI, serverSelectionTimeoutMS=1000)
+        client.admin.command("ping")
+    except PyMongoError:
+        pytest.skip(f"no MongoDB at {URI}")
+    name = f"wiki_nlp_test_{uuid.uuid4().hex[:8]}"
+    yield client[name]
+    client.drop_database(name)
+    client.close()
+
+
+# Unicode whitespace and Thai digits, where PCRE's ASCII classes and Python's \s/\d differ
+EXTRA = {"title": "unicode", "content": "ก\u00a0ข\u2003ค\u3000๑๒:๓๐ น. 10:30น ตรง\u2028๕"}
+
+
+def _load(col, articles):
+    col.insert_many([
+        {"_id": i, "title": art["title"], "raw": {"content": art["content"]}}
+        for i, art in enumerate([*articles, EXTRA])
+    ])
+
+
+def _run_pipeline(col, server: bool) -> None:
+    update_corpus_thai_clock(col, batch=7, server=server)
+    update_corpus_sentences(col, batch=7, server=server)
+    tag_corpus_numbers(col, batch=7, missing_only=True, server=server)
+
+
+def _comparable(doc: dict) -> dict:
+    """The document without updated_at; stamps reduced to their version (server stamps carry no hash)."""
+    out = {k: v for k, v in doc.items() if k != "updated_at"}
+    out["process"] = {k: v.get("v") if isinstance(v, dict) else v for k, v in (doc.get("process") or {}).items()}
+    return out
+
+
+def test_server_mode_matches_python_path(db, articles):
+    _load(db.server, articles)
+    _load(db.python, articles)
+    _run_pipeline(db.server, server=True)
+    _run_pipeline(db.python, server=False)
+
+    server_docs = [_comparable(d) for d in db.server.find().sort("_id", 1)]
+    python_docs = [_comparable(d) for d in db.python.find().sort("_id", 1)]
+    assert len(server_docs) == len(articles) + 1
+    for s, p in zip(server_docs, python_docs):
+        assert s == p, s["title"]
+    assert all(set(d["process"]) == {"thai_clock", "sentence_split", "num_tag"} for d in server_docs)
+
+
+def test_server_mode_respects_limit(db, articles):
+    _load(db.corpus, articles)
+    n = update_corpus_sentences(db.corpus, limit=2, server=True)
+    assert n <= 2
+    assert db.corpus.count_documents({"process.sentence_split": {"$exists": True}}) == 2
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import random
+from typing import Dict, List, Optional
+
+from app.sentence_heads import _lemma_or_text, build_sentence_heads, resolve_head_tokens
+
+
+def reference_sentence_heads(tokens: List[dict]) -> List[dict]:
+    """build_sentence_heads before the single-pass index (one token scan per head)."""
+    if not tokens:
+        return []
+    id_to_tok: Dict[int, dict] = {}
+    for t in tokens:
+        try:
+            tid = int(t.get("id"))
+        except Exception:
+            continue
+        id_to_tok[tid] = t
+    heads: List[int] = []
+    seen = set()
+    for t in tokens:
+        h = t.get("head")
+        if isinstance(h, int) and h not in seen:
+            heads.append(h)
+            seen.add(h)
+    out: List[dict] = []
+    for h in heads:
+        if h == 0:
+            continue
+        group: List[dict] = []
+        for t in tokens:
+            try:
+                tid = int(t.get("id"))
+            except Exception:
+                continue
+            if t.get("head") == h or tid == h:
+                group.append(t)
+        try:
+            group.sort(key=lambda x: int(x.get("id")))
+        except Exception:
+            pass
+        head_tok: Optional[dict] = id_to_tok.get(h)
+        head_text = _lemma_or_text(head_tok) if head_tok else str(h)
+        text = " ".join(_lemma_or_text(t) for t in group).strip()
+        out.append({"head": head_text, "text": text, "tokens": group})
+    return out
+
+
+def random_tree(rng: random.Random, n: int) -> List[dict]:
+    toks = []
+    for i in range(1, n + 1):
+        tok = {"id": i, "text": f"w{i}", "head": rng.randint(0, i - 1) if i > 1 else 0}
+        if rng.random() < 0.7:
+            tok["lemma"] = f"l{i}"
+        toks.append(tok)
+    return toks
+
+
+def malformed(rng: random.Random, toks: List[dict]) -> List[dict]:
+    """Shuffle, duplicate ids, string/float/missing ids and heads, dangling heads."""
+    out = [dict(t) for t in toks]
+    for t in out:
+        r = rng.random()
+        if r < 0.1:
+            t["id"] = str(t["id"])
+        elif r < 0.15:
+            t["id"] = None
+        elif r < 0.2:
+            t["head"] = float(t["head"])
+        elif r < 0.25:
+            t["head"] = str(t["head"])
+        elif r < 0.3:
+            t["head"] = len(out) + rng.randint(1, 5)
+        elif r < 0.33:
+            t.pop("head")
+        elif r < 0.36:
+            t["lemma"] = ""
+    if out and rng.random() < 0.3:
+        out.append(dict(rng.choice(out)))
+    if rng.random() < 0.5:
+        rng.shuffle(out)
+    return out
+
+
+def test_matches_reference_on_random_trees():
+    rng = random.Random(31)
+    for _ in range(2000):
+        toks = random_tree(rng, rng.randint(0, 30))
+        assert build_sentence_heads(toks) == reference_sentence_heads(toks)
+
+
+def test_matches_reference_on_malformed_tokens():
+    rng = random.Random(310)
+    for _ in range(3000):
+        toks = malformed(rng, random_tree(rng, rng.randint(1, 20)))
+        assert build_sentence_heads(toks) == reference_sentence_heads(toks), toks
+
+
+def test_reference_items_resolve_to_the_same_tokens():
+    rng = random.Random(311)
+    for _ in range(500):
+        toks = random_tree(rng, rng.randint(1, 25))
+        embedded = build_sentence_heads(toks)
+        refs = build_sentence_heads(toks, sentence_index=3)
+        assert len(refs) == len(embedded)
+        sentences = {3: {"tokens": toks}}
+        for ref, item in zip(refs, embedded):
+            assert ref["sentence"] == 3
+            assert (ref["head"], ref["text"]) == (item["head"], item["text"])
+            assert resolve_head_tokens(ref, sentences) == item["tokens"]
+
+
+def test_groups_include_the_governor_in_id_order():
+    toks = [
+        {"id": 3, "text": "c", "head": 2},
+        {"id": 1, "text": "a", "head": 2, "lemma": "A"},
+        {"id": 2, "text": "b", "head": 0},
+    ]
+    assert build_sentence_heads(toks) == [
+        {"head": "b", "text": "A b c", "tokens": [toks[1], toks[2], toks[0]]},
+    ]
+    assert build_sentence_heads([]) == []
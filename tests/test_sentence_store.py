@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import mongomock
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app.sentence_store import (
+    ensure_sentence_indexes,
+    explode_corpus_sentences,
+    load_sentences,
+    replace_sentences,
+    sentence_docs,
+)
+
+
+@pytest.fixture()
+def db():
+    return mongomock.MongoClient().db
+
+
+def _texts(col, corpus_id):
+    return [d["text"] for d in load_sentences(col, corpus_id)]
+
+
+def test_replace_sentences_swaps_generations(db):
+    col = db.sentences
+    ensure_sentence_indexes(col)
+    replace_sentences(col, 1, [{"text": "ก"}, {"text": "ข"}])
+    replace_sentences(col, 1, [{"text": "ค"}])
+    assert _texts(col, 1) == ["ค"]
+    assert col.count_documents({"corpus_id": 1}) == 1
+
+
+def test_replace_sentences_keeps_old_generation_when_insert_fails(db, monkeypatch):
+    col = db.sentences
+    ensure_sentence_indexes(col)
+    replace_sentences(col, 1, [{"text": "เดิม"}])
+    real_insert = col.insert_many
+
+    def partial_insert(docs, ordered=True):
+        real_insert(docs[:1], ordered=ordered)
+        raise BulkWriteError({"writeErrors": [{"index": 1}], "nInserted": 1})
+
+    monkeypatch.setattr(col, "insert_many", partial_insert)
+    with pytest.raises(BulkWriteError):
+        replace_sentences(col, 1, [{"text": "ใหม่1"}, {"text": "ใหม่2"}])
+    assert _texts(col, 1) == ["เดิม"]
+
+
+def test_load_sentences_skips_incomplete_newest_generation(db):
+    col = db.sentences
+    old, new = ObjectId(), ObjectId()
+    col.insert_many(sentence_docs(1, [{"text": "ก"}, {"text": "ข"}], old))
+    col.insert_many(sentence_docs(1, [{"text": "ค"}, {"text": "ง"}, {"text": "จ"}], new)[:2])
+    assert _texts(col, 1) == ["ก", "ข"]
+
+
+def test_explode_unsets_only_after_inserts_are_confirmed(db, monkeypatch):
+    corpus, sent = db.corpus, db.sentences
+    corpus.insert_many([
+        {"_id": i, "sentences": [{"text": f"{i}-a"}, {"text": f"{i}-b"}], "process": {"tokenize": True}}
+        for i in range(3)
+    ])
+
+    def failing_bulk_write(ops, ordered=False):
+        raise BulkWriteError({"writeErrors": [{"index": 0}], "nInserted": 0})
+
+    monkeypatch.setattr(sent, "bulk_write", failing_bulk_write)
+    with pytest.raises(BulkWriteError):
+        explode_corpus_sentences(corpus, sent, batch=1, unset=True)
+    assert corpus.count_documents({"sentences": {"$exists": True}}) == 3
+
+    monkeypatch.undo()
+    assert explode_corpus_sentences(corpus, sent, batch=3, unset=True) == 3
+    assert corpus.count_documents({"sentences": {"$exists": True}}) == 0
+    assert _texts(sent, 2) == ["2-a", "2-b"]
+    assert load_sentences(sent, 0)[0]["process"] == {"tokenize": True}
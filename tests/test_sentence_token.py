@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import List
+
+import pytest
+
+pytest.importorskip("pythainlp")
+
+from app import sentence_token  # noqa: E402
+from app.segmenter import split_nonempty_lines  # noqa: E402
+from app.sentence_split import build_sentences_array  # noqa: E402
+from app.sentence_token import CACHE_SIZE, _sentence_token_fields, _split_text, split_texts  # noqa: E402
+from app.text_normalize import normalize_text  # noqa: E402
+
+
+def reference_fields(doc: dict, min_len: int = 0) -> dict | None:
+    """sentence-token before per-document dedupe and caching (sent_tokenize on every item).
+
+    Items shorter than `min_len` are kept as they are (the --min-len gate).
+    """
+    out: List[dict] = []
+    changed = False
+    for item in doc.get("sentences") or []:
+        text = str(item.get("text", ""))
+        if len(text) < min_len:
+            out.append({"text": text})
+            continue
+        subs = [s.strip() for s in (sentence_token.sent_tokenize(text) or []) if s and s.strip()]
+        if subs and not (len(subs) == 1 and subs[0] == text):
+            changed = True
+        if not subs:
+            out.append({"text": text})
+        else:
+            out.extend({"text": s} for s in subs)
+    return {"sentences": out} if changed else None
+
+
+def fixture_docs(articles) -> List[dict]:
+    docs = []
+    for art in articles:
+        for line in split_nonempty_lines(art["content"]):
+            content = normalize_text(line)
+            if content:
+                docs.append({"sentences": build_sentences_array(content)})
+    return docs
+
+
+def test_cached_path_matches_uncached_on_fixture_docs(articles):
+    docs = fixture_docs(articles)
+    expected = [reference_fields(d) for d in docs]
+    _split_text.cache_clear()
+    # Twice over: the second pass is served from the cache
+    for _ in range(2):
+        assert [_sentence_token_fields(d) for d in docs] == expected
+    info = _split_text.cache_info()
+    assert info.hits >= info.misses
+
+
+def test_each_distinct_text_is_tokenized_once(monkeypatch):
+    calls: List[str] = []
+    real = sentence_token.sent_tokenize
+    monkeypatch.setattr(sentence_token, "sent_tokenize", lambda text: calls.append(text) or real(text))
+    _split_text.cache_clear()
+    texts = ["ก ข", "ค", "ก ข", "ค", "ง จ ฉ"]
+    assert set(split_texts(texts)) == set(texts)
+    split_texts(texts)
+    assert sorted(calls) == sorted(set(texts))
+    _split_text.cache_clear()
+
+
+def test_min_len_keeps_short_items_without_tokenizing(monkeypatch, articles):
+    docs = fixture_docs(articles)
+    expected = [reference_fields(d, min_len=30) for d in docs]
+    calls: List[str] = []
+    real = sentence_token.sent_tokenize
+    monkeypatch.setattr(sentence_token, "sent_tokenize", lambda text: calls.append(text) or real(text))
+    _split_text.cache_clear()
+    assert [_sentence_token_fields(d, min_len=30) for d in docs] == expected
+    assert calls and all(len(t) >= 30 for t in calls)
+    _split_text.cache_clear()
+
+
+def test_cache_is_bounded(articles):
+    for doc in fixture_docs(articles):
+        _sentence_token_fields(doc)
+    info = _split_text.cache_info()
+    assert info.maxsize == CACHE_SIZE and info.currsize <= CACHE_SIZE
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import random
+
+import mongomock
+from pymongo import UpdateOne
+
+from app.sentence_split import _sentences_fields
+from app.stage_runner import OpSizeEstimator, estimate_op_bytes, make_executor, run_stage
+from app.stages import stage_stamp
+
+
+def _op(rng: random.Random, i: int, changed: bool):
+    update = {"process.tokenize": {"v": 3, "h": "0123456789abcdef"}}
+    if changed:
+        tokens = [
+            {"id": j + 1, "text": "ก" * rng.randint(1, 8), "pos": "NOUN", "head": 0, "start": j, "end": j + 1}
+            for j in range(rng.randint(5, 80))
+        ]
+        update["sentences"] = [{"text": "x", "tokens": tokens}]
+    return {"_id": i}, {"$set": update, "$currentDate": {"updated_at": True}}
+
+
+def test_op_size_estimator_samples_and_tracks_total():
+    rng = random.Random(36)
+    sizer = OpSizeEstimator(every=16, warmup=8)
+    exact = estimated = changed_ops = 0
+    n = 4000
+    for i in range(n):
+        changed = rng.random() < 0.7
+        q, u = _op(rng, i, changed=changed)
+        size = estimate_op_bytes(q, u)
+        exact += size
+        guess = sizer.estimate(q, u, changed=changed)
+        if changed:
+            # Ops with fields are always sized exactly
+            assert guess == size
+            changed_ops += 1
+        estimated += guess
+    assert sizer.encoded < changed_ops + (n - changed_ops) / 10
+    assert abs(estimated - exact) / exact < 0.01
+
+
+class _Recording:
+    """Collection proxy that records the ops of every bulk_write (one list per flush)."""
+
+    def __init__(self, col):
+        self._col = col
+        self.flushes = []
+
+    def bulk_write(self, ops, **kw):
+        self.flushes.append([(op._filter, op._doc) for op in ops])
+        return self._col.bulk_write(ops, **kw)
+
+    def __getattr__(self, name):
+        return getattr(self._col, name)
+
+
+def _fixture_corpus(articles, copies: int):
+    col = mongomock.MongoClient().db.corpus
+    docs = []
+    for c in range(copies):
+        for k, art in enumerate(articles):
+            docs.append({"_id": c * 100 + k, "raw": {"content": art["content"] * (1 + c % 3)}})
+    col.insert_many(docs)
+    return col
+
+
+def _count_batched(col, batch: int):
+    """The writes of the count-based writer before byte sizing: one bulk_write per `batch` docs."""
+    flushes = []
+    docs = list(col.find({}, projection={"raw.content": 1, "process": 1}).sort("_id", 1))
+    for i in range(0, len(docs), batch):
+        ops = []
+        for doc in docs[i:i + batch]:
+            fields = _sentences_fields(doc)
+            update = {**fields, "process.sentence_split": stage_stamp("sentence_split", doc, fields)}
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": update, "$currentDate": {"updated_at": True}}))
+        col.bulk_write(ops, ordered=False)
+        flushes.append([(op._filter, op._doc) for op in ops])
+    return flushes
+
+
+def _strip(doc):
+    return {k: v for k, v in doc.items() if k != "updated_at"}
+
+
+def test_byte_sized_flushes_stay_under_budget_and_match_count_batching(articles):
+    budget = 64 * 1024
+    col = _Recording(_fixture_corpus(articles, 40))
+    run_stage(col, {}, "sentence_split", compute=_sentences_fields, projection={"raw.content": 1},
+              batch=200, flush_bytes=budget, flush_ms=0, prefetch=8)
+    assert len(col.flushes) > 1
+    for ops in col.flushes:
+        exact = sum(estimate_op_bytes(q, u) for q, u in ops)
+        assert len(ops) == 1 or exact <= budget, (len(ops), exact)
+
+    ref = _fixture_corpus(articles, 40)
+    ref_flushes = _count_batched(ref, 200)
+    assert [op for ops in col.flushes for op in ops] == [op for ops in ref_flushes for op in ops]
+    assert [_strip(d) for d in col.find().sort("_id", 1)] == [_strip(d) for d in ref.find().sort("_id", 1)]
+
+
+def test_process_pool_does_not_fork_after_threads_start(articles):
+    pool = make_executor(2, processes=True)
+    try:
+        assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        pool.shutdown()
+
+    col = _fixture_corpus(articles, 2)
+    ref = _fixture_corpus(articles, 2)
+    run_stage(col, {}, "sentence_split", compute=_sentences_fields, projection={"raw.content": 1},
+              batch=3, workers=2, processes=True)
+    run_stage(ref, {}, "sentence_split", compute=_sentences_fields, projection={"raw.content": 1}, batch=3)
+    assert [_strip(d) for d in col.find().sort("_id", 1)] == [_strip(d) for d in ref.find().sort("_id", 1)]
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import mongomock
+
+from app.stages import (
+    INPUT, MISSING, STAGES, UPSTREAM, VERSION, plan_corpus, plan_document, stage_stamp, stale_reason, stale_stages,
+)
+
+OPTIONS = {
+    "sentence_token": {"min_len": 0},
+    "connector": {"min_len": 25},
+    "abbreviation": {"dictionary_min_count": 0},
+    "tokenize": {"profile": "full", "max_tokens": 120},
+}
+
+
+def _run_all(doc: dict, options: dict) -> dict:
+    doc = {**doc, "process": dict(doc.get("process") or {})}
+    for st in STAGES:
+        doc["process"][st.name] = stage_stamp(st.name, doc, options=options.get(st.name))
+    return doc
+
+
+def test_fresh_pipeline_needs_nothing():
+    doc = _run_all({"raw": {"content": "ข้อความ"}}, OPTIONS)
+    assert plan_document(doc) == {}
+
+
+def test_rerun_with_same_options_keeps_downstream_fresh():
+    doc = _run_all({"raw": {"content": "ข้อความ"}}, OPTIONS)
+    doc["process"]["connector"] = stage_stamp("connector", doc, options={"min_len": 25})
+    assert plan_document(doc) == {}
+
+
+def test_rerun_with_other_options_invalidates_downstream():
+    doc = _run_all({"raw": {"content": "ข้อความ"}}, OPTIONS)
+    doc["process"]["connector"] = stage_stamp("connector", doc, options={"min_len": 40})
+    need = plan_document(doc)
+    assert "connector" not in need
+    assert need["abbreviation"] == INPUT
+    assert need["tokenize"] == UPSTREAM
+    assert need["word_pattern"] == UPSTREAM
+
+
+def test_stamps_without_options_hash_as_before():
+    doc = _run_all({"raw": {"content": "ข้อความ"}}, {})
+    assert all("o" not in doc["process"][st.name] for st in STAGES)
+    assert plan_document(doc) == {}
+
+
+def test_retokenize_makes_wordvec_stale():
+    doc = _run_all({"raw": {"content": "ข้อความ"}}, OPTIONS)
+    assert stale_reason("wordvec", doc) is None
+    doc["process"]["tokenize"] = stage_stamp("tokenize", doc, options={"profile": "pos-only", "max_tokens": 120})
+    assert stale_reason("wordvec", doc) == INPUT
+    assert plan_document(doc)["wordvec"] == INPUT
+    doc["process"]["wordvec"] = {**doc["process"]["wordvec"], "v": 0}
+    assert stale_reason("wordvec", doc) == VERSION
+
+
+def test_stale_reason_ignores_upstream_work_and_legacy_flags():
+    doc = _run_all({"raw": {"content": "ข้อความ"}}, OPTIONS)
+    doc["process"]["abbreviation"] = {"v": 0, "h": None}
+    assert plan_document(doc)["wordvec"] == UPSTREAM
+    assert stale_reason("wordvec", doc) is None
+    doc["process"]["wordvec"] = True
+    assert stale_reason("wordvec", doc) is None
+
+
+def _corpus(*docs):
+    col = mongomock.MongoClient().db.corpus
+    col.insert_many([{**d, "_id": i} for i, d in enumerate(docs)])
+    return col
+
+
+def test_apply_keeps_stages_waiting_only_on_missing_upstream():
+    doc = _run_all({"raw": {"content": "ข้อความ"}}, OPTIONS)
+    del doc["process"]["num_tag"]
+    need = plan_document(doc)
+    assert need["num_tag"] == MISSING and need["connector"] == UPSTREAM
+    assert stale_stages(need) == []
+
+    col = _corpus(doc)
+    counts = plan_corpus(col, apply=True)
+    assert counts["connector"][UPSTREAM] == 1
+    assert col.find_one()["process"] == doc["process"]
+
+
+def test_apply_unsets_stages_behind_a_stale_upstream():
+    doc = _run_all({"raw": {"content": "ข้อความ"}}, OPTIONS)
+    doc["process"]["abbreviation"] = {**doc["process"]["abbreviation"], "v": 0}
+    del doc["process"]["word_pattern"]
+    fresh = _run_all({"raw": {"content": "อื่น"}}, OPTIONS)
+    assert stale_stages(plan_document(doc)) == ["abbreviation", "tokenize", "sentence_heads", "embeddings", "wordvec"]
+
+    col = _corpus(doc, fresh)
+    plan_corpus(col, apply=True)
+    process = col.find_one({"_id": 0})["process"]
+    assert sorted(process) == ["connector", "num_tag", "sentence_split", "sentence_token", "thai_clock"]
+    assert col.find_one({"_id": 1})["process"] == fresh["process"]
+
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.constants import EMOJI_RE, NOISE_RE, WS_RE
+from app.text_normalize import normalize_text
+
+
+def reference_normalize(s: str) -> str:
+    """normalize_text before the single-pass rewrite (five passes)."""
+    if not s:
+        return ""
+    s = EMOJI_RE.sub(" ", s)
+    s = NOISE_RE.sub(" ", s)
+    s = s.replace("\t", " ").replace("\r", " ").replace("\n", " ")
+    s = WS_RE.sub(" ", s)
+    return s.strip()
+
+
+@pytest.mark.parametrize("s", [
+    "",
+    "   ",
+    "กรุงเทพ  มหานคร",
+    "\tแมว\r\nหมา\n",
+    "ยิ้ม😀 \U0001F600\U0001F64F ธง🇹🇭",
+    "a\x00b\x07c\x1fd\x7fe",
+    " ช่องว่าง แปลก　",
+    "✈☀ ✀➿☀⛿",
+])
+def test_matches_reference_cases(s):
+    assert normalize_text(s) == reference_normalize(s)
+
+
+def test_matches_reference_on_articles(articles):
+    for art in articles:
+        for line in art["content"].splitlines():
+            assert normalize_text(line) == reference_normalize(line)
+
+
+def test_matches_reference_fuzz():
+    alphabet = (
+        list("กขคงจฉชซฌญ่้๊๋ะาิีึื abc123.,")
+        + ["\t", "\n", "\r", "\x0b", "\x0c", "\x1c", "\x85", " ", " ", "\x00", "\x08", "\x0e", "\x7f"]
+        + ["😀", "🙏", "🚀", "🇹", "✂", "🤖", "☕", "\U0001F5FF", "\U0001F900"]
+    )
+    rng = random.Random(27)
+    for _ in range(20000):
+        s = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 24)))
+        assert normalize_text(s) == reference_normalize(s), repr(s)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import random
+import re
+
+import pytest
+
+from app.rewrite import ruleset
+from app.thai_clock import transform_thai_clock_in_text
+
+_RE_COLON_TIME = re.compile(r"(?<!\d)(\d{1,2}):(\d{2})(?!\d)")
+_RE_DOT_TIME_N_DOT = re.compile(r"(?<!\d)(?P<h>\d{1,2})\.(?P<m>[0-5]\d)\s*น\.")
+_RE_DOT_TIME_N_SPACE = re.compile(r"(?<!\d)(?P<h>\d{1,2})\.(?P<m>[0-5]\d)\s*น(?= )")
+
+
+def reference_thai_clock(text: str) -> str:
+    """transform_thai_clock_in_text before the single-pass rule set (four passes)."""
+    if not text:
+        return text
+    out = _RE_COLON_TIME.sub(lambda m: f"{m.group(1)}.{m.group(2)}", text)
+    out = _RE_DOT_TIME_N_DOT.sub(lambda m: f"{m.group('h')}.{m.group('m')} นาฬิกา", out)
+    out = _RE_DOT_TIME_N_SPACE.sub(lambda m: f"{m.group('h')}.{m.group('m')} นาฬิกา", out)
+    return re.sub(r"\s{2,}", " ", out).strip()
+
+
+@pytest.mark.parametrize("s, expected", [
+    ("01:00 น.", "01.00 นาฬิกา"),
+    ("1:00 น ", "1.00 นาฬิกา"),
+    ("01.30 น.", "01.30 นาฬิกา"),
+    ("01.30น ตรง", "01.30 นาฬิกา ตรง"),
+    ("1:20", "1.20"),
+    ("อัตรา 1:2 และ 10:300", "อัตรา 1:2 และ 10:300"),
+    ("12.75 น.", "12.75 น."),
+    ("เวลา 9.30น", "เวลา 9.30น"),
+    ("1:12.30 น.", "1.12.30 นาฬิกา"),
+    ("  ช่วง   เช้า\t\n", "ช่วง เช้า"),
+    ("", ""),
+])
+def test_docstring_and_edge_cases(s, expected):
+    assert reference_thai_clock(s) == expected
+    assert transform_thai_clock_in_text(s) == expected
+
+
+def test_matches_reference_on_articles(articles):
+    for art in articles:
+        assert transform_thai_clock_in_text(art["content"]) == reference_thai_clock(art["content"])
+
+
+def test_matches_reference_fuzz():
+    alphabet = list("0123456789:.:. นน.น. \t\nกาเช้า") + ["  ", "น.", "น ", "12:30", "9.45"]
+    rng = random.Random(45)
+    for _ in range(20000):
+        s = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        assert transform_thai_clock_in_text(s) == reference_thai_clock(s), repr(s)
+
+
+def test_rule_hits_are_counted():
+    hits = ruleset("thai_clock").hits
+    before = dict(hits)
+    transform_thai_clock_in_text("01:00 น. และ 1:20  จบ")
+    assert hits["clock_suffix"] == before["clock_suffix"] + 1
+    assert hits["colon_time"] == before["colon_time"] + 1
+    assert hits["spaces"] == before["spaces"] + 1
@@ -0,0 +1,104 @@
+"""Long-sentence chunking and stitching in tokenize, with a stand-in pipeline instead of Stanza."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+tokenize = pytest.importorskip("app.tokenize", reason="tokenize needs stanza, torch and pythainlp")
+
+from app.tokenize import ParseStats, _chunk_bounds, annotate_sentence  # noqa: E402
+
+
+class ChainPipeline:
+    """Parses each pretokenized chunk as a chain: word 1 is the root, word j depends on word j-1."""
+
+    def __init__(self, drop: int = 0):
+        self.calls: List[List[List[str]]] = []
+        self.drop = drop  # sentences to leave out of the result (misbehaving parser)
+
+    def __call__(self, chunks: List[List[str]]):
+        self.calls.append(chunks)
+        sentences = [
+            SimpleNamespace(words=[
+                SimpleNamespace(id=j + 1, text=t, upos="NOUN", lemma=t, head=j, deprel="root" if j == 0 else "dep")
+                for j, t in enumerate(chunk)
+            ])
+            for chunk in chunks
+        ]
+        return SimpleNamespace(sentences=sentences[:len(sentences) - self.drop])
+
+
+def _words(n: int) -> List[str]:
+    return [f"w{i}" for i in range(n)]
+
+
+def _check_cover(bounds, n, max_tokens):
+    assert bounds[0][0] == 0 and bounds[-1][1] == n
+    assert all(b[1] == c[0] for b, c in zip(bounds, bounds[1:]))
+    assert all(0 < b - a <= max_tokens for a, b in bounds)
+
+
+@pytest.mark.parametrize("k", [1, 2, 3, 5])
+def test_exact_multiples_make_full_chunks_and_no_empty_tail(k):
+    bounds = _chunk_bounds(_words(10 * k), 10)
+    assert bounds == [(10 * i, 10 * (i + 1)) for i in range(k)]
+
+
+def test_window_without_a_safe_break_is_cut_at_full_length():
+    bounds = _chunk_bounds(_words(25), 10)
+    assert bounds == [(0, 10), (10, 20), (20, 25)]
+    _check_cover(bounds, 25, 10)
+
+
+def test_cuts_prefer_punctuation_and_connectors():
+    toks = _words(7) + [" "] + _words(6)  # whitespace token at 7: cut after it
+    assert _chunk_bounds(toks, 10)[0] == (0, 8)
+    toks = _words(5) + ["และ"] + _words(8)  # connector at 5: cut before it
+    assert _chunk_bounds(toks, 10)[0] == (0, 5)
+
+
+@pytest.mark.parametrize("n, max_tokens", [(0, 10), (7, 10), (10, 10), (300, 0), (300, -1)])
+def test_short_input_or_no_limit_is_one_chunk(n, max_tokens):
+    assert _chunk_bounds(_words(n), max_tokens) == [(0, n)]
+
+
+def _annotate(monkeypatch, n: int, max_tokens: int, **kw):
+    toks = _words(n)
+    monkeypatch.setattr(tokenize, "_pretok_with_pythainlp", lambda text, cd: text.split(" "))
+    nlp = ChainPipeline(**kw)
+    stats = ParseStats()
+    out = annotate_sentence(" ".join(toks), nlp, max_tokens=max_tokens, stats=stats)
+    return toks, nlp, stats, out
+
+
+@pytest.mark.parametrize("n, max_tokens", [(25, 10), (30, 10), (10, 10), (11, 10), (40, 0)])
+def test_chunks_are_stitched_into_one_tree(monkeypatch, n, max_tokens):
+    toks, nlp, stats, words = _annotate(monkeypatch, n, max_tokens)
+    bounds = _chunk_bounds(toks, max_tokens)
+    assert len(nlp.calls) == 1 and [len(c) for c in nlp.calls[0]] == [b - a for a, b in bounds]
+    assert stats.sentences == 1 and stats.chunked == (len(bounds) > 1)
+
+    # ids run 1..n across chunks, texts and offsets follow the input
+    assert [w["id"] for w in words] == list(range(1, n + 1))
+    assert [w["text"] for w in words] == toks
+    text = " ".join(toks)
+    assert all(text[w["start"]:w["end"]] == w["text"] for w in words)
+
+    # a single root; every later chunk root hangs off it as parataxis; other heads shift by the chunk offset
+    roots = [w for w in words if w["head"] == 0]
+    assert len(roots) == 1 and roots[0]["id"] == 1
+    for a, b in bounds:
+        chunk = words[a:b]
+        if a:
+            assert (chunk[0]["head"], chunk[0]["depparse"]) == (1, "parataxis")
+        for j, w in enumerate(chunk[1:], start=1):
+            assert (w["head"], w["depparse"]) == (a + j, "dep")
+
+
+def test_parser_dropping_a_chunk_falls_back_to_flat_tokens(monkeypatch):
+    toks, _, _, words = _annotate(monkeypatch, 25, 10, drop=1)
+    assert [w["id"] for w in words] == list(range(1, 26))
+    assert all(w["head"] == 0 and w["pos"] is None for w in words)
+    assert [w["text"] for w in words] == toks
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import datetime as dt
+
+import mongomock
+
+from app.stages import STAGES
+from app.watcher import WATCH_STAGES, WatchStage, watch_polling
+
+
+def test_watch_stages_follow_stage_dag_order():
+    order = [st.name for st in STAGES]
+    flags = [ws.flag for ws in WATCH_STAGES]
+    assert flags == sorted(flags, key=order.index)
+    assert "tokenize" in flags
+
+
+def test_polling_picks_up_late_write_at_boundary_timestamp():
+    db = mongomock.MongoClient().db
+    col, state = db.corpus, db.watch_state
+    ts = dt.datetime(2026, 1, 1, 12, 0, 0)
+    col.insert_many([{"_id": i, "updated_at": ts} for i in (5, 6)])
+    dispatched = []
+
+    def run(c, ids):
+        dispatched.extend(ids)
+        c.update_many({"_id": {"$in": ids}}, {"$set": {"process.stage": True}})
+        if 1 not in dispatched and not c.find_one({"_id": 1}):
+            # Written after the cursor passed (5, 6), same millisecond, smaller _id
+            c.insert_one({"_id": 1, "updated_at": ts})
+        return len(ids)
+
+    watch_polling(col, state, [WatchStage("stage", run)], batch=10, interval=0, max_idle=0)
+    assert sorted(dispatched) == [1, 5, 6]
+    assert dispatched.count(1) == 1
+
+
+def test_polling_lookback_reread_respects_batch():
+    db = mongomock.MongoClient().db
+    col, state = db.corpus, db.watch_state
+    ts = dt.datetime(2026, 1, 1, 12, 0, 0)
+    # 25 documents committed late: at the polling position's timestamp but below its _id
+    col.insert_many([{"_id": i, "updated_at": ts} for i in range(25)])
+    col.insert_one({"_id": 100, "updated_at": ts})
+    state.insert_one({"_id": "watch:corpus", "last_updated_at": ts, "last_id": 100})
+    chunks = []
+
+    def run(c, ids):
+        chunks.append(list(ids))
+        c.update_many({"_id": {"$in": ids}}, {"$set": {"process.stage": True}})
+        return len(ids)
+
+    watch_polling(col, state, [WatchStage("stage", run)], batch=10, interval=0, max_idle=0)
+    assert all(len(ch) <= 10 for ch in chunks)
+    dispatched = [i for ch in chunks for i in ch]
+    assert sorted(dispatched) == list(range(25)) + [100]
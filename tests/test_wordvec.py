@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import mongomock
+import pytest
+
+pytest.importorskip("gensim")
+
+from app.stages import stage_stamp  # noqa: E402
+from app.wordvec import train_wordvec  # noqa: E402
+
+WORDS = "แมว กิน ปลา ที่ บ้าน ริม แม่น้ำ".split()
+
+
+def _corpus(n: int = 12):
+    col = mongomock.MongoClient().db.corpus
+    docs = []
+    for i in range(n):
+        doc = {
+            "_id": i,
+            "sentences": [{"text": " ".join(WORDS), "tokens": [{"text": w, "lemma": w} for w in WORDS]}] * 3,
+            "process": {"tokenize": {"v": 1, "h": f"h{i}"}},
+        }
+        docs.append(doc)
+    col.insert_many(docs)
+    return col
+
+
+def _train(col, out, **kw):
+    return train_wordvec(col, output_dir=str(out), workers=1, epochs=1, **{"min_count": 1, "vector_size": 8, **kw})
+
+
+def test_stamps_documents_with_versioned_flag(tmp_path):
+    col = _corpus()
+    assert _train(col, tmp_path) == 12
+    doc = col.find_one({"_id": 0})
+    assert doc["process"]["wordvec"] == stage_stamp("wordvec", doc)
+    assert _train(col, tmp_path) == 0
+
+
+@pytest.mark.parametrize("kw", [
+    {"algorithm": "fasttext"},
+    {"vector_size": 16},
+    {"window": 2},
+    {"min_count": 3},
+])
+def test_incremental_rejects_conflicting_settings(tmp_path, kw):
+    col = _corpus()
+    _train(col, tmp_path)
+    with pytest.raises(ValueError, match="conflict"):
+        _train(col, tmp_path, **kw)
+    # Omitted settings come from the saved model
+    assert train_wordvec(col, output_dir=str(tmp_path), workers=1) == 0
+
+
+def test_retokenized_documents_are_trained_again(tmp_path):
+    col = _corpus()
+    _train(col, tmp_path)
+    col.update_one({"_id": 5}, {"$set": {"process.tokenize": {"v": 1, "h": "again"}}})
+    assert train_wordvec(col, output_dir=str(tmp_path), workers=1) == 1
+    doc = col.find_one({"_id": 5})
+    assert doc["process"]["wordvec"] == stage_stamp("wordvec", doc)